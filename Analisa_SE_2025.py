@@ -1,72 +1,186 @@
+import os
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import requests
-import matplotlib.pyplot as plt
-from io import StringIO
+
+import analytics
+import charts
+import ingestion
+import instrumentation
+import survey_export
+import text_analytics
 
 # Atur layout fullscreen
 st.set_page_config(layout="wide")
 
+# Waktu & memori per tahap (aktif dengan SURVEY_PROFILE=1)
+instrumentation.begin_run("dashboard")
+
 # Tambahkan Judul Dashboard
 st.title("📊 Dashboard Analisis Item Survey Employee Happiness & Engagement")
 st.markdown("---")
 
-# URL Google Sheets dalam format CSV
-sheet_url = "https://docs.google.com/spreadsheets/d/1V_wGUbLyDn6Uo5_EyFeLRp4AgZiYB72csQQJJEg5Yn8/export?format=csv"
-if st.button("🔄 Perbarui Data"):
-    st.cache_data.clear()
-    st.rerun()
-@st.cache_data(ttl=30)  # Cache berlaku selama 30 Detik
-
-def load_google_sheets(url):
-    response = requests.get(url, verify=False)  # Hapus verify=False untuk keamanan
-    if response.status_code == 200:
-        data = StringIO(response.text)
-        df = pd.read_csv(data)
-
-        # Mapping respon ke angka
-        mapping = {
-            'Sangat Setuju': 4,
-            'Setuju': 3,
-            'Tidak Setuju': 2,
-            'Sangat Tidak Setuju': 1
-        }
-
-        start_col = 6  # Kolom ke-7 ke akhir berisi pertanyaan
-        statement_columns = df.columns[start_col:]
+# Sumber data (SURVEY_SOURCE): "sheet" = Google Sheets CSV, "log" = jawaban engagement.py langsung
+log_root = ingestion.log_root()
+# URL Google Sheets dalam format CSV (SURVEY_SHEET_URL, lihat ingestion.SHEET_URL)
+sheet_url = ingestion.SHEET_URL
+# Lokasi penyimpanan kolom lokal (item int8 + metadata kategorikal), dibuka memmap saat start
+store_path = os.environ.get("SURVEY_STORE_PATH", "data/survey_store")
+
+@st.cache_resource
+def get_sheet_loader(url, path):
+    # Satu loader per proses: hanya baris baru yang diunduh/di-parsing, dicek ulang setiap 30 detik
+    # di background sambil tetap menyajikan data terakhir
+    return ingestion.IncrementalSheetLoader(url, ttl=30, store_path=path)
+
+@st.cache_resource
+def get_log_loader(root):
+    # Satu loader per proses: log jawaban lokal dipantau di background, jawaban baru masuk ~1 detik
+    return ingestion.ResponseLogLoader(root)
+
+@st.cache_resource
+def get_rank_cache():
+    # Tabel peringkat Spearman dipakai ulang antar rerun selama versi data sama
+    return analytics.RankCache()
+
+@st.cache_resource
+def get_figure_cache():
+    # PNG grafik dipakai ulang selama data agregat & parameter grafik tidak berubah
+    return charts.FigureCache(max_bytes=64 * 2**20)
+
+@st.cache_resource
+def get_chart_renderer():
+    # Process pool untuk merender grafik paralel; hasilnya tetap masuk figure cache
+    return charts.ChartRenderer(get_figure_cache())
+
+survey_loader = get_log_loader(log_root) if log_root else get_sheet_loader(sheet_url, store_path)
+chart_renderer = get_chart_renderer()
+pending_charts = []
+
+def show_chart(name, *args, **params):
+    # Sisakan tempat grafik di posisinya, render berjalan di background
+    pending_charts.append((st.empty(), chart_renderer.submit(name, *args, **params)))
+
+def flush_charts():
+    # Isi semua tempat grafik yang masih menunggu hasil render
+    while pending_charts:
+        slot, job = pending_charts.pop(0)
+        slot.image(job.png(), width="stretch")
+
+# Hasil bagian berat disimpan per (versi data, filter)
+@st.cache_data(max_entries=16, show_spinner="Menghitung validitas & normalitas...")
+def validity_results(version, selection, _snapshot):
+    happiness_columns, engagement_columns = _snapshot.schema.happiness_columns, _snapshot.schema.engagement_columns
+    # Akumulator co-moment responden sesuai filter, digabung dari cube demografi
+    with instrumentation.span("cube_stats"):
+        validity_stats = _snapshot.aggregates.stats(*selection)
+
+    # Cek jumlah baris
+    if validity_stats.count < 2:
+        return {"warning": "Data terlalu sedikit untuk menghitung korelasi!"}
+
+    # Cek apakah Total Happiness & Engagement memiliki variasi nilai
+    if validity_stats.total_variance(happiness_columns) <= 0 or validity_stats.total_variance(engagement_columns) <= 0:
+        return {"warning": "Total Happiness atau Total Engagement memiliki nilai yang sama di semua baris. Korelasi tidak bisa dihitung!"}
+
+    # Hitung korelasi item dengan skor total dari co-moment
+    with instrumentation.span("validity"):
+        happiness_validity = validity_stats.item_total_correlation(happiness_columns)
+        engagement_validity = validity_stats.item_total_correlation(engagement_columns)
+
+    # Hitung normalitas (z-score, skewness, kurtosis) untuk semua item sekaligus
+    with instrumentation.span("normality"):
+        rows = _snapshot.aggregates.rows(*selection)
+        normality = analytics.normality_stats(_snapshot.df, happiness_columns.append(engagement_columns), rows)
+    return {
+        "happiness_validity": happiness_validity,
+        "engagement_validity": engagement_validity,
+        "happiness_normality": normality.loc[happiness_columns],
+        "engagement_normality": normality.loc[engagement_columns],
+    }
+
+@st.cache_data(max_entries=16, show_spinner="Menghitung korelasi rata-rata...")
+def average_correlation(version, selection, _snapshot):
+    happiness_columns, engagement_columns = _snapshot.schema.happiness_columns, _snapshot.schema.engagement_columns
+    with instrumentation.span("spearman_average"):
+        return analytics.average_score_spearman(
+            _snapshot.df, happiness_columns, engagement_columns, _snapshot.aggregates.rows(*selection)
+        )
 
-        df[statement_columns] = df[statement_columns].replace(mapping)
-        df[statement_columns] = df[statement_columns].apply(pd.to_numeric, errors='coerce').fillna(0)
+@st.cache_data(max_entries=16, show_spinner="Menghitung korelasi antar item...")
+def item_correlation(version, selection, _snapshot):
+    happiness_columns, engagement_columns = _snapshot.schema.happiness_columns, _snapshot.schema.engagement_columns
+    # Hitung korelasi Spearman secara manual tanpa scipy; peringkat berbeda per filter
+    with instrumentation.span("spearman_items"):
+        return analytics.item_spearman(
+            _snapshot.df, happiness_columns, engagement_columns,
+            cache=get_rank_cache(), cache_key=(version, selection),
+            rows=_snapshot.aggregates.rows(*selection)
+        )
 
-        return df, statement_columns
-    return None, None
+if st.button("🔄 Perbarui Data"):
+    # Hanya dataset yang diperbarui; cache lain berganti kunci lewat versi data
+    survey_loader.refresh(force=True)
+    st.rerun()
 
-# Ambil data
-df, statement_columns = load_google_sheets(sheet_url)
+# Sumber log: halaman dijalankan ulang begitu loader membaca jawaban baru
+LIVE_INTERVAL = 1
+
+@st.fragment(run_every=LIVE_INTERVAL)
+def live_updates(version):
+    if survey_loader.snapshot().version != version:
+        st.rerun()
+
+# Bagian analisis yang bisa dibuka; semuanya mengikuti filter
+ANALYSIS_SECTIONS = [
+    "validity_section", "average_correlation_section", "item_correlation_section", "text_section", "export_section"
+]
+
+# Setiap bagian adalah fragment: interaksi di dalamnya hanya menjalankan ulang bagian itu
+NAMES_PER_PAGE = 50
+NO_ENGAGEMENT = "Data ini tidak memuat item Employee Engagement, jadi uji ini tidak bisa dihitung."
+COMMENTS_PER_PAGE = 20
+
+@st.fragment
+def respondent_list(snapshot, selection):
+    # Hanya satu halaman nama yang dikirim ke browser; pencarian lewat indeks trigram/awalan
+    query = st.text_input("🔎 Cari nama:", key="name_query")
+    matches = snapshot.aggregates.search_names(query, *selection)
+    pages = max(1, -(-len(matches) // NAMES_PER_PAGE))
+    page = min(st.number_input("Halaman:", min_value=1, value=1, step=1, key="name_page"), pages)
+
+    shown = matches[(page - 1) * NAMES_PER_PAGE:page * NAMES_PER_PAGE]
+    names = snapshot.df[analytics.NAME_COLUMN].iloc[shown].astype(str).tolist()
+    st.dataframe({"Nama": names}, hide_index=True, height=300, width=300)
+    st.caption(f"{len(matches)} nama · halaman {page} dari {pages}")
+
+@st.fragment
+@instrumentation.timed("filter_section")
+def filter_section(snapshot):
+    df = snapshot.df
 
-if df is not None:
     # 🎯 **Filter Data**
     st.markdown("## 🎯 **Filter Data**", unsafe_allow_html=True)
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        jabatan_list = ["All"] + sorted(df["Posisi/Jabatan"].dropna().unique().tolist())
+        jabatan_list = snapshot.aggregates.filter_options("Posisi/Jabatan")
         selected_jabatan = st.selectbox("📌 Pilih Jabatan:", jabatan_list)
     with col2:
-        masa_kerja_list = ["All"] + sorted(df["Masa Kerja"].dropna().unique().tolist())
+        masa_kerja_list = snapshot.aggregates.filter_options("Masa Kerja")
         selected_masa_kerja = st.selectbox("📌 Pilih Masa Kerja:", masa_kerja_list)
     with col3:
-        usia_list = ["All"] + sorted(df["Usia"].dropna().unique().tolist())
+        usia_list = snapshot.aggregates.filter_options("Usia")
         selected_usia = st.selectbox("📌 Pilih Usia:", usia_list)
 
-    df_filtered = df
-    if selected_jabatan != "All":
-        df_filtered = df_filtered[df_filtered["Posisi/Jabatan"] == selected_jabatan]
-    if selected_masa_kerja != "All":
-        df_filtered = df_filtered[df_filtered["Masa Kerja"] == selected_masa_kerja]
-    if selected_usia != "All":
-        df_filtered = df_filtered[df_filtered["Usia"] == selected_usia]
+    # Jumlah dan rata-rata per filter diambil dari cube demografi, tanpa memindai baris
+    selection = (selected_jabatan, selected_masa_kerja, selected_usia)
+    segment = snapshot.aggregates.stats(*selection)
+
+    # Filter berubah saat ada bagian analisis terbuka: jalankan ulang seluruh halaman
+    if selection != st.session_state.get("selection"):
+        st.session_state["selection"] = selection
+        if any(st.session_state.get(key) for key in ANALYSIS_SECTIONS):
+            st.rerun()
 
     st.divider()
 
@@ -74,65 +188,33 @@ if df is not None:
 
     with col1:
         st.write("### 📌 Total Responden Berdasarkan Jabatan")
-        jabatan_counts = df_filtered["Posisi/Jabatan"].value_counts()
-        total_responden = jabatan_counts.sum()  # Menghitung total responden
-    
+        jabatan_counts = snapshot.aggregates.counts_by("Posisi/Jabatan", *selection)
+        total_responden = segment.count  # Termasuk responden tanpa jabatan (mis. sumber log jawaban)
+
         # Menampilkan total responden di Streamlit
         st.write(f"**Total Responden: {total_responden}**")
+        if survey_loader.duplicates:
+            st.caption(f"{survey_loader.duplicates} jawaban ganda (isi sama, beda Timestamp) tidak dihitung.")
 
         if not jabatan_counts.empty:
-            fig, ax = plt.subplots(figsize=(5, 5))  # Ukuran diperbesar
-
-            # Warna dinamis sesuai jumlah kategori
-            colors = plt.get_cmap("Set3")(np.linspace(0, 1, len(jabatan_counts)))
-
-            # Pie chart
-            wedges, texts, autotexts = ax.pie(
-                jabatan_counts, 
-                labels=jabatan_counts.index, 
-                autopct=lambda p: f'{int(p * total_responden / 100)}' if total_responden > 0 else '',
-                startangle=90, 
-                colors=colors
-            )
-
-            ax.axis("equal")  # Menjaga proporsi lingkaran
-
-            # Ubah teks autopct agar hanya menampilkan angka (bukan persen)
-            for autotext, count in zip(autotexts, jabatan_counts):
-                autotext.set_text(f"{count}")  # Ganti teks dengan angka responden
-            
-            # Perbaikan ukuran teks agar lebih terbaca
-            for text in texts:
-                text.set_fontsize(10)  
-            for autotext in autotexts:
-                autotext.set_fontsize(10)  
-
-            st.pyplot(fig)
-
-            # Menampilkan daftar nama responden sesuai filter dengan tampilan scroll
+            show_chart("pie", jabatan_counts)
+
+            # Menampilkan daftar nama responden sesuai filter, per halaman
             st.write("###📌 Daftar Nama Responden:")
-            if not df_filtered.empty and "Isikan Nama Anda" in df_filtered.columns:
-                names = df_filtered["Isikan Nama Anda"].dropna().tolist()
-
-                # Gunakan markdown dengan bullet points agar lebih rapi
-                st.markdown(
-                    '<div style="max-height: 300px; width: 300px; overflow-y: auto; border: 1px solid #ddd; padding: 9px; border-radius: 4px;">' +
-                    "".join(f"<p>• {name}</p>" for name in names) +
-                    '</div>',
-                    unsafe_allow_html=True
-                )
-            
-        else:
+            if analytics.NAME_COLUMN in df.columns:
+                respondent_list(snapshot, selection)
+
+        elif segment.count == 0:
             st.warning("Tidak ada data responden untuk filter ini.")
 
     with col2:
         #st.write("### Rata-rata Nilai Berdasarkan Jabatan")
 
-        if not df_filtered.empty:
+        if segment.count > 0:
             # Employee Happiness
             #st.subheader("Employee Happiness")
-            happiness_columns = df.columns[6:22]  
-            avg_happiness = df_filtered[happiness_columns].mean(numeric_only=True).round(2)
+            happiness_columns, engagement_columns = snapshot.schema.happiness_columns, snapshot.schema.engagement_columns
+            avg_happiness = segment.item_means(happiness_columns)
 
             # Tampilkan dalam bentuk tabel
             #st.dataframe(avg_happiness.to_frame(name="Rata-rata Skor"), use_container_width=True)
@@ -141,165 +223,99 @@ if df is not None:
             st.subheader("📌 Employee Happiness")
             st.subheader("(Skala 1 s.d 4)")
 
-            # Hitung rata-rata keseluruhan Employee Happiness
-            overall_avg_happiness = avg_happiness.mean().round(2)
-
-            # Menentukan pertanyaan dengan nilai terbesar & terkecil
-            max_question = avg_happiness.idxmax()  # Pertanyaan dengan skor tertinggi
-            max_value = avg_happiness.max()
-
-            min_question = avg_happiness.idxmin()  # Pertanyaan dengan skor terendah
-            min_value = avg_happiness.min()
+            # Hitung rata-rata keseluruhan serta pertanyaan dengan nilai terbesar & terkecil
+            summary = analytics.summarize_item_means(avg_happiness)
+            overall_avg_happiness = summary["overall"]
+            max_question, max_value = summary["max_question"], summary["max_value"]
+            min_question, min_value = summary["min_question"], summary["min_value"]
 
             # Tampilkan rata-rata keseluruhan di Streamlit
             st.write(f"**Rata-rata Keseluruhan Employee Happiness: {overall_avg_happiness}**")
             st.write(f"📈 **Item dengan skor tertinggi**: `{max_question}` ({max_value})")
             st.write(f"📉 **Item dengan skor terendah**: `{min_question}` ({min_value})")
 
-            fig, ax = plt.subplots(figsize=(8, 10))  # Ukuran lebih besar untuk keterbacaan
-            bars = ax.barh(avg_happiness.index, avg_happiness.values, color="blue")
+            show_chart("bar", avg_happiness, "blue", "Rata-rata Employee Happiness")
 
-            # Tambahkan label nilai pada setiap batang
-            for bar in bars:
-                ax.text(bar.get_width(), bar.get_y() + bar.get_height()/2, 
-                        f"{bar.get_width():.2f}", va='center', ha='left', fontsize=10, color="black")
+            # Employee Engagement (tidak ada pada jawaban engagement.py yang dibaca dari log)
+            if not engagement_columns.empty:
+                #st.subheader("Employee Engagement")
+                avg_engagement = segment.item_means(engagement_columns)
 
-            ax.set_xlabel("Rata-rata Skor")
-            ax.set_ylabel("Kategori")
-            ax.set_title("Rata-rata Employee Happiness")
-            st.pyplot(fig)
+                # Tampilkan dalam bentuk tabel
+                #st.dataframe(avg_engagement.to_frame(name="Rata-rata Skor"), use_container_width=True)
 
-            # Employee Engagement
-            #st.subheader("Employee Engagement")
-            engagement_columns = df.columns[22:44]  
-            avg_engagement = df_filtered[engagement_columns].mean(numeric_only=True).round(2)
+                ## Grafik Employee Engagement (Horizontal Bar Chart)
+                st.subheader("📌 Employee Engagement")
 
-            # Tampilkan dalam bentuk tabel
-            #st.dataframe(avg_engagement.to_frame(name="Rata-rata Skor"), use_container_width=True)
+                # Hitung rata-rata keseluruhan serta pertanyaan dengan nilai terbesar & terkecil
+                summary = analytics.summarize_item_means(avg_engagement)
+                overall_avg_engagement = summary["overall"]
+                max_question, max_value = summary["max_question"], summary["max_value"]
+                min_question, min_value = summary["min_question"], summary["min_value"]
 
-            ## Grafik Employee Engagement (Horizontal Bar Chart)
-            st.subheader("📌 Employee Engagement")
+                # Tampilkan rata-rata keseluruhan di Streamlit
+                st.write(f"**Rata-rata Keseluruhan Employee Engagement: {overall_avg_engagement}**")
+                st.write(f"📈 **Item dengan skor tertinggi**: `{max_question}` ({max_value})")
+                st.write(f"📉 **Item dengan skor terendah**: `{min_question}` ({min_value})")
 
-            # Hitung rata-rata keseluruhan Employee Engagement
-            overall_avg_engagement = avg_engagement.mean().round(2)
+                show_chart("bar", avg_engagement, "green", "Rata-rata Employee Engagement")
 
-            # Menentukan pertanyaan dengan nilai terbesar & terkecil
-            max_question = avg_engagement.idxmax()  # Pertanyaan dengan skor tertinggi
-            max_value = avg_engagement.max()
-
-            min_question = avg_engagement.idxmin()  # Pertanyaan dengan skor terendah
-            min_value = avg_engagement.min()
+        else:
+            st.warning("Tidak ada data yang cocok dengan filter yang dipilih.")
 
-            # Tampilkan rata-rata keseluruhan di Streamlit
-            st.write(f"**Rata-rata Keseluruhan Employee Engagement: {overall_avg_engagement}**")
-            st.write(f"📈 **Item dengan skor tertinggi**: `{max_question}` ({max_value})")
-            st.write(f"📉 **Item dengan skor terendah**: `{min_question}` ({min_value})")
-            
-            fig, ax = plt.subplots(figsize=(8, 10))  # Ukuran lebih besar agar lebih jelas
-            bars = ax.barh(avg_engagement.index, avg_engagement.values, color="green")  # Warna berbeda untuk membedakan
+    flush_charts()
 
-            # Tambahkan label nilai pada setiap batang
-            for bar in bars:
-                ax.text(bar.get_width(), bar.get_y() + bar.get_height()/2, 
-                        f"{bar.get_width():.2f}", va='center', ha='left', fontsize=10, color="black")
+    st.divider()
 
-            ax.set_xlabel("Rata-rata Skor")
-            ax.set_ylabel("Kategori")
-            ax.set_title("Rata-rata Employee Engagement")
-            st.pyplot(fig)
 
-        else:
-            st.warning("Tidak ada data yang cocok dengan filter yang dipilih.")
-        
-    st.divider()    
-    
-    # Judul
-st.write("### 📊 Uji Validitas & Normalitas Employee Happiness & Engagement")
-# Penjelasan tentang standar nilai validitas dan normalitas
-st.write("""
+# Bagian berat baru dihitung saat expander dibuka (on_change="rerun" mengisi .open)
+@st.fragment
+@instrumentation.timed("validity_section")
+def validity_section(snapshot, selection):
+    section = st.expander(
+        "📊 Uji Validitas & Normalitas Employee Happiness & Engagement",
+        key="validity_section", on_change="rerun"
+    )
+    with section:
+        # Penjelasan tentang standar nilai validitas dan normalitas
+        st.write("""
     **1. Uji Validitas**  
     Uji validitas mengukur sejauh mana item dalam suatu instrumen benar-benar mengukur hal yang dimaksud.  
     Item dianggap **valid** jika korelasinya dengan skor total ≥ 0.3.
 
     **2. Uji Normalitas**  
     Uji normalitas menguji apakah data terdistribusi secara simetris (normal).  
-    Data dianggap **normal** jika lebih dari 95% data berada dalam rentang -1.96 hingga 1.96 dari rata-rata.
+    Data dianggap **normal** jika lebih dari 95% data berada dalam rentang -1.96 hingga 1.96 dari rata-rata.  
+    Skewness dan kurtosis ditampilkan sebagai informasi tambahan (keduanya mendekati 0 untuk data normal).
 """)
-
-if df is not None:
-    df_filtered = df.copy()  # Salin data untuk menghindari modifikasi langsung
-    
-    if not df_filtered.empty:
-        # Ambil kolom Employee Happiness & Employee Engagement
-        happiness_columns = df.columns[6:22]  
-        engagement_columns = df.columns[22:44]  
-
-        # Pastikan hanya kolom numerik yang diproses
-        df_filtered[happiness_columns] = df_filtered[happiness_columns].apply(pd.to_numeric, errors="coerce")
-        df_filtered[engagement_columns] = df_filtered[engagement_columns].apply(pd.to_numeric, errors="coerce")
-
-        # Hapus baris yang seluruhnya NaN setelah konversi
-        df_filtered.dropna(subset=list(happiness_columns) + list(engagement_columns), how="all", inplace=True)
-
-        # Cek jumlah baris setelah filtering
-        if df_filtered.shape[0] < 2:
-            st.warning("Data terlalu sedikit untuk menghitung korelasi!")
-            st.stop()
-
-        # Hitung skor total
-        df_filtered["Total Happiness"] = df_filtered[happiness_columns].sum(axis=1, skipna=True)
-        df_filtered["Total Engagement"] = df_filtered[engagement_columns].sum(axis=1, skipna=True)
-
-        # Cek apakah Total Happiness & Engagement memiliki variasi nilai
-        if df_filtered["Total Happiness"].nunique() < 2 or df_filtered["Total Engagement"].nunique() < 2:
-            st.warning("Total Happiness atau Total Engagement memiliki nilai yang sama di semua baris. Korelasi tidak bisa dihitung!")
-            st.stop()
-
-        # Hitung korelasi
-        happiness_validity = df_filtered[happiness_columns].corrwith(df_filtered["Total Happiness"])
-        engagement_validity = df_filtered[engagement_columns].corrwith(df_filtered["Total Engagement"])
-
-        # Fungsi Z-score dan Uji Normalitas
-        def calculate_z_scores(data):
-            mean = np.mean(data)
-            std_dev = np.std(data, ddof=1)  # Gunakan ddof=1 untuk sampel
-            z_scores = [(x - mean) / std_dev for x in data]
-            return z_scores
-
-        def check_normality(z_scores):
-            threshold = 1.96  # 95% confidence level
-            outliers = [z for z in z_scores if abs(z) > threshold]
-            return len(outliers) / len(z_scores) < 0.05  # Jika <5% outlier, anggap normal
-
-        # Hitung normalitas untuk setiap item dalam Employee Happiness & Engagement
-        def get_normality_status(columns):
-            normality_status = {}
-            for col in columns:
-                z_scores = calculate_z_scores(df[col].dropna())
-                is_normal = check_normality(z_scores)
-                normality_status[col] = "Normal" if is_normal else "Tidak Normal"
-            return normality_status
-
-        happiness_normality_status = get_normality_status(happiness_columns)
-        engagement_normality_status = get_normality_status(engagement_columns)
+        if not section.open:
+            return
+        if snapshot.schema.engagement_columns.empty:
+            st.info(NO_ENGAGEMENT)
+            return
+
+        results = validity_results(snapshot.version, selection, snapshot)
+        if "warning" in results:
+            st.warning(results["warning"])
+            return
+
+        happiness_validity = results["happiness_validity"]
+        engagement_validity = results["engagement_validity"]
+        happiness_normality_status = results["happiness_normality"]["status"].to_dict()
+        engagement_normality_status = results["engagement_normality"]["status"].to_dict()
 
         # Gabungkan hasil validitas dan normalitas dalam DataFrame
-        happiness_validity_df = happiness_validity.to_frame(name="Korelasi dengan Total Happiness")
-        engagement_validity_df = engagement_validity.to_frame(name="Korelasi dengan Total Engagement")
-
-        happiness_validity_df["Status Normalitas"] = happiness_validity_df.index.map(happiness_normality_status)
-        engagement_validity_df["Status Normalitas"] = engagement_validity_df.index.map(engagement_normality_status)
+        happiness_validity_df = analytics.validity_table(happiness_validity, results["happiness_normality"], "Total Happiness")
+        engagement_validity_df = analytics.validity_table(engagement_validity, results["engagement_normality"], "Total Engagement")
 
-        # Hitung jumlah item normal dan tidak normal
-        happiness_normal_count = sum(1 for status in happiness_normality_status.values() if status == "Normal")
-        happiness_not_normal_count = len(happiness_normality_status) - happiness_normal_count
-        engagement_normal_count = sum(1 for status in engagement_normality_status.values() if status == "Normal")
-        engagement_not_normal_count = len(engagement_normality_status) - engagement_normal_count
+        # Hitung jumlah item normal
+        happiness_normal_count = analytics.count_normal(happiness_normality_status)
+        engagement_normal_count = analytics.count_normal(engagement_normality_status)
 
         # Cek apakah ada kolom dengan semua NaN dalam hasil korelasi
         if happiness_validity_df.isna().all().values[0] or engagement_validity_df.isna().all().values[0]:
             st.warning("Korelasi tidak dapat dihitung karena semua nilai NaN atau hanya memiliki satu nilai unik.")
-            st.stop()
+            return
 
         # **Tampilkan DataFrame tanpa Styling**
         col1, col2 = st.columns([1, 1])
@@ -313,43 +329,15 @@ if df is not None:
             st.dataframe(engagement_validity_df)
 
         # **Kesimpulan Uji Validitas dan Normalitas dalam Bentuk Tabel**
-        validity_and_normality_summary = {
-            'Label': ['Employee Happiness', 'Employee Engagement'],
-            'Jumlah Item Valid': [
-                sum(happiness_validity >= 0.3),
-                sum(engagement_validity >= 0.3)
-            ],
-            'Jumlah Item Tidak Valid': [
-                len(happiness_validity) - sum(happiness_validity >= 0.3),
-                len(engagement_validity) - sum(engagement_validity >= 0.3)
-            ],
-            'Jumlah Item Normal': [
-                sum(1 for status in happiness_normality_status.values() if status == "Normal"),
-                sum(1 for status in engagement_normality_status.values() if status == "Normal")
-            ],
-            'Jumlah Item Tidak Normal': [
-                len(happiness_normality_status) - sum(1 for status in happiness_normality_status.values() if status == "Normal"),
-                len(engagement_normality_status) - sum(1 for status in engagement_normality_status.values() if status == "Normal")
-            ]
-         }
-
-        summary_df = pd.DataFrame(validity_and_normality_summary)
+        summary_df = analytics.validity_normality_summary(
+            happiness_validity, engagement_validity,
+            happiness_normality_status, engagement_normality_status
+        )
 
         # Menampilkan tabel kesimpulan
         st.write("### 📊 Kesimpulan Uji Validitas & Normalitas")
         st.dataframe(summary_df)
 
-        # **Kesimpulan Keseluruhan**
-        validity_overall = (
-            "✅ Semua item dalam Employee Happiness dan Employee Engagement valid dan memenuhi standar korelasi (≥ 0.3)."
-            if sum(happiness_validity >= 0.3) == len(happiness_validity) and sum(engagement_validity >= 0.3) == len(engagement_validity)
-            else "⚠️ Beberapa item dalam Employee Happiness dan Employee Engagement tidak valid, perlu ditinjau lebih lanjut."
-        )
-
-        normality_overall = (
-            "✅ Sebagian besar item dalam Employee Happiness dan Employee Engagement terdistribusi normal."
-            if (happiness_normal_count > 0 and engagement_normal_count > 0) else "⚠️ Tidak semua item dalam Employee Happiness dan Employee Engagement terdistribusi normal."
-        )
         st.write("### 📌 Kesimpulan Keseluruhan:")
         if sum(happiness_validity < 0.3) > 0 or sum(engagement_validity < 0.3) > 0:
             st.markdown("❗ **Tindak Lanjut untuk Item Tidak Valid:**")
@@ -363,12 +351,18 @@ if df is not None:
             st.markdown("   - Pertimbangkan untuk menggunakan analisis non-parametrik jika transformasi tidak berhasil.")
         else:
             st.markdown("✅ **Sebagian besar item terdistribusi normal. Lanjutkan dengan analisis menggunakan metode parametik.**")
-        
-        st.divider()
-    
-    st.write("### 🔥 Korelasi Rata-rata Nilai Employee Happiness & Employee Engagement")
-    st.write("### 📊 Penjelasan Norma Uji Korelasi")
-    st.write("""
+
+
+@st.fragment
+@instrumentation.timed("average_correlation_section")
+def average_correlation_section(snapshot, selection):
+    section = st.expander(
+        "🔥 Korelasi Rata-rata Nilai Employee Happiness & Employee Engagement",
+        key="average_correlation_section", on_change="rerun"
+    )
+    with section:
+        st.write("### 📊 Penjelasan Norma Uji Korelasi")
+        st.write("""
 Untuk menginterpretasikan kekuatan hubungan antara dua variabel, digunakan standar berikut:
 
 - **0.00 - 0.19**: Korelasi sangat lemah atau tidak ada korelasi
@@ -379,133 +373,69 @@ Untuk menginterpretasikan kekuatan hubungan antara dua variabel, digunakan stand
 
 Nilai positif menunjukkan hubungan positif, sedangkan nilai negatif menunjukkan hubungan negatif.
 """ )
-    
-if df is not None:
-    if not df_filtered.empty:
-        # Ambil kolom Employee Happiness & Employee Engagement
-        happiness_columns = df.columns[6:22]  # Employee Happiness
-        engagement_columns = df.columns[22:44]  # Employee Engagement
-
-        # Hitung rata-rata per responden
-        df_avg = pd.DataFrame({
-            "Employee Happiness": df_filtered[happiness_columns].mean(axis=1),
-            "Employee Engagement": df_filtered[engagement_columns].mean(axis=1)
-        })
+        if not section.open:
+            return
+        if snapshot.schema.engagement_columns.empty:
+            st.info(NO_ENGAGEMENT)
+            return
+        if snapshot.aggregates.stats(*selection).count < 2:
+            st.warning("Tidak cukup data untuk menghitung korelasi.")
+            return
 
         # Hitung korelasi Spearman antara rata-rata Employee Happiness & Engagement
-        spearman_corr = df_avg.corr(method='spearman')
+        spearman_corr = average_correlation(snapshot.version, selection, snapshot)
 
         # Membuat heatmap manual dengan Matplotlib
-        fig, ax = plt.subplots(figsize=(6, 5))
-        cax = ax.matshow(spearman_corr, cmap="coolwarm", vmin=-1, vmax=1)
-        fig.colorbar(cax)
-
-        # Menyesuaikan label sumbu X dan Y
         categories = ["Employee Happiness", "Employee Engagement"]
-        ax.set_xticks(range(len(categories)))
-        ax.set_yticks(range(len(categories)))
-        ax.set_xticklabels(categories, rotation=45, fontsize=10, ha="right")
-        ax.set_yticklabels(categories, fontsize=10)
-
-        # Menampilkan angka korelasi dalam heatmap
-        for (i, j), val in np.ndenumerate(spearman_corr.values):
-            color = "white" if abs(val) > 0.5 else "black"
-            ax.text(j, i, f'{val:.2f}', ha='center', va='center', color=color, fontsize=12)
-
-        ax.xaxis.set_ticks_position("bottom")
-        ax.xaxis.set_label_position("bottom")
-
-        st.pyplot(fig)
+        show_chart("spearman_heatmap", spearman_corr, categories)
 
         ### Kesimpulan Otomatis ###
         correlation_value = spearman_corr.iloc[0, 1]  # Korelasi antara Happiness & Engagement
 
         st.write("### 🔍 Kesimpulan dari Korelasi")
         # Tentukan kategori korelasi
-        if correlation_value < 0.20:
-            correlation_category = "Sangat lemah atau tidak ada korelasi"
-        elif 0.20 <= correlation_value < 0.40:
-            correlation_category = "Lemah"
-        elif 0.40 <= correlation_value < 0.60:
-            correlation_category = "Sedang"
-        elif 0.60 <= correlation_value < 0.80:
-            correlation_category = "Kuat"
-        else:
-            correlation_category = "Sangat kuat"
+        correlation_category = analytics.correlation_category(correlation_value)
 
         # Tampilkan kesimpulan kategori korelasi
         st.write(f"**Nilai Korelasi (r) antara Employee Happiness dan Employee Engagement adalah {correlation_value:.2f}**.")
         st.write(f"Kekuatan korelasi ini termasuk dalam kategori: **{correlation_category}**.")
-
-    else:
-        st.warning("Tidak cukup data untuk menghitung korelasi.")
-
-    st.divider()
-    
-    st.write("### 🔥 Korelasi antara Employee Happiness & Employee Engagement")
-if df is not None:
-    if not df_filtered.empty:
-        # Ambil kolom Employee Happiness & Employee Engagement
-        happiness_columns = df.columns[6:22]  # Employee Happiness
-        engagement_columns = df.columns[22:44]  # Employee Engagement
-
-        # Hitung korelasi Spearman secara manual tanpa scipy
-        rank_df = df_filtered.rank(method="average")  # Ranking untuk korelasi Spearman
-        happiness_engagement_corr = rank_df.corr(method="pearson").loc[happiness_columns, engagement_columns]
-
-         # **HEATMAP KORELASI**
-        fig, ax = plt.subplots(figsize=(12, 8))
-
-        # Tampilkan matriks korelasi sebagai heatmap
-        cax = ax.matshow(happiness_engagement_corr, cmap="coolwarm", vmin=-1, vmax=1)
-        fig.colorbar(cax)
-
-        # Atur label sumbu
-        ax.set_xticks(range(len(engagement_columns)))
-        ax.set_yticks(range(len(happiness_columns)))
-        ax.set_xticklabels(engagement_columns, rotation=75, fontsize=8, ha="right")
-        ax.set_yticklabels(happiness_columns, fontsize=8)
-
-        # Tambahkan nilai korelasi di dalam heatmap
-        for (i, j), val in np.ndenumerate(happiness_engagement_corr.values):
-            color = "white" if abs(val) > 0.5 else "black"
-            ax.text(j, i, f'{val:.2f}', ha='center', va='center', color=color, fontsize=7)
-
-        # Atur posisi label sumbu x agar di bawah heatmap
-        ax.xaxis.set_ticks_position("bottom")
-        ax.xaxis.set_label_position("bottom")
-
-        ax.set_title("Heatmap Korelasi Employee Happiness & Employee Engagement", fontsize=12)
-
-        st.pyplot(fig)  # **Tampilkan heatmap di Streamlit**
+        flush_charts()
+
+
+@st.fragment
+@instrumentation.timed("item_correlation_section")
+def item_correlation_section(snapshot, selection):
+    section = st.expander(
+        "🔥 Korelasi antara Employee Happiness & Employee Engagement",
+        key="item_correlation_section", on_change="rerun"
+    )
+    with section:
+        if not section.open:
+            return
+        if snapshot.schema.engagement_columns.empty:
+            st.info(NO_ENGAGEMENT)
+            return
+        if snapshot.aggregates.stats(*selection).count < 2:
+            st.warning("Tidak cukup data untuk menghitung korelasi.")
+            return
+
+        happiness_columns = snapshot.schema.happiness_columns
+        happiness_engagement_corr = item_correlation(snapshot.version, selection, snapshot)
+
+        # **HEATMAP KORELASI**
+        show_chart("item_heatmap", happiness_engagement_corr)
 
         # **MENCARI KORELASI POSITIF KUAT TANPA PENGULANGAN**
-        correlation_pairs = happiness_engagement_corr.unstack().reset_index()
-
-        # Tukar urutan kolom agar sesuai dengan matriks korelasi
-        correlation_pairs.columns = ["Employee Engagement", "Employee Happiness", "Correlation"]
-
-        # Urutkan dari korelasi tertinggi
-        correlation_pairs = correlation_pairs.sort_values("Correlation", ascending=False).reset_index(drop=True)
-
-        # Klasifikasi korelasi (hanya yang positif kuat)
-        strong_positive_correlation = correlation_pairs[correlation_pairs["Correlation"] > 0.6]
-
-        # Hilangkan duplikasi Employee Happiness, simpan hanya korelasi tertinggi per item
-        unique_strong_positive = strong_positive_correlation.drop_duplicates(subset=["Employee Happiness"], keep="first")
-
-        # Hitung jumlah unik Employee Happiness yang memiliki korelasi positif kuat
-        unique_happiness_strong_positive = unique_strong_positive["Employee Happiness"].nunique()
-
-        # Hitung ulang persentase hanya untuk korelasi positif kuat
+        unique_strong_positive, unique_happiness_strong_positive, strong_positive_percentage = (
+            analytics.strong_positive_pairs(happiness_engagement_corr)
+        )
         total_happiness_items = len(happiness_columns)
-        strong_positive_percentage = (unique_happiness_strong_positive / total_happiness_items) * 100 if total_happiness_items > 0 else 0
 
         # **Menampilkan daftar korelasi positif kuat tanpa pengulangan**
         st.write("### 📌 Daftar Item dengan Korelasi Positif Kuat (Tanpa Pengulangan)")
         if not unique_strong_positive.empty:
             st.write(f"#### 🔴 Korelasi Positif Kuat (r > 0.6) - **{unique_happiness_strong_positive} item**")
-            st.dataframe(unique_strong_positive[["Employee Happiness", "Employee Engagement", "Correlation"]])  
+            st.dataframe(unique_strong_positive[["Employee Happiness", "Employee Engagement", "Correlation"]])
         else:
             st.write("ℹ️ **Tidak ada korelasi positif kuat antara Employee Happiness & Employee Engagement.**")
 
@@ -523,9 +453,89 @@ if df is not None:
             st.warning("⚠️ **Sebagian item Employee Happiness dapat direpresentasikan oleh Employee Engagement, tetapi tidak semuanya.**")
         else:
             st.error("❌ **Employee Happiness tidak dapat sepenuhnya diwakili oleh Employee Engagement.**")
+        flush_charts()
+
+
+@st.fragment
+@instrumentation.timed("text_section")
+def text_section(snapshot, selection):
+    section = st.expander("💬 Harapan Karyawan untuk Lebih Bahagia", key="text_section", on_change="rerun")
+    with section:
+        if not section.open:
+            return
+        # Frekuensi kata/frasa per segmen sudah dihitung saat data masuk; di sini hanya dijumlahkan
+        texts = snapshot.aggregates.texts
+        st.write(f"**Jumlah komentar: {texts.comment_count(selection)}**")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("### 🔤 Kata Terbanyak")
+            st.dataframe(texts.top_terms(selection, kind="terms"), hide_index=True)
+        with col2:
+            st.write("### 🧩 Frasa Terbanyak")
+            st.dataframe(texts.top_terms(selection, kind="phrases"), hide_index=True)
+
+        query = st.text_input("🔎 Cari kata kunci komentar:", key="comment_query")
+        if query.strip():
+            matches = snapshot.aggregates.search_comments(query, *selection)
+            pages = max(1, -(-len(matches) // COMMENTS_PER_PAGE))
+            page = min(st.number_input("Halaman:", min_value=1, value=1, step=1, key="comment_page"), pages)
+            shown = matches[(page - 1) * COMMENTS_PER_PAGE:page * COMMENTS_PER_PAGE]
+            columns = [c for c in [analytics.NAME_COLUMN, text_analytics.TEXT_COLUMN] if c in snapshot.df.columns]
+            st.dataframe(snapshot.df[columns].iloc[shown], hide_index=True)
+            st.caption(f"{len(matches)} komentar · halaman {page} dari {pages}")
+
+
+@st.fragment
+@instrumentation.timed("export_section")
+def export_section(snapshot, selection):
+    section = st.expander("📥 Ekspor Data", key="export_section", on_change="rerun")
+    with section:
+        if not section.open:
+            return
+        st.write("Responden sesuai filter beserta tabel turunan (rata-rata item, validitas, pasangan korelasi).")
+        export_format = st.radio("Format:", ["XLSX", "CSV"], horizontal=True, key="export_format")
+        if export_format == "CSV":
+            table = st.selectbox("Tabel:", survey_export.TABLES, key="export_table")
+            file_name = "hasil_survei_" + table.lower().replace(" ", "_").replace("-", "_") + ".csv"
+            mime = survey_export.CSV_MIME
+        else:
+            table, file_name, mime = None, "hasil_survei.xlsx", survey_export.XLSX_MIME
 
-    else:
-        st.warning("Tidak cukup data untuk menghitung korelasi.")
+        def export_file():
+            # Dibuat saat tombol diklik, ditulis per potongan ke file sementara
+            return survey_export.spool(survey_export.export_chunks(
+                export_format.lower(), snapshot.df, snapshot.schema, snapshot.aggregates, selection, table
+            ))
+
+        st.download_button("📥 Unduh", data=export_file, file_name=file_name, mime=mime, on_click="ignore")
 
+
+# Ambil data
+with instrumentation.span("data_refresh"):
+    snapshot = survey_loader.refresh()
+if log_root:
+    live_updates(snapshot.version)
+if survey_loader.last_error is not None and snapshot.df is not None:
+    source = "log jawaban" if log_root else "Google Sheets"
+    st.warning(f"Gagal memperbarui data dari {source}, menampilkan data terakhir yang berhasil dimuat.")
+
+if snapshot.df is not None:
+    filter_section(snapshot)
+    selection = st.session_state["selection"]
+    validity_section(snapshot, selection)
+    average_correlation_section(snapshot, selection)
+    item_correlation_section(snapshot, selection)
+    if text_analytics.TEXT_COLUMN in snapshot.df.columns:
+        text_section(snapshot, selection)
+    export_section(snapshot, selection)
 else:
-    st.error("Gagal mengambil data. Cek kembali URL atau izin Google Sheets.")
\ No newline at end of file
+    if log_root:
+        st.info(f"Belum ada jawaban survei di {log_root}.")
+    else:
+        st.error("Gagal mengambil data. Cek kembali URL atau izin Google Sheets.")
+    if survey_loader.last_error is not None:
+        # Misalnya tata letak kolom sheet tidak sesuai skema survei
+        st.caption(str(survey_loader.last_error))
+
+instrumentation.debug_panel()
+instrumentation.end_run()
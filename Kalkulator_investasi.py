@@ -4,9 +4,15 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+import amortization
+import instrumentation
+
 # Konfigurasi Layout Wide
 st.set_page_config(page_title="Kalkulator Investasi", layout="wide")
 
+# Waktu & memori per tahap (aktif dengan SURVEY_PROFILE=1)
+instrumentation.begin_run("kalkulator")
+
 # Header
 st.markdown("<h1 style='text-align: center; color: #007BFF;'>💰 Kalkulator Investasi 💰</h1>", unsafe_allow_html=True)
 st.write("🔹 Hitung angsuran pinjaman dan analisis arus kas investasi.")
@@ -21,32 +27,38 @@ with col_input:
     principal_input = st.text_input("💵 Jumlah Pinjaman", "0")
     annual_rate = st.number_input("📊 Suku Bunga Tahunan (%)", min_value=0.0, value=0.0, step=0.1)
     num_periods = st.number_input("⏳ Jangka Waktu (Tahun)", min_value=1, value=1, step=1)
+    frequency = st.selectbox("🗓️ Frekuensi Angsuran", list(amortization.FREQUENCIES), index=2)
+    periods_per_year = amortization.FREQUENCIES[frequency]
+    period_label = amortization.PERIOD_LABELS[periods_per_year]
+    grace_periods = st.number_input(f"⏸️ Masa Tenggang ({period_label}, bunga saja)", min_value=0, value=0, step=1, key="grace_periods")
+    balloon_input = st.text_input("🎈 Pembayaran Balon di Akhir", "0")
 
     # Konversi input jumlah pinjaman ke float
     try:
         principal = float(principal_input.replace(",", "").replace(".", ""))
     except ValueError:
         principal = 0
+    try:
+        balloon = float(balloon_input.replace(",", "").replace(".", ""))
+    except ValueError:
+        balloon = 0
 
 # Hitung Angsuran
 rate = annual_rate / 100
 periods = num_periods
 
-if rate > 0:
-    pmt = npf.pmt(rate, periods, -principal)
-else:
-    pmt = principal / periods
-
-balance = principal
-data = []
-for i in range(1, periods + 1):
-    saldo_awal = balance
-    interest = balance * rate
-    principal_payment = pmt - interest
-    balance -= principal_payment
-    data.append([i, saldo_awal, pmt, principal_payment, interest, max(0, balance)])
-
-df_ang = pd.DataFrame(data, columns=["Tahun", "Saldo Awal", "Total Cicilan", "Angsuran Pokok", "Bunga", "Sisa Pinjaman"])
+with instrumentation.span("amortization_schedule"):
+    # Jadwal closed-form (rumus PMT) tanpa loop per periode
+    try:
+        schedule = amortization.schedule(principal, rate, periods, periods_per_year, grace_periods, balloon)
+    except ValueError as e:
+        with col_input:
+            st.warning(f"⚠️ {e}. Masa tenggang dan pembayaran balon diabaikan.")
+        schedule = amortization.schedule(principal, rate, periods, periods_per_year)
+    df_ang = amortization.schedule_frame(schedule)
+    # Arus kas tetap per tahun: jumlahkan cicilan per periode ke tahun masing-masing
+    cicilan_tahunan = amortization.yearly_totals(schedule.payment, periods_per_year)[0]
+    pokok_tahunan = amortization.yearly_totals(schedule.principal, periods_per_year)[0]
 total_cicilan = sum(df_ang["Total Cicilan"])
 # Tampilkan Tabel Angsuran
 with col_ang:
@@ -83,8 +95,8 @@ if generate_clicked:
         st.warning("⚠️ Harap masukkan semua pendapatan dan jumlah pinjaman sebelum melakukan perhitungan.")
     else:
         # Hitung Cashflow
-        cashflow = [-principal] + [p - c for p, c in zip(pendapatan_list, df_ang["Total Cicilan"])]
-        cumulative_cashflow = principal - df_ang["Angsuran Pokok"].cumsum()
+        cashflow = [-principal] + [p - c for p, c in zip(pendapatan_list, cicilan_tahunan)]
+        cumulative_cashflow = principal - np.cumsum(pokok_tahunan)
 
         # Hitung Total
         total_pendapatan = sum(pendapatan_list)
@@ -95,14 +107,15 @@ if generate_clicked:
         df_cashflow = pd.DataFrame({
             "Tahun": list(range(1, periods + 1)) + ["Total"],
             "Pendapatan": pendapatan_list + [total_pendapatan],
-            "Total Cicilan": list(df_ang["Total Cicilan"]) + [total_cicilan],
+            "Total Cicilan": list(cicilan_tahunan) + [total_cicilan],
             "Cashflow": cashflow[1:] + [total_cashflow],
         })
 
         risk_ratio = total_pendapatan / total_cicilan if total_cicilan > 0 else None
 
         # Perhitungan IRR
-        irr = npf.irr(cashflow)
+        with instrumentation.span("irr"):
+            irr = npf.irr(cashflow)
         irr_display = f"{irr*100:.2f}%" if not np.isnan(irr) else "Tidak dapat dihitung"
 
         # Tampilkan Tabel Cashflow
@@ -135,7 +148,7 @@ if generate_clicked:
         ax.set_xticks(range(1, num_periods + 1))
 
         # Tampilkan grafik di Streamlit
-        with col_cashflow:
+        with col_cashflow, instrumentation.span("chart_render"):
             st.pyplot(fig)
 
         # Analisis Risiko 
@@ -154,4 +167,5 @@ if generate_clicked:
   
       
 
-
+instrumentation.debug_panel()
+instrumentation.end_run()
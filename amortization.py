@@ -0,0 +1,140 @@
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Jadwal angsuran tertutup (closed-form) dari rumus PMT, tervektorisasi untuk banyak pinjaman
+# sekaligus: setiap input boleh skalar atau array (satu nilai per pinjaman), hasilnya array 2-D
+# (pinjaman x periode). Bunga majemuk per periode angsuran (suku bunga tahunan / periode per tahun).
+
+# Periode per tahun untuk setiap frekuensi angsuran
+FREQUENCIES = {"Bulanan": 12, "Kuartalan": 4, "Tahunan": 1}
+PERIOD_LABELS = {12: "Bulan", 4: "Kuartal", 1: "Tahun"}
+
+SCHEDULE_COLUMNS = ["Saldo Awal", "Total Cicilan", "Angsuran Pokok", "Bunga", "Sisa Pinjaman"]
+
+# opening/payment/principal/interest/closing: (pinjaman, periode); periode di luar jangka waktu
+# pinjaman bernilai 0 dan active = False
+Schedule = namedtuple(
+    "Schedule", ["opening", "payment", "principal", "interest", "closing", "active", "periods_per_year"]
+)
+
+
+def payment(rate, periods, principal, balloon=0.0):
+    # Angsuran tetap per periode (PMT) agar saldo turun dari principal ke balloon dalam `periods` periode
+    rate, periods, principal, balloon = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (rate, periods, principal, balloon))
+    )
+    growth = (1 + rate) ** periods
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pmt = (principal * growth - balloon) * rate / (growth - 1)
+    return np.where(rate == 0, (principal - balloon) / periods, pmt)
+
+
+def schedule(principal, annual_rate, years, periods_per_year=1, grace_periods=0, balloon=0.0):
+    # annual_rate dalam pecahan (0.1 = 10%). grace_periods: periode awal bunga saja (pokok belum
+    # dicicil); balloon: sisa pokok yang dibayar sekaligus bersama angsuran terakhir.
+    principal, annual_rate, years, grace_periods, balloon = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(value, dtype=float)) for value in (principal, annual_rate, years, grace_periods, balloon))
+    )
+    total = np.rint(years * periods_per_year).astype(np.int64)
+    grace = grace_periods.astype(np.int64)
+    if (total < 1).any():
+        raise ValueError("Jangka waktu minimal satu periode angsuran")
+    if (grace < 0).any() or (grace >= total).any():
+        raise ValueError("Masa tenggang harus lebih pendek dari jangka waktu")
+    if (balloon < 0).any() or (balloon > principal).any():
+        raise ValueError("Pembayaran balon harus di antara 0 dan jumlah pinjaman")
+
+    rate = (annual_rate / periods_per_year)[:, None]
+    amortizing = (total - grace)[:, None]
+    pmt = payment(rate, amortizing, principal[:, None], balloon[:, None])
+    principal, balloon, grace = principal[:, None], balloon[:, None], grace[:, None]
+
+    # Periode ke-k (1-based); setelah masa tenggang, periode cicilan ke-j = k - grace
+    k = np.arange(1, total.max() + 1, dtype=float)[None, :]
+    active = k <= total[:, None]
+    in_grace = k <= grace
+
+    # Saldo awal cicilan ke-j = P(1+r)^(j-1) - PMT((1+r)^(j-1) - 1)/r = (P - PMT/r)(1+r)^(j-1) + PMT/r:
+    # satu exp untuk (1+r)^(j-1), sisanya operasi in-place pada array (pinjaman, periode)
+    opening = np.subtract(k, grace + 1.0)
+    np.maximum(opening, 0.0, out=opening)
+    flat = rate[:, 0] == 0
+    steps = opening[flat]
+    opening *= np.log1p(rate)
+    np.exp(opening, out=opening)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        level = np.where(rate == 0, 0.0, pmt / rate)
+    opening *= principal - level
+    opening += level
+    if flat.any():
+        # Tanpa bunga: saldo turun linear
+        opening[flat] = principal[flat] - pmt[flat] * steps
+    np.copyto(opening, principal, where=in_grace)
+
+    interest = opening * rate
+    principal_paid = np.subtract(pmt, interest)
+    np.copyto(principal_paid, 0.0, where=in_grace)
+    loans = np.arange(len(total))
+    principal_paid[loans, total - 1] += balloon[:, 0]
+    total_payment = interest + principal_paid
+    closing = np.subtract(opening, principal_paid)
+    np.maximum(closing, 0.0, out=closing)
+
+    inactive = ~active
+    for values in (opening, total_payment, principal_paid, interest, closing):
+        np.copyto(values, 0.0, where=inactive)
+    return Schedule(opening, total_payment, principal_paid, interest, closing, active, periods_per_year)
+
+
+def schedule_frame(result, loan=0):
+    # Tabel angsuran satu pinjaman dengan kolom seperti tabel lama Kalkulator_investasi.py
+    periods = int(result.active[loan].sum())
+    label = PERIOD_LABELS.get(result.periods_per_year, "Periode")
+    data = {label: np.arange(1, periods + 1)}
+    for column, values in zip(SCHEDULE_COLUMNS, result[:5]):
+        data[column] = values[loan, :periods]
+    return pd.DataFrame(data)
+
+
+def yearly_totals(values, periods_per_year):
+    # Jumlah per tahun dari array (pinjaman, periode); tahun terakhir yang tidak penuh tetap dihitung
+    values = np.atleast_2d(values)
+    years = -(-values.shape[1] // periods_per_year)
+    padded = np.zeros((values.shape[0], years * periods_per_year))
+    padded[:, :values.shape[1]] = values
+    return padded.reshape(values.shape[0], years, periods_per_year).sum(axis=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur waktu pembuatan jadwal angsuran tervektorisasi.")
+    parser.add_argument("--loans", type=int, default=10_000, help="Jumlah pinjaman dalam satu batch")
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    cases = {
+        f"1 pinjaman, {args.years} tahun bulanan": dict(
+            principal=1e9, annual_rate=0.1, years=args.years, periods_per_year=12
+        ),
+        f"{args.loans} pinjaman, {args.years} tahun bulanan": dict(
+            principal=rng.uniform(1e8, 5e9, args.loans), annual_rate=rng.uniform(0.0, 0.15, args.loans),
+            years=rng.integers(1, args.years + 1, args.loans), periods_per_year=12,
+            grace_periods=rng.integers(0, 12, args.loans), balloon=rng.uniform(0, 0.3, args.loans) * 1e8,
+        ),
+    }
+    for name, params in cases.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            schedule(**params)
+            timings.append(time.perf_counter() - start)
+        print(f"{name}: {min(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
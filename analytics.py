@@ -0,0 +1,349 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+METADATA_FILTERS = ["Posisi/Jabatan", "Masa Kerja", "Usia"]
+NAME_COLUMN = "Isikan Nama Anda"
+
+VALIDITY_THRESHOLD = 0.3  # Item valid jika korelasi dengan skor total >= 0.3
+Z_THRESHOLD = 1.96  # 95% confidence level
+OUTLIER_LIMIT = 0.05  # Jika <5% outlier, anggap normal
+CHUNK_ROWS = 262_144  # Baris per blok untuk jalur float agar memori sementara terbatas
+STRONG_CORRELATION = 0.6
+
+
+def filter_options(df, column):
+    return ["All"] + sorted(df[column].dropna().unique().tolist())
+
+
+def filter_respondents(df, jabatan="All", masa_kerja="All", usia="All"):
+    df_filtered = df
+    if jabatan != "All":
+        df_filtered = df_filtered[df_filtered["Posisi/Jabatan"] == jabatan]
+    if masa_kerja != "All":
+        df_filtered = df_filtered[df_filtered["Masa Kerja"] == masa_kerja]
+    if usia != "All":
+        df_filtered = df_filtered[df_filtered["Usia"] == usia]
+    return df_filtered
+
+
+def item_values(df, columns, rows=None):
+    # Nilai item (baris x kolom); rows = posisi baris hasil filter, None berarti semua baris
+    values = df[columns].to_numpy()
+    return values if rows is None else values[rows]
+
+
+def item_means(df, columns):
+    return df[columns].mean(numeric_only=True).round(2)
+
+
+def summarize_item_means(avg):
+    # Rata-rata keseluruhan serta item dengan skor tertinggi & terendah
+    return {
+        "overall": avg.mean().round(2),
+        "max_question": avg.idxmax(),
+        "max_value": avg.max(),
+        "min_question": avg.idxmin(),
+        "min_value": avg.min(),
+    }
+
+
+def calculate_z_scores(data):
+    data = np.asarray(data, dtype=np.float64)
+    mean = np.mean(data)
+    std_dev = np.std(data, ddof=1)  # Gunakan ddof=1 untuk sampel
+    return (data - mean) / std_dev
+
+
+def check_normality(z_scores):
+    z_scores = np.asarray(z_scores)
+    return np.count_nonzero(np.abs(z_scores) > Z_THRESHOLD) / len(z_scores) < OUTLIER_LIMIT
+
+
+def _histogram_moments(values):
+    # Jalur data integer (Likert): satu bincount per kolom, semua statistik dihitung dari histogram
+    if values.dtype.itemsize == 1:
+        lo, hi = np.iinfo(values.dtype).min, np.iinfo(values.dtype).max
+    else:
+        lo, hi = int(values.min(initial=0)), int(values.max(initial=0))
+    counts = np.stack([
+        np.bincount(values[:, j].astype(np.int64) - lo, minlength=hi - lo + 1)
+        for j in range(values.shape[1])
+    ])
+    return _count_moments(counts, lo)
+
+
+def _count_moments(counts, lo=0):
+    # Statistik dari histogram per kolom (kolom x nilai lo, lo+1, ...)
+    counts = np.asarray(counts, dtype=np.float64)
+    grid = np.arange(lo, lo + counts.shape[1], dtype=np.float64)
+
+    n = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = counts @ grid / n
+        deviation = grid[None, :] - mean[:, None]
+        m2, m3, m4 = ((counts * deviation ** p).sum(axis=1) / n for p in (2, 3, 4))
+        std = np.sqrt(m2 * n / (n - 1))
+        outliers = (counts * (np.abs(deviation / std[:, None]) > Z_THRESHOLD)).sum(axis=1)
+    return n, mean, std, m2, m3, m4, outliers
+
+
+def _is_small_integral(values):
+    # Skor Likert hasil fillna(0) bertipe float tetapi nilainya bilangan bulat kecil tanpa NaN
+    return (
+        values.size > 0
+        and not np.isnan(values).any()
+        and values.min() >= -128 and values.max() <= 127
+        and bool((values == np.rint(values)).all())
+    )
+
+
+def _float_moments(values):
+    # Jalur float dengan NaN: diproses per blok baris, NaN diabaikan (setara dropna per kolom)
+    k = values.shape[1]
+    n, total = np.zeros(k), np.zeros(k)
+    for start in range(0, len(values), CHUNK_ROWS):
+        block = values[start:start + CHUNK_ROWS].astype(np.float64, copy=False)
+        n += (~np.isnan(block)).sum(axis=0)
+        total += np.nansum(block, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+
+    m2, m3, m4 = np.zeros(k), np.zeros(k), np.zeros(k)
+    for start in range(0, len(values), CHUNK_ROWS):
+        deviation = values[start:start + CHUNK_ROWS].astype(np.float64, copy=False) - mean
+        square = deviation * deviation
+        m2 += np.nansum(square, axis=0)
+        m3 += np.nansum(square * deviation, axis=0)
+        m4 += np.nansum(square * square, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(m2 / (n - 1))
+        m2, m3, m4 = m2 / n, m3 / n, m4 / n
+
+    outliers = np.zeros(k)
+    for start in range(0, len(values), CHUNK_ROWS):
+        block = values[start:start + CHUNK_ROWS].astype(np.float64, copy=False)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            outliers += (np.abs((block - mean) / std) > Z_THRESHOLD).sum(axis=0)
+    return n, mean, std, m2, m3, m4, outliers
+
+
+def normality_stats(df, columns, rows=None):
+    # Z-score, fraksi outlier |z| > 1.96, skewness dan kurtosis untuk semua kolom sekaligus
+    values = item_values(df, columns, rows)
+    if values.dtype.kind == "f" and _is_small_integral(values):
+        values = values.astype(np.int8)
+    if values.dtype.kind in "iu":
+        n, mean, std, m2, m3, m4, outliers = _histogram_moments(values)
+    else:
+        n, mean, std, m2, m3, m4, outliers = _float_moments(values.astype(np.float64, copy=False))
+    return _normality_frame(columns, n, mean, std, m2, m3, m4, outliers)
+
+
+def normality_from_counts(counts, columns, lo=0):
+    # Sama dengan normality_stats, dari histogram skor per item (mis. hasil penjumlahan sel segmen)
+    return _normality_frame(columns, *_count_moments(counts, lo))
+
+
+def _normality_frame(columns, n, mean, std, m2, m3, m4, outliers):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Rumus sampel yang sama dengan pandas .skew() dan .kurt()
+        g1 = m3 / m2 ** 1.5
+        g2 = m4 / m2 ** 2 - 3
+        skewness = np.sqrt(n * (n - 1)) / (n - 2) * g1
+        kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+        outlier_fraction = outliers / n
+
+    stats = pd.DataFrame({
+        "n": n.astype(np.int64),
+        "mean": mean,
+        "std": std,
+        "outlier_fraction": outlier_fraction,
+        "skewness": np.where(m2 > 0, skewness, 0.0),
+        "kurtosis": np.where(m2 > 0, kurtosis, 0.0),
+    }, index=columns)
+    stats["status"] = np.where(outlier_fraction < OUTLIER_LIMIT, "Normal", "Tidak Normal")
+    return stats
+
+
+def get_normality_status(df, columns):
+    # Hitung normalitas untuk setiap item
+    return normality_stats(df, columns)["status"].to_dict()
+
+
+def count_normal(normality_status):
+    return sum(1 for status in normality_status.values() if status == "Normal")
+
+
+def validity_table(validity, normality, label):
+    # Gabungkan hasil validitas dan normalitas (hasil normality_stats) dalam DataFrame
+    validity_df = validity.to_frame(name=f"Korelasi dengan {label}")
+    validity_df["Status Normalitas"] = normality["status"]
+    validity_df["Skewness"] = normality["skewness"].round(3)
+    validity_df["Kurtosis"] = normality["kurtosis"].round(3)
+    return validity_df
+
+
+def validity_normality_summary(happiness_validity, engagement_validity,
+                               happiness_normality_status, engagement_normality_status):
+    happiness_valid = int(sum(happiness_validity >= VALIDITY_THRESHOLD))
+    engagement_valid = int(sum(engagement_validity >= VALIDITY_THRESHOLD))
+    happiness_normal = count_normal(happiness_normality_status)
+    engagement_normal = count_normal(engagement_normality_status)
+    return pd.DataFrame({
+        'Label': ['Employee Happiness', 'Employee Engagement'],
+        'Jumlah Item Valid': [happiness_valid, engagement_valid],
+        'Jumlah Item Tidak Valid': [
+            len(happiness_validity) - happiness_valid,
+            len(engagement_validity) - engagement_valid
+        ],
+        'Jumlah Item Normal': [happiness_normal, engagement_normal],
+        'Jumlah Item Tidak Normal': [
+            len(happiness_normality_status) - happiness_normal,
+            len(engagement_normality_status) - engagement_normal
+        ]
+    })
+
+
+def average_score_spearman(df, happiness_columns, engagement_columns, rows=None):
+    # Korelasi Spearman antara rata-rata Employee Happiness & Engagement per responden
+    df_avg = pd.DataFrame({
+        "Employee Happiness": pd.DataFrame(item_values(df, happiness_columns, rows)).mean(axis=1),
+        "Employee Engagement": pd.DataFrame(item_values(df, engagement_columns, rows)).mean(axis=1)
+    })
+    return df_avg.corr(method='spearman')
+
+
+def correlation_category(value):
+    if value < 0.20:
+        return "Sangat lemah atau tidak ada korelasi"
+    elif value < 0.40:
+        return "Lemah"
+    elif value < 0.60:
+        return "Sedang"
+    elif value < 0.80:
+        return "Kuat"
+    return "Sangat kuat"
+
+
+class RankCache:
+    # Cache LRU kecil untuk tabel peringkat per (kunci data, kolom), aman dipakai lintas sesi
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _rank_table(column):
+    # Peringkat rata-rata (ties) untuk data integer dari histogram, tanpa sorting.
+    # Mengembalikan (lo, tabel z-rank per nilai) sehingga z = tabel[nilai - lo].
+    lo = int(column.min(initial=0))
+    return lo, _rank_table_from_counts(np.bincount(column.astype(np.int64) - lo))
+
+
+def _rank_table_from_counts(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum()
+    average_rank = np.cumsum(counts) - counts + (counts + 1) / 2
+    centered = average_rank - (n + 1) / 2
+    norm = np.sqrt((counts * centered ** 2).sum())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return centered / norm
+
+
+def _standardized_ranks(values, tables, start, stop):
+    # Hasil berorientasi kolom (item x baris) agar penulisan per item bersebelahan di memori
+    block = np.empty((len(tables), stop - start))
+    for j, (lo, table) in enumerate(tables):
+        column = values[start:stop, j]
+        block[j] = table[column - lo if lo else column]
+    return block
+
+
+def spearman_block(df, row_columns, col_columns, cache=None, cache_key=None, rows=None):
+    # Korelasi Spearman hanya untuk blok row_columns x col_columns:
+    # kolom item diberi peringkat (ties rata-rata), lalu satu perkalian matriks z-rank.
+    row_columns, col_columns = pd.Index(row_columns), pd.Index(col_columns)
+    columns = row_columns.append(col_columns)
+    values = item_values(df, columns, rows)
+    if values.dtype.kind == "f":
+        if np.isnan(values).any():
+            # Data dengan NaN memakai pasangan observasi lengkap seperti pandas
+            ranks = pd.DataFrame(values, columns=columns).rank(method="average")
+            return ranks.corr(method="pearson").loc[row_columns, col_columns]
+        if _is_small_integral(values):
+            values = values.astype(np.int8)
+        else:
+            values = pd.DataFrame(values, columns=columns).rank(method="average").to_numpy()
+
+    if values.dtype.kind in "iu":
+        def table_for(j):
+            if cache is None:
+                return _rank_table(values[:, j])
+            return cache.get((cache_key, columns[j]), lambda: _rank_table(values[:, j]))
+        tables = [table_for(j) for j in range(len(columns))]
+    else:
+        # Peringkat non-integer: standarisasi langsung
+        centered = values - values.mean(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = centered / np.sqrt((centered ** 2).sum(axis=0))
+        tables = None
+
+    k = len(row_columns)
+    corr = np.zeros((k, len(col_columns)))
+    for start in range(0, len(values), CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, len(values))
+        block = values[start:stop].T if tables is None else _standardized_ranks(values, tables, start, stop)
+        corr += block[:k] @ block[k:].T
+    return pd.DataFrame(corr, index=row_columns, columns=col_columns)
+
+
+def spearman_from_counts(joint, row_counts, col_counts, row_columns, col_columns):
+    # Spearman dari histogram bersama untuk data integer: joint[i, j, a, b] = jumlah responden
+    # dengan nilai a pada item baris i dan b pada item kolom j; row/col_counts = histogram per item.
+    # Hasilnya sama dengan spearman_block pada baris yang sama, tanpa membaca baris.
+    row_tables = np.stack([_rank_table_from_counts(c) for c in row_counts])
+    col_tables = np.stack([_rank_table_from_counts(c) for c in col_counts])
+    corr = np.einsum("ijab,ia,jb->ij", np.asarray(joint, dtype=np.float64), row_tables, col_tables)
+    return pd.DataFrame(corr, index=pd.Index(row_columns), columns=pd.Index(col_columns))
+
+
+def item_spearman(df, happiness_columns, engagement_columns, cache=None, cache_key=None, rows=None):
+    # Hitung korelasi Spearman secara manual tanpa scipy, hanya blok happiness x engagement
+    return spearman_block(df, happiness_columns, engagement_columns, cache, cache_key, rows)
+
+
+def strong_positive_pairs(corr, threshold=STRONG_CORRELATION):
+    # Cari korelasi positif kuat tanpa pengulangan item Employee Happiness
+    correlation_pairs = corr.unstack().reset_index()
+
+    # Tukar urutan kolom agar sesuai dengan matriks korelasi
+    correlation_pairs.columns = ["Employee Engagement", "Employee Happiness", "Correlation"]
+
+    # Urutkan dari korelasi tertinggi
+    correlation_pairs = correlation_pairs.sort_values("Correlation", ascending=False).reset_index(drop=True)
+
+    strong_positive_correlation = correlation_pairs[correlation_pairs["Correlation"] > threshold]
+
+    # Simpan hanya korelasi tertinggi per item Employee Happiness
+    unique_strong_positive = strong_positive_correlation.drop_duplicates(subset=["Employee Happiness"], keep="first")
+
+    unique_count = unique_strong_positive["Employee Happiness"].nunique()
+    total_items = len(corr.index)
+    percentage = (unique_count / total_items) * 100 if total_items > 0 else 0
+    return unique_strong_positive, unique_count, percentage
@@ -0,0 +1,222 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from bitmap_index import BitmapIndex
+from demographic_cube import DemographicCube
+from fingerprint_index import FingerprintIndex, duplicate_mask, row_fingerprints
+from name_index import NameIndex
+from survey_schema import FREE_TEXT_COLUMNS, parse_survey_csv
+from text_analytics import TextIndex
+
+# Tata letak sama dengan export Google Sheets: 6 kolom metadata + 16 happiness + 22 engagement
+METADATA_COLUMNS = ["Timestamp", "Isikan Nama Anda", "Posisi/Jabatan", "Masa Kerja", "Usia", "Cabang"]
+HAPPINESS_ITEMS = [f"Happiness {i:02d}" for i in range(1, 17)]
+ENGAGEMENT_ITEMS = [f"Engagement {i:02d}" for i in range(1, 23)]
+
+JABATAN = ["Staff", "Supervisor", "Section Head", "Department Head", "Division Head"]
+MASA_KERJA = ["< 1 Tahun", "1 - 3 Tahun", "3 - 5 Tahun", "5 - 10 Tahun", "> 10 Tahun"]
+USIA = ["< 25 Tahun", "25 - 35 Tahun", "35 - 45 Tahun", "> 45 Tahun"]
+CABANG = ["Jakarta", "Bandung", "Surabaya", "Medan", "Makassar"]
+
+# Urutan label mengikuti skor 1..4, indeks 0 berarti tidak dijawab
+LIKERT_LABELS = np.array(["", "Sangat Tidak Setuju", "Tidak Setuju", "Setuju", "Sangat Setuju"], dtype=object)
+
+# Potongan jawaban "Harapan Untuk Lebih Bahagia"; tiap komentar menggabungkan 1-2 potongan
+HARAPAN = np.array([
+    "gaji yang lebih adil", "kenaikan gaji tiap tahun", "jenjang karier yang jelas", "atasan lebih menghargai kinerja",
+    "beban kerja lebih seimbang", "tidak sering lembur", "fasilitas kantor diperbaiki", "lebih banyak pelatihan",
+    "komunikasi antar divisi lebih baik", "bonus tepat waktu", "jam kerja fleksibel", "lingkungan kerja yg nyaman",
+    "tunjangan kesehatan ditambah", "work-life balance", "apresiasi dari atasan", "tdk ada pilih kasih",
+], dtype=object)
+TEXT_MISSING_RATE = 0.3
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+def synthetic_scores(n_rows, seed=0, missing_rate=0.01):
+    # Skor 1..4 dari satu faktor laten per responden agar korelasi item-total realistis
+    rng = np.random.default_rng(seed)
+    n_items = len(HAPPINESS_ITEMS) + len(ENGAGEMENT_ITEMS)
+    latent = rng.normal(0.0, 1.0, size=(n_rows, 1))
+    noise = rng.normal(0.0, 1.0, size=(n_rows, n_items))
+    scores = np.clip(np.rint(2.8 + 0.6 * latent + 0.6 * noise), 1, 4).astype(np.int8)
+    scores[rng.random((n_rows, n_items)) < missing_rate] = 0
+    return scores
+
+
+def synthetic_survey(n_rows, seed=0, missing_rate=0.01):
+    # Frame mentah (jawaban berupa teks Likert) seperti hasil pd.read_csv sebelum mapping
+    rng = np.random.default_rng(seed + 1)
+    scores = synthetic_scores(n_rows, seed, missing_rate)
+    data = {
+        "Timestamp": pd.Timestamp("2025-01-06 08:00:00") + pd.to_timedelta(np.sort(rng.integers(0, 30 * 86400, n_rows)), unit="s"),
+        "Isikan Nama Anda": [f"Responden {i}" for i in range(n_rows)],
+        "Posisi/Jabatan": np.array(JABATAN, dtype=object)[rng.integers(0, len(JABATAN), n_rows)],
+        "Masa Kerja": np.array(MASA_KERJA, dtype=object)[rng.integers(0, len(MASA_KERJA), n_rows)],
+        "Usia": np.array(USIA, dtype=object)[rng.integers(0, len(USIA), n_rows)],
+        "Cabang": np.array(CABANG, dtype=object)[rng.integers(0, len(CABANG), n_rows)],
+    }
+    for j, column in enumerate(HAPPINESS_ITEMS + ENGAGEMENT_ITEMS):
+        data[column] = LIKERT_LABELS[scores[:, j]]
+    data[FREE_TEXT_COLUMNS[0]] = synthetic_comments(n_rows, seed)
+    return pd.DataFrame(data)
+
+
+def synthetic_comments(n_rows, seed=0):
+    # Generator terpisah agar kolom lain tetap sama dengan versi tanpa komentar
+    rng = np.random.default_rng(seed + 2)
+    first = HARAPAN[rng.integers(0, len(HARAPAN), n_rows)]
+    second = HARAPAN[rng.integers(0, len(HARAPAN), n_rows)]
+    comments = np.where(rng.random(n_rows) < 0.5, first, first + " dan " + second)
+    comments[rng.random(n_rows) < TEXT_MISSING_RATE] = None
+    return comments
+
+
+def synthetic_csv(n_rows, seed=0, missing_rate=0.01):
+    return synthetic_survey(n_rows, seed, missing_rate).to_csv(index=False)
+
+
+def _stages(csv_text):
+    # Setiap tahap menerima hasil tahap sebelumnya lewat dict state
+    def parse(state):
+        state["df"], schema = parse_survey_csv(csv_text)
+        state["h"], state["e"] = schema.happiness_columns, schema.engagement_columns
+
+    def dedup(state):
+        duplicate_mask(state["df"])
+
+    def fingerprint_lookup(state):
+        index = FingerprintIndex()
+        index.add(row_fingerprints(state["df"]))
+        # Baris tambahan khas: satu batch kecil dicek terhadap seluruh data
+        index.contains(row_fingerprints(state["df"].iloc[:100]))
+
+    def filter_(state):
+        state["df_filtered"] = analytics.filter_respondents(state["df"], JABATAN[0], "All", "All")
+
+    def means(state):
+        analytics.item_means(state["df_filtered"], state["h"])
+        analytics.item_means(state["df_filtered"], state["e"])
+
+    def cube_build(state):
+        state["cube"] = DemographicCube(state["h"].append(state["e"]))
+        state["cube"].update(state["df"])
+
+    def cube_query(state):
+        stats = state["cube"].query(JABATAN[0], "All", "All")
+        stats.item_means(state["h"])
+        stats.item_means(state["e"])
+
+    def bitmap_build(state):
+        state["index"] = BitmapIndex()
+        state["index"].update(state["df"])
+
+    def bitmap_filter(state):
+        state["rows"] = state["index"].select(JABATAN[0], "All", "All")
+
+    def name_index_build(state):
+        state["names"] = NameIndex()
+        state["names"].update(state["df"])
+
+    def name_search(state):
+        state["names"].search("responden 12", state["rows"])
+
+    def text_index_build(state):
+        state["texts"] = TextIndex()
+        state["texts"].update(state["df"])
+
+    def text_search(state):
+        state["texts"].search("gaji adil", state["rows"])
+        state["texts"].top_terms((JABATAN[0], "All", "All"))
+
+    def validity(state):
+        stats = state["cube"].query()
+        stats.item_total_correlation(state["h"])
+        stats.item_total_correlation(state["e"])
+
+    def normality(state):
+        analytics.normality_stats(state["df"], state["h"].append(state["e"]))
+
+    def spearman_average(state):
+        analytics.average_score_spearman(state["df"], state["h"], state["e"])
+
+    def spearman_items(state):
+        corr = analytics.item_spearman(state["df"], state["h"], state["e"])
+        analytics.strong_positive_pairs(corr)
+
+    return [
+        ("parse_csv", parse),
+        ("dedup", dedup),
+        ("fingerprint_lookup", fingerprint_lookup),
+        ("filter", filter_),
+        ("item_means", means),
+        ("cube_build", cube_build),
+        ("cube_query", cube_query),
+        ("bitmap_build", bitmap_build),
+        ("bitmap_filter", bitmap_filter),
+        ("name_index_build", name_index_build),
+        ("name_search", name_search),
+        ("text_index_build", text_index_build),
+        ("text_search", text_search),
+        ("validity", validity),
+        ("normality", normality),
+        ("spearman_average", spearman_average),
+        ("spearman_items", spearman_items),
+    ]
+
+
+def run_benchmark(n_rows, seed=0, measure_memory=True):
+    # Waktu diukur tanpa tracemalloc (overhead-nya besar untuk loop Python),
+    # puncak memori diukur pada putaran terpisah.
+    csv_text = synthetic_csv(n_rows, seed)
+    results = []
+
+    state = {}
+    for name, stage in _stages(csv_text):
+        gc.collect()
+        start = time.perf_counter()
+        stage(state)
+        results.append({"rows": n_rows, "stage": name, "seconds": time.perf_counter() - start, "peak_mb": np.nan})
+    del state
+
+    if measure_memory:
+        state = {}
+        for i, (name, stage) in enumerate(_stages(csv_text)):
+            gc.collect()
+            tracemalloc.start()
+            stage(state)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[i]["peak_mb"] = peak / 2**20
+    return pd.DataFrame(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tahapan analitik dashboard dengan data survei sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Jumlah responden per putaran")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Lewati pengukuran puncak memori")
+    parser.add_argument("--output", help="Simpan hasil ke file CSV")
+    args = parser.parse_args(argv)
+
+    frames = []
+    for n_rows in args.sizes:
+        result = run_benchmark(n_rows, args.seed, measure_memory=not args.no_memory)
+        print(f"\n== {n_rows:,} responden ==")
+        print(result[["stage", "seconds", "peak_mb"]].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        frames.append(result)
+
+    report = pd.concat(frames, ignore_index=True)
+    if args.output:
+        report.to_csv(args.output, index=False)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+import analytics
+
+
+def _append_bits(bitmap, length, mask):
+    # Tambahkan mask (bool per baris baru) ke bitset berisi `length` bit
+    if bitmap is None:
+        bitmap = np.zeros((length + 7) // 8, dtype=np.uint8)
+    tail = length % 8
+    if tail == 0:
+        return np.concatenate([bitmap, np.packbits(mask)])
+    # Byte terakhir baru terisi sebagian: gabungkan bit sisa dengan mask baru
+    head = np.unpackbits(bitmap[-1:], count=tail).astype(bool)
+    return np.concatenate([bitmap[:-1], np.packbits(np.concatenate([head, mask]))])
+
+
+class BitmapIndex:
+    # Satu bitset terkompresi (1 bit per responden, np.packbits) untuk setiap nilai
+    # kategori kolom demografi. Filter = AND bitset, hasilnya posisi baris tanpa menyalin frame.
+
+    def __init__(self, columns=analytics.METADATA_FILTERS):
+        self.columns = list(columns)
+        self.length = 0
+        self.bitmaps = {column: {} for column in self.columns}
+
+    def update(self, df):
+        n = len(df)
+        if n == 0:
+            return
+        for column in self.columns:
+            bitmaps = self.bitmaps[column]
+            if column in df.columns:
+                codes, uniques = pd.factorize(df[column])
+                uniques = uniques.tolist()
+            else:
+                codes, uniques = np.full(n, -1), []
+            masks = {value: codes == code for code, value in enumerate(uniques)}
+            # Nilai lama yang tidak muncul di baris baru tetap diperpanjang dengan bit 0
+            for value in list(bitmaps) + [v for v in uniques if v not in bitmaps]:
+                mask = masks.get(value)
+                if mask is None:
+                    mask = np.zeros(n, dtype=bool)
+                bitmaps[value] = _append_bits(bitmaps.get(value), self.length, mask)
+        self.length += n
+
+    def values(self, column):
+        return list(self.bitmaps[column])
+
+    def bits(self, jabatan="All", masa_kerja="All", usia="All"):
+        # Bitset hasil filter; None berarti semua baris
+        selected = None
+        for column, value in zip(self.columns, (jabatan, masa_kerja, usia)):
+            if value == "All":
+                continue
+            bitmap = self.bitmaps[column].get(value)
+            if bitmap is None:
+                bitmap = np.zeros((self.length + 7) // 8, dtype=np.uint8)
+            selected = bitmap if selected is None else selected & bitmap
+        return selected
+
+    def select(self, jabatan="All", masa_kerja="All", usia="All"):
+        # Posisi baris yang cocok (untuk df.iloc / array numpy); None berarti semua baris
+        selected = self.bits(jabatan, masa_kerja, usia)
+        if selected is None:
+            return None
+        return np.flatnonzero(np.unpackbits(selected, count=self.length))
@@ -0,0 +1,284 @@
+import contextlib
+import hashlib
+import io
+import multiprocessing
+import pickle
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+
+import instrumentation
+
+# Sama dengan default st.pyplot agar tampilan tidak berubah
+SAVEFIG_KWARGS = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+
+def pie_chart(counts):
+    # Pie chart jumlah responden per jabatan
+    total_responden = counts.sum()
+    fig = Figure(figsize=(5, 5))  # Ukuran diperbesar
+    ax = fig.subplots()
+
+    # Warna dinamis sesuai jumlah kategori
+    colors = colormaps["Set3"](np.linspace(0, 1, len(counts)))
+
+    wedges, texts, autotexts = ax.pie(
+        counts,
+        labels=counts.index,
+        autopct=lambda p: f'{int(p * total_responden / 100)}' if total_responden > 0 else '',
+        startangle=90,
+        colors=colors
+    )
+
+    ax.axis("equal")  # Menjaga proporsi lingkaran
+
+    # Ubah teks autopct agar hanya menampilkan angka (bukan persen)
+    for autotext, count in zip(autotexts, counts):
+        autotext.set_text(f"{count}")  # Ganti teks dengan angka responden
+
+    # Perbaikan ukuran teks agar lebih terbaca
+    for text in texts:
+        text.set_fontsize(10)
+    for autotext in autotexts:
+        autotext.set_fontsize(10)
+    return fig
+
+
+def bar_chart(avg, color, title):
+    # Grafik horizontal rata-rata skor per item
+    fig = Figure(figsize=(8, 10))  # Ukuran lebih besar untuk keterbacaan
+    ax = fig.subplots()
+    bars = ax.barh(avg.index, avg.values, color=color)
+
+    # Tambahkan label nilai pada setiap batang
+    for bar in bars:
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height()/2,
+                f"{bar.get_width():.2f}", va='center', ha='left', fontsize=10, color="black")
+
+    ax.set_xlabel("Rata-rata Skor")
+    ax.set_ylabel("Kategori")
+    ax.set_title(title)
+    return fig
+
+
+def spearman_heatmap(corr, categories):
+    # Heatmap 2x2 korelasi rata-rata Employee Happiness & Engagement
+    fig = Figure(figsize=(6, 5))
+    ax = fig.subplots()
+    cax = ax.matshow(corr, cmap="coolwarm", vmin=-1, vmax=1)
+    fig.colorbar(cax)
+
+    # Menyesuaikan label sumbu X dan Y
+    ax.set_xticks(range(len(categories)))
+    ax.set_yticks(range(len(categories)))
+    ax.set_xticklabels(categories, rotation=45, fontsize=10, ha="right")
+    ax.set_yticklabels(categories, fontsize=10)
+
+    # Menampilkan angka korelasi dalam heatmap
+    for (i, j), val in np.ndenumerate(np.asarray(corr)):
+        color = "white" if abs(val) > 0.5 else "black"
+        ax.text(j, i, f'{val:.2f}', ha='center', va='center', color=color, fontsize=12)
+
+    ax.xaxis.set_ticks_position("bottom")
+    ax.xaxis.set_label_position("bottom")
+    return fig
+
+
+def item_heatmap(corr):
+    # Heatmap korelasi item Employee Happiness (baris) x Employee Engagement (kolom)
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+
+    # Tampilkan matriks korelasi sebagai heatmap
+    cax = ax.matshow(corr, cmap="coolwarm", vmin=-1, vmax=1)
+    fig.colorbar(cax)
+
+    # Atur label sumbu
+    ax.set_xticks(range(len(corr.columns)))
+    ax.set_yticks(range(len(corr.index)))
+    ax.set_xticklabels(corr.columns, rotation=75, fontsize=8, ha="right")
+    ax.set_yticklabels(corr.index, fontsize=8)
+
+    # Tambahkan nilai korelasi di dalam heatmap
+    for (i, j), val in np.ndenumerate(corr.values):
+        color = "white" if abs(val) > 0.5 else "black"
+        ax.text(j, i, f'{val:.2f}', ha='center', va='center', color=color, fontsize=7)
+
+    # Atur posisi label sumbu x agar di bawah heatmap
+    ax.xaxis.set_ticks_position("bottom")
+    ax.xaxis.set_label_position("bottom")
+
+    ax.set_title("Heatmap Korelasi Employee Happiness & Employee Engagement", fontsize=12)
+    return fig
+
+
+CHARTS = {
+    "pie": pie_chart,
+    "bar": bar_chart,
+    "spearman_heatmap": spearman_heatmap,
+    "item_heatmap": item_heatmap,
+}
+
+
+def figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG_KWARGS)
+    fig.clf()  # Lepaskan artist agar memori figure segera bebas
+    return buffer.getvalue()
+
+
+def render_png(name, *args, **params):
+    return figure_to_png(CHARTS[name](*args, **params))
+
+
+def chart_key(name, *args, **params):
+    # Hash data agregat + parameter grafik
+    payload = pickle.dumps((name, args, sorted(params.items())), protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class FigureCache:
+    # Cache PNG dengan LRU berdasarkan total ukuran byte
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            if len(png) > self.max_bytes:
+                return
+            self._entries[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def render(self, name, *args, **params):
+        key = chart_key(name, *args, **params)
+        png = self.get(key)
+        if png is None:
+            png = render_png(name, *args, **params)
+            self.put(key, png)
+        return png
+
+
+def _init_worker():
+    # Worker hanya merender ke buffer, tanpa GUI
+    matplotlib.use("Agg")
+
+
+@contextlib.contextmanager
+def _bare_main():
+    # Streamlit memasang skrip dashboard sebagai __main__, dan proses spawn menjalankan
+    # ulang __main__ sebelum bekerja. Selama worker dibuat, pakai modul kosong.
+    main = sys.modules["__main__"]
+    blank = types.ModuleType("__main__")
+    sys.modules["__main__"] = blank
+    try:
+        yield
+    finally:
+        if sys.modules["__main__"] is blank:
+            sys.modules["__main__"] = main
+
+
+def _done(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+class ChartJob:
+    # Grafik yang sedang/selesai dirender; png() menunggu hasilnya
+
+    def __init__(self, renderer, key, spec, future):
+        self.renderer = renderer
+        self.key = key
+        self.spec = spec
+        self.future = future
+
+    def png(self):
+        # Diukur dari sisi halaman: waktu menunggu worker (atau render ulang) sampai PNG siap
+        with instrumentation.span("chart_render"):
+            try:
+                return self.future.result()
+            except BrokenProcessPool:
+                # Worker mati di tengah render: render ulang langsung di thread ini
+                self.renderer.shutdown()
+                name, args, params = self.spec
+                png = render_png(name, *args, **params)
+                self.renderer.cache.put(self.key, png)
+                return png
+
+
+class ChartRenderer:
+    # Spesifikasi grafik (nama + data + gaya) dirender paralel di process pool,
+    # hasil PNG masuk FigureCache. Grafik yang sudah ada di cache tidak dikirim ke pool.
+
+    def __init__(self, cache=None, max_workers=None):
+        self.cache = cache if cache is not None else FigureCache()
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: aman dipakai dari server multi-thread seperti Streamlit
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def submit(self, name, *args, **params):
+        key = chart_key(name, *args, **params)
+        spec = (name, args, params)
+        png = self.cache.get(key)
+        if png is not None:
+            return ChartJob(self, key, spec, _done(png))
+
+        try:
+            # Worker baru dibuat (lazy) di dalam submit
+            with self._lock, _bare_main():
+                future = self._executor().submit(render_png, name, *args, **params)
+        except (BrokenProcessPool, RuntimeError):
+            # Pool rusak/ditutup: buat ulang pada permintaan berikutnya, render langsung sekarang
+            self.shutdown()
+            future = _done(render_png(name, *args, **params))
+
+        def store(done):
+            if not done.cancelled() and done.exception() is None:
+                self.cache.put(key, done.result())
+        future.add_done_callback(store)
+        return ChartJob(self, key, spec, future)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,230 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import analytics
+
+# Struktur direktori:
+#   CURRENT                -> nama generasi aktif (diganti atomik saat data dimuat ulang penuh)
+#   gen-<n>/meta.json      -> jumlah baris, nama kolom, jumlah kategori, state sumber
+#   gen-<n>/items.bin      -> matriks item int8 (baris x item), 0 = tidak dijawab
+#   gen-<n>/codes-<i>.bin  -> kode kategori kolom metadata ke-i (-1 = kosong)
+#   gen-<n>/categories-<i>.jsonl -> daftar kategori kolom metadata ke-i, satu nilai per baris
+# Semua file data hanya ditambah di akhir dan di-fsync sebelum meta.json ditulis, sehingga pembaca
+# tidak pernah melihat baris yang belum lengkap. Sisa append yang terputus (crash sebelum meta.json)
+# dipotong pada append berikutnya sesuai jumlah baris/byte di meta.json.
+
+FORMAT_VERSION = 1
+ITEM_DTYPE = np.int8
+# Kolom filter kardinalitasnya kecil, kolom metadata lain (nama, timestamp) hampir unik
+FILTER_CODE_DTYPE = np.int16
+CODE_DTYPE = np.int32
+
+
+def _code_dtype(column):
+    return FILTER_CODE_DTYPE if column in analytics.METADATA_FILTERS else CODE_DTYPE
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _append_file(path, data):
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _truncate(path, size):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
+
+
+def encode_items(df, item_columns):
+    # Skor Likert 0..4 disimpan sebagai int8
+    values = df[list(item_columns)].to_numpy(dtype=np.float64, na_value=0)
+    if ((values < 0) | (values > 4) | (values != np.floor(values))).any():
+        raise ValueError("Nilai item harus berupa skor Likert 0..4")
+    return np.ascontiguousarray(values, dtype=ITEM_DTYPE)
+
+
+class ColumnStore:
+    def __init__(self, root, generation, meta):
+        self.root = root
+        self.generation = generation
+        self.path = os.path.join(root, generation)
+        self.meta = meta
+        self.categories = []
+        self._lookup = []
+        self._index_cache = {}
+        for i in range(len(meta["metadata_columns"])):
+            with open(self._file(f"categories-{i}.jsonl"), encoding="utf-8") as f:
+                lines = f.read().splitlines()[:meta["category_counts"][i]]
+            # Satu panggilan json.loads jauh lebih cepat daripada per baris
+            values = json.loads("[" + ",".join(lines) + "]")
+            self.categories.append(values)
+            self._lookup.append({value: code for code, value in enumerate(values)})
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    @property
+    def item_columns(self):
+        return pd.Index(self.meta["item_columns"])
+
+    @property
+    def metadata_columns(self):
+        return list(self.meta["metadata_columns"])
+
+    @property
+    def source(self):
+        return self.meta.get("source")
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @classmethod
+    def open(cls, root):
+        # Kembalikan None jika store belum pernah dibuat
+        try:
+            with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+                generation = f.read().strip()
+            with open(os.path.join(root, generation, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get("format") != FORMAT_VERSION:
+            return None
+        return cls(root, generation, meta)
+
+    @classmethod
+    def create(cls, root, df, item_columns, source=None):
+        # Tulis generasi baru lalu pindahkan CURRENT; generasi lama dihapus setelahnya
+        os.makedirs(root, exist_ok=True)
+        previous = cls.open(root)
+        number = int(previous.generation.split("-")[1]) + 1 if previous else 1
+        generation = f"gen-{number}"
+        path = os.path.join(root, generation)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+        metadata_columns = [c for c in df.columns if c not in set(item_columns)]
+        for i in range(len(metadata_columns)):
+            open(os.path.join(path, f"categories-{i}.jsonl"), "w").close()
+        open(os.path.join(path, "items.bin"), "wb").close()
+
+        meta = {
+            "format": FORMAT_VERSION,
+            "rows": 0,
+            "item_columns": list(item_columns),
+            "metadata_columns": metadata_columns,
+            "code_dtypes": [np.dtype(_code_dtype(c)).name for c in metadata_columns],
+            "category_counts": [0] * len(metadata_columns),
+            "source": source,
+        }
+        store = cls(root, generation, meta)
+        store.append(df, source)
+
+        with open(os.path.join(root, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(os.path.join(root, "CURRENT.tmp"), os.path.join(root, "CURRENT"))
+        if previous is not None:
+            # Memmap yang masih terbuka tetap valid di Linux walau file dihapus
+            shutil.rmtree(previous.path, ignore_errors=True)
+        return store
+
+    def _discard_partial(self):
+        # Buang byte dari append yang tidak sampai menulis meta.json
+        rows = self.meta["rows"]
+        _truncate(self._file("items.bin"), rows * len(self.meta["item_columns"]) * np.dtype(ITEM_DTYPE).itemsize)
+        for i, dtype in enumerate(self.meta["code_dtypes"]):
+            _truncate(self._file(f"codes-{i}.bin"), rows * np.dtype(dtype).itemsize)
+        for i, size in enumerate(self.meta.get("category_bytes", [])):
+            _truncate(self._file(f"categories-{i}.jsonl"), size)
+
+    def append(self, df, source=None):
+        if len(df):
+            self._discard_partial()
+            items = encode_items(df, self.meta["item_columns"])
+            _append_file(self._file("items.bin"), items.tobytes())
+
+            for i, column in enumerate(self.meta["metadata_columns"]):
+                codes = self._encode(i, df[column])
+                _append_file(self._file(f"codes-{i}.bin"), codes.astype(self.meta["code_dtypes"][i]).tobytes())
+
+        self.meta["rows"] += len(df)
+        self.meta["category_counts"] = [len(values) for values in self.categories]
+        self.meta["category_bytes"] = [
+            os.path.getsize(self._file(f"categories-{i}.jsonl")) for i in range(len(self.categories))
+        ]
+        if source is not None:
+            self.meta["source"] = source
+        _write_json_atomic(self._file("meta.json"), self.meta)
+
+    def _encode(self, i, series):
+        # Dictionary encoding: kategori baru ditambahkan di akhir sehingga kode lama tetap
+        local_codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        lookup = self._lookup[i]
+        new_values = []
+        mapping = np.empty(len(uniques) + 1, dtype=np.int64)
+        mapping[-1] = -1  # Sentinel -1 dari factorize berarti kosong
+        for j, value in enumerate(uniques):
+            value = _json_value(value)
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.categories[i])
+                self.categories[i].append(value)
+                new_values.append(value)
+            mapping[j] = code
+        if new_values:
+            lines = "".join(json.dumps(value, ensure_ascii=False) + "\n" for value in new_values)
+            _append_file(self._file(f"categories-{i}.jsonl"), lines.encode("utf-8"))
+        return mapping[local_codes]
+
+    def has_category(self, column, value):
+        # Cek O(1) lewat kamus kategori kolom metadata (mis. kunci idempotensi jawaban)
+        if column not in self.meta["metadata_columns"]:
+            return False
+        return _json_value(value) in self._lookup[self.meta["metadata_columns"].index(column)]
+
+    def items(self):
+        # Matriks item read-only yang dipetakan langsung dari file (zero-copy)
+        n_items = len(self.meta["item_columns"])
+        if self.rows == 0:
+            return np.zeros((0, n_items), dtype=ITEM_DTYPE)
+        return np.memmap(self._file("items.bin"), dtype=ITEM_DTYPE, mode="r", shape=(self.rows, n_items))
+
+    def codes(self, i):
+        if self.rows == 0:
+            return np.zeros(0, dtype=self.meta["code_dtypes"][i])
+        return np.memmap(self._file(f"codes-{i}.bin"), dtype=self.meta["code_dtypes"][i], mode="r", shape=(self.rows,))
+
+    def _category_index(self, i):
+        count = len(self.categories[i])
+        cached = self._index_cache.get(i)
+        if cached is None or len(cached) != count:
+            cached = self._index_cache[i] = pd.Index(self.categories[i], dtype=object)
+        return cached
+
+    def frame(self):
+        # DataFrame dengan urutan kolom asli: metadata kategorikal + item int8
+        items = pd.DataFrame(self.items(), columns=self.item_columns, copy=False)
+        data = {}
+        for i, column in enumerate(self.meta["metadata_columns"]):
+            data[column] = pd.Categorical.from_codes(self.codes(i), categories=self._category_index(i))
+        metadata = pd.DataFrame(data, index=items.index)
+        return pd.concat([metadata, items], axis=1)
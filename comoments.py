@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+
+class CoMomentAccumulator:
+    # Akumulator online (Welford / Chan) untuk n, rata-rata item dan matriks co-moment
+    # M2[i, j] = sum((x_i - mean_i) * (x_j - mean_j)). Dua akumulator bisa digabung
+    # tanpa membaca ulang data, sehingga validitas per subgrup cukup dari penggabungan.
+
+    def __init__(self, item_columns):
+        k = len(item_columns)
+        self.item_columns = pd.Index(item_columns)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros((k, k))
+
+    def add_one(self, values):
+        # Satu respons baru: O(k^2)
+        values = np.asarray(values, dtype=np.float64)
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += np.outer(delta, values - self.mean)
+
+    def add(self, values):
+        # Sekumpulan respons (baris x item) digabung sebagai satu batch
+        values = np.asarray(values).astype(np.float64, copy=False)
+        if len(values) == 0:
+            return self
+        batch = CoMomentAccumulator(self.item_columns)
+        batch.count = len(values)
+        batch.mean = values.mean(axis=0)
+        centered = values - batch.mean
+        batch.m2 = centered.T @ centered
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean.copy(), other.m2.copy()
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 = self.m2 + other.m2 + np.outer(delta, delta) * (self.count * other.count / count)
+        self.mean = self.mean + delta * (other.count / count)
+        self.count = count
+        return self
+
+    def means(self):
+        if self.count == 0:
+            return pd.Series(np.nan, index=self.item_columns)
+        return pd.Series(self.mean, index=self.item_columns)
+
+    def item_means(self, columns):
+        # Sama dengan df[columns].mean().round(2) pada baris yang sama
+        return self.means()[columns].round(2)
+
+    def variances(self, ddof=1):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(np.diag(self.m2) / (self.count - ddof), index=self.item_columns)
+
+    def covariance(self, ddof=1):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame(self.m2 / (self.count - ddof), index=self.item_columns, columns=self.item_columns)
+
+    def _positions(self, columns):
+        return self.item_columns.get_indexer(pd.Index(columns))
+
+    def total_variance(self, columns):
+        # Co-moment skor total (jumlah kolom); 0 berarti skor total sama di semua baris
+        idx = self._positions(columns)
+        return self.m2[np.ix_(idx, idx)].sum()
+
+    def item_total_correlation(self, columns):
+        # Korelasi tiap item dengan skor total kolom yang sama (setara corrwith terhadap Total)
+        idx = self._positions(columns)
+        block = self.m2[np.ix_(idx, idx)]
+        item_total = block.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = item_total / np.sqrt(np.diag(block) * block.sum())
+        return pd.Series(corr, index=pd.Index(columns))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+import analytics
+from comoments import CoMomentAccumulator
+
+# Jumlah baris yang diproses sekaligus saat membangun cube agar memori sementara terbatas
+CHUNK_ROWS = 100_000
+
+
+def _cell_value(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class DemographicCube:
+    # Satu akumulator co-moment per kombinasi (Jabatan, Masa Kerja, Usia); filter apa pun
+    # dijawab dengan menggabungkan sel yang cocok tanpa memindai baris responden.
+
+    def __init__(self, item_columns, dimensions=analytics.METADATA_FILTERS):
+        self.item_columns = pd.Index(item_columns)
+        self.dimensions = list(dimensions)
+        self.cells = {}
+
+    def update(self, df):
+        if len(df) == 0:
+            return
+        for start in range(0, len(df), CHUNK_ROWS):
+            chunk = df.iloc[start:start + CHUNK_ROWS]
+            values = chunk[self.item_columns].to_numpy()
+            groups = chunk.groupby(self.dimensions, dropna=False, observed=True, sort=False).indices
+            for key, positions in groups.items():
+                key = tuple(_cell_value(v) for v in (key if isinstance(key, tuple) else (key,)))
+                cell = self.cells.get(key)
+                if cell is None:
+                    cell = self.cells[key] = CoMomentAccumulator(self.item_columns)
+                cell.add(values[positions])
+
+    def _matches(self, key, selection):
+        return all(selected == "All" or value == selected for value, selected in zip(key, selection))
+
+    def select(self, selection):
+        # selection mengikuti urutan dimensions; "All" berarti tanpa filter
+        result = CoMomentAccumulator(self.item_columns)
+        for key, cell in self.cells.items():
+            if self._matches(key, selection):
+                result.merge(cell)
+        return result
+
+    def query(self, jabatan="All", masa_kerja="All", usia="All"):
+        return self.select((jabatan, masa_kerja, usia))
+
+    def counts_by(self, dimension, selection):
+        # Jumlah responden per nilai satu dimensi (pengganti value_counts), urut menurun
+        axis = self.dimensions.index(dimension)
+        counts = {}
+        for key, cell in self.cells.items():
+            if key[axis] is not None and self._matches(key, selection):
+                counts[key[axis]] = counts.get(key[axis], 0) + cell.count
+        counts = pd.Series(counts, dtype="int64", name="count")
+        counts.index.name = dimension
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
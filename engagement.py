@@ -1,163 +1,54 @@
-import streamlit as st
-import pandas as pd
-
-
-# Dibuat per halaman dengan pertanyaan acak
-def main():
-    logo_url = "https://www.agungtoyota.co.id/app/sam/assets/addons/sam/sam/samcgi-theme/resources/img/favicons/apple-touch-icon.png?v=1740058172"
-    st.set_page_config(page_title="Employee Engagement Survey", page_icon=logo_url, layout="wide")
-    logo_url2 = "https://www.agungtoyota.co.id/app/sam/assets/logo/logo-baru-1.png"
-    logo_url1 = "https://agungconcern.co.id/wp-content/uploads/2024/08/Logo-Agung-Concern-2024.svg"
-# Tambahkan CSS untuk tampilan yang lebih rapi
-    st.markdown(
-    f"""
-    <style>
-        /* Default: Tampilan Laptop / Desktop */
-        .header-container {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 10px 50px;
-            background-color: rgba(240, 240, 255, 0.6);
-            border-radius: 10px;
-            text-align: center;
-        }}
-
-        .header-logo {{
-            width: 150px;
-            max-width: 20%;
-            height: auto;
-        }}
-
-        h1 {{
-            font-size: 40px !important;
-            text-align: center;
-            color: black !important;
-        }}
+import uuid
 
-        .stButton button {{
-            width: 100%;
-            font-size: 22px !important;
-            padding: 10px;
-            background: linear-gradient(to bottom, #d8bfff, #a0c4ff);
-            color: black;
-            border-radius: 12px;
-            border: 2px solid #cdb4db;
-            box-shadow: 2px 2px 5px rgba(0, 0, 0, 0.15);
-            transition: all 0.2s ease-in-out;
-        }}
-
-        /* Footer */
-        .footer-container {{
-            position: relative;
-            width: 100%;
-            background-color: rgba(240, 240, 255, 0.6);
-            text-align: center;
-            padding: 10px;
-            font-size: 14px;
-            border-radius: 10px;
-        }}
-
-        /* MODE MOBILE */
-        @media screen and (max-width: 768px) {{
-            .header-container {{
-                flex-direction: column; /* Elemen turun ke bawah */
-                padding: 10px 20px; /* Padding lebih kecil */
-            }}
+import streamlit as st
 
-            .header-logo {{
-                width: 100px; /* Logo lebih kecil */
-                max-width: 40%; /* Agar tetap proporsional */
-                margin-bottom: 5px;
-            }}
+import instrumentation
+import submission_queue
+import survey_definition
 
-            h1 {{
-                font-size: 28px !important; /* Ukuran lebih kecil di HP */
-            }}
 
-            .stButton button {{
-                font-size: 18px !important; /* Tombol lebih kecil */
-                padding: 15px;
-            }}
+@st.cache_resource
+def get_submission_queue():
+    # Satu antrean per proses: semua sesi berbagi worker yang menulis ke sink secara batch;
+    # kunci pengiriman yang sudah tersimpan dicek di indeks persisten sebelum ditulis.
+    # SURVEY_SUBMISSION_MIRROR (opsional) meneruskan salinan ke endpoint lain, mis. Google Sheets.
+    mirror = None
+    if submission_queue.SUBMISSION_MIRROR:
+        mirror = submission_queue.SubmissionQueue(submission_queue.sink_from_spec(submission_queue.SUBMISSION_MIRROR))
+    return submission_queue.SubmissionQueue(
+        submission_queue.sink_from_spec(), index=submission_queue.SubmissionIndex(), mirror=mirror
+    )
 
-            .footer-container {{
-                font-size: 12px; /* Ukuran teks lebih kecil */
-                padding: 8px;
-            }}
-        }}
-    </style>
 
-    <div class="header-container">
-        <img src="{logo_url1}" class="header-logo">
-        <h1>Employee Engagement Survey</h1>
-        <img src="{logo_url2}" class="header-logo">
-    </div>
+# Dibuat per halaman dengan pertanyaan acak
+def main():
+    # Pertanyaan, skala dan header HTML sudah dikompilasi sekali per proses (survey_definition)
+    survey = survey_definition.SURVEY
+    st.set_page_config(page_title="Employee Engagement Survey", page_icon=survey_definition.LOGO_URL, layout="wide")
+    st.markdown(survey_definition.HEADER_HTML, unsafe_allow_html=True)
 
-    <div class="footer-container">
-        <p>© 2025 Agung Toyota - All Rights Reserved | Employee Engagement Survey</p>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
-    
     #st.title("📋 Employee Engagement Survey")
-    
-    if "page" not in st.session_state:
-        st.session_state.page = 0
-
-    if "responses" not in st.session_state:
-        st.session_state.responses = {}
 
-    categories = {
-        "Pendahuluan": "",
-        "1": "",
-        "2": "",
-        "3": "",
-        "4": "",
-        "Pertanyaan Terbuka": "📈",
-        "Selesai": "✅"
-    }
+    # Jawaban per sesi: satu skor int8 per pertanyaan (0 = belum dijawab). Dibuat ulang bila
+    # definisi survei berubah agar posisi jawaban tidak tertukar.
+    if st.session_state.get("survey_key") != survey.key:
+        st.session_state.survey_key = survey.key
+        st.session_state.page = 0
+        st.session_state.answers = survey.new_answers()
+    # Kunci idempotensi sekali per sesi (tetap sama setelah "Kembali ke Halaman Awal"):
+    # klik ganda atau pengisian ulang pada sesi yang sama hanya tersimpan sekali
+    if "submission_key" not in st.session_state:
+        st.session_state.submission_key = uuid.uuid4().hex
 
-    likert_scale = ["1 - Sangat Tidak Setuju", "2 - Tidak Setuju", "3 - Setuju", "4 - Sangat Setuju"]
-    
-    questions = {
-        "1": [
-            "Perusahaan memberikan fasilitas dan alat kerja yang saya butuhkan untuk mendukung kelancaran penyelesaian tugas",
-            "Atasan melakukan pembagian beban kerja sesuai dengan kapasitas dan kapabilitas yang saya miliki",
-            "Rekan kerja di lingkungan kerja saya berdedikasi untuk menghasilkan pekerjaan yang berkualitas",
-            "Lingkungan di tempat kerja saya mendorong untuk pengembangan diri saya"
-        ],
-        "2": [
-            "Atasan saya mendorong saya untuk ikut berpartisipasi memberikan ide yang baik, dan menerapkannya di pekerjaan",
-            "Saya memiliki teman baik di tempat kerja",
-            "Saya menerima penghasilan yang sesuai dengan apa yang saya kerjakan",
-            "Saya memiliki kesempatan untuk dapat melakukan yang terbaik dalam pekerjaan saya setiap hari",
-        ],
-        "3": [
-            "Atasan dan lingkungan sekitar saya di tempat kerja peduli terhadap saya",
-            "Jam kerja di perusahaan (Termasuk cuti & izin tidak masuk kerja) memenuhi kebutuhan bisnis & kebutuhan pribadi karyawan",
-            "Saya mendapatkan kesempatan untuk menyampaikan pendapat di tempat kerja",
-            "Atasan saya dan lingkungan kerja saya memastikan progress pekerjaan saya dalam 6 bulan terakhir"
-            
-        ],
-        "4": [
-            "Atasan saya menghargai saya di tempat kerja",
-            "Perusahaan memberikan kesempatan saya untuk dapat belajar dan berkembang",
-            "Saya mendapatkan pelatihan yang sesuai untuk kelancaran pekerjaan dalam setahun terakhir",
-            "Saya memiliki kesempatan berdiskusi dengan atasan mengenai jenjang karir dan program pengembangan diri saya"            
-        ]
-       
-    }
-    
-    total_pages = len(categories)
+    total_pages = len(survey.pages)
     st.progress(int(st.session_state.page) / (total_pages - 1))
     #page = int(st.session_state.page) if "page" in st.session_state and st.session_state.page.isdigit() else 0
     #st.progress(page / (total_pages - 1))
     
-    category = list(categories.keys())[st.session_state.page]
+    category = survey.pages[st.session_state.page]
     
     if category == "Pendahuluan":
-        st.subheader(f"{categories[category]} Selamat Datang di Employee Engagement Survey")
+        st.subheader(f"{survey.icons[category]} Selamat Datang di Employee Engagement Survey")
         st.write("""
             Survei ini dilakukan untuk mengumpulkan opini atau pendapat karyawan di lingkungan Agung Concern Group mengenai pengelolaan SDM dan Organisasi.
 
@@ -191,9 +82,6 @@ def main():
         if "submitted" not in st.session_state:
             st.session_state.submitted = False  # Tambahkan state untuk tracking pengiriman jawaban
 
-        if "responses" not in st.session_state:
-            st.session_state.responses = {}  # Inisialisasi jika belum ada
-
         if st.session_state.submitted:
             st.title("✅ Terima Kasih!")
             st.write("""
@@ -204,7 +92,7 @@ def main():
 
             if st.button("🏠 Kembali ke Halaman Awal"):
                 st.session_state.page = 0
-                st.session_state.responses = {} 
+                st.session_state.answers = survey.new_answers()
                 st.session_state.submitted = False  # Kembali ke survei
                 st.rerun()
 
@@ -212,15 +100,27 @@ def main():
             feedback = st.text_area("**Apa harapan Anda terhadap perusahaan agar Anda bisa lebih merasa bahagia?**", value="")
 
             if st.button("📩 Kirim Jawaban"):
-                if feedback.strip():  # Cek apakah feedback tidak kosong atau hanya spasi
-                    st.session_state.responses["Harapan Untuk Lebih Bahagia"] = feedback
-                    df = pd.DataFrame([st.session_state.responses])
-
-                    # Simpan ke file CSV
-                    #df.to_csv("survey_results.csv", index=False)
-
-                    st.session_state.submitted = True  # Ubah state ke submitted
+                if st.session_state.get("submitted_key") == st.session_state.submission_key:
+                    # Sesi ini sudah pernah mengirim: tidak perlu masuk antrean lagi
+                    st.session_state.submitted = True
                     st.rerun()
+                elif feedback.strip():  # Cek apakah feedback tidak kosong atau hanya spasi
+                    answers = survey.answers_dict(st.session_state.answers)
+                    try:
+                        # Hanya masuk antrean; penyimpanan ke disk/jaringan berjalan di worker latar
+                        with instrumentation.span("submission"):
+                            get_submission_queue().enqueue(
+                                answers,
+                                {survey_definition.FREE_TEXT_QUESTION: feedback},
+                                version=survey.version,
+                                key=st.session_state.submission_key,
+                            )
+                    except submission_queue.SubmissionQueueFull as error:
+                        st.warning(str(error))
+                    else:
+                        st.session_state.submitted_key = st.session_state.submission_key
+                        st.session_state.submitted = True  # Ubah state ke submitted
+                        st.rerun()
                 else:
                     st.warning("Silakan mengisikan pertanyaan di atas sebelum mengirimkan jawaban.")
 
@@ -235,16 +135,14 @@ def main():
                 #st.error("Belum ada data survei yang tersimpan.")
     
     else:
-        st.subheader(f"{categories[category]} Halaman: {category}")
-        all_answered = True
-        for question in questions.get(category, []):
-            default_value = st.session_state.responses.get(question, None)
-            response = st.radio(question, options=likert_scale, index=likert_scale.index(default_value) if default_value in likert_scale else None)
-    
-            if response is None:
-                all_answered = False
-    
-            st.session_state.responses[question] = response
+        st.subheader(f"{survey.icons[category]} Halaman: {category}")
+        answers = st.session_state.answers
+        positions = survey.page_positions[category]
+        for position in positions:
+            score = int(answers[position])
+            response = st.radio(survey.questions[position].text, options=survey.likert_scale, index=score - 1 if score else None)
+            answers[position] = survey.scores[response] if response is not None else 0
+        all_answered = bool(answers[positions].all())
         
         col1, col2 = st.columns([1, 1])
         
@@ -261,4 +159,7 @@ def main():
                     st.rerun()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Waktu & memori per rerun (aktif dengan SURVEY_PROFILE=1)
+    with instrumentation.page("engagement"):
+        main()
+        instrumentation.debug_panel()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Hash table open addressing untuk sidik 128-bit (dua uint64 per slot, 0 = kosong), dengan
+# probing linear yang divektorisasi: satu panggilan contains()/add() memproses satu batch kunci.
+# Dengan path, tabel disimpan di file (memmap) sehingga bertahan antar restart:
+#   header 4 x uint64 -> magic, kapasitas, jumlah kunci, cadangan
+#   tabel kapasitas x 2 uint64
+
+MAGIC = int.from_bytes(b"SVFPIDX1", "little")
+HEADER_WORDS = 4
+MIN_CAPACITY = 1 << 16
+# Tabel diperbesar 2x sebelum lebih dari setengah terisi agar probing tetap pendek
+MAX_LOAD = 0.5
+
+# Kolom yang boleh berbeda pada jawaban ganda (Google Form mencatat waktu kirim ulang)
+IGNORED_COLUMNS = ["Timestamp"]
+HASH_KEY = "survey-dedup-001"
+_SEEDS = (0x345678, 0x9E3779B97F4A7C15)
+_MULTIPLIERS = (1000003, 0xBF58476D1CE4E5B9)
+
+
+def _normalize(keys):
+    keys = np.array(keys, dtype=np.uint64).reshape(-1, 2)
+    # Bit terendah selalu 1 agar kunci tidak pernah sama dengan slot kosong
+    keys[:, 0] |= np.uint64(1)
+    return keys
+
+
+def key_fingerprints(values):
+    # Sidik blake2b 128-bit untuk string (mis. kunci idempotensi pengiriman)
+    digests = b"".join(hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest() for value in values)
+    return _normalize(np.frombuffer(digests, dtype=np.uint64))
+
+
+def _column_hashes(series):
+    # Skor item (int8) di-hash langsung; kolom lain lewat teks nilainya agar kolom object/angka
+    # hasil parsing CSV dan kolom kategorikal dari ColumnStore menghasilkan hash yang sama
+    if series.dtype == np.int8:
+        return pd.util.hash_array(series.to_numpy(), hash_key=HASH_KEY)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = np.asarray(uniques, dtype=object).astype(str).astype(object)
+    # Kode -1 (kosong) menunjuk elemen terakhir
+    table = np.append(pd.util.hash_array(texts, hash_key=HASH_KEY), np.uint64(0))
+    return table[codes]
+
+
+def row_fingerprints(df, columns=None):
+    # Sidik 128-bit per baris: hash 64-bit per kolom (sekali, tervektorisasi) digabung dengan
+    # dua rangkaian pengali berbeda menjadi dua kata uint64. Kolom diurutkan menurut nama karena
+    # frame dari ColumnStore menaruh semua metadata sebelum item.
+    if columns is None:
+        columns = [column for column in df.columns if column not in IGNORED_COLUMNS]
+    columns = sorted(columns, key=str)
+    words = [np.full(len(df), seed, dtype=np.uint64) for seed in _SEEDS]
+    multipliers = [np.uint64(m) for m in _MULTIPLIERS]
+    for i, column in enumerate(columns):
+        hashes = _column_hashes(df[column])
+        for j in range(len(words)):
+            words[j] = (words[j] ^ hashes) * multipliers[j]
+            multipliers[j] += np.uint64(82520 + 2 * (len(columns) - i))
+            hashes = (hashes >> np.uint64(29)) | (hashes << np.uint64(35))
+    return _normalize(np.column_stack(words))
+
+
+def first_occurrences(keys):
+    # Mask kemunculan pertama setiap kunci dalam batch
+    first = np.zeros(len(keys), dtype=bool)
+    if len(keys):
+        _, index = np.unique(keys.view(np.dtype((np.void, 16))).ravel(), return_index=True)
+        first[index] = True
+    return first
+
+
+def duplicate_mask(df, columns=None):
+    # Pass dedup massal: True untuk baris yang sama dengan baris sebelumnya (selain kolom IGNORED_COLUMNS)
+    return ~first_occurrences(row_fingerprints(df, columns))
+
+
+class FingerprintIndex:
+    def __init__(self, path=None, capacity=MIN_CAPACITY):
+        self.path = path
+        self._inode = None
+        if path is not None and os.path.exists(path):
+            self._open()
+        else:
+            self._allocate(capacity)
+            self._commit_file()
+
+    def __len__(self):
+        return int(self._header[2])
+
+    @property
+    def capacity(self):
+        return len(self.table)
+
+    def _allocate(self, capacity):
+        words = HEADER_WORDS + 2 * capacity
+        if self.path is None:
+            data = np.zeros(words, dtype=np.uint64)
+        else:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.truncate(words * 8)
+            data = np.memmap(tmp_path, dtype=np.uint64, mode="r+", shape=(words,))
+        data[:3] = [MAGIC, capacity, 0]
+        self._set_data(data)
+
+    def _open(self):
+        data = np.memmap(self.path, dtype=np.uint64, mode="r+")
+        if len(data) < HEADER_WORDS or data[0] != MAGIC or len(data) != HEADER_WORDS + 2 * int(data[1]):
+            raise ValueError(f"File indeks sidik tidak valid: {self.path}")
+        self._set_data(data)
+        self._inode = os.stat(self.path).st_ino
+
+    def _set_data(self, data):
+        self._data = data
+        self._header = data[:HEADER_WORDS]
+        self.table = data[HEADER_WORDS:].reshape(-1, 2)
+
+    def _commit_file(self):
+        # File baru (alokasi/perbesaran) menggantikan file lama secara atomik
+        if self.path is None:
+            return
+        self._data.flush()
+        os.replace(self.path + ".tmp", self.path)
+        self._data = None
+        self._open()
+
+    def refresh(self):
+        # Proses lain mungkin sudah memperbesar tabel (file diganti): buka ulang
+        if self.path is not None and os.stat(self.path).st_ino != self._inode:
+            self._open()
+
+    def flush(self):
+        if isinstance(self._data, np.memmap):
+            self._data.flush()
+
+    def _probe(self, keys):
+        # Slot berisi kunci (found) atau slot kosong pertama pada jalur probing
+        mask = np.uint64(self.capacity - 1)
+        position = (keys[:, 1] & mask).astype(np.int64)
+        found = np.zeros(len(keys), dtype=bool)
+        slot = np.empty(len(keys), dtype=np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            current = self.table[position[pending]]
+            hit = (current == keys[pending]).all(axis=1)
+            empty = (current == 0).all(axis=1)
+            done = hit | empty
+            found[pending[hit]] = True
+            slot[pending[done]] = position[pending[done]]
+            pending = pending[~done]
+            position[pending] = (position[pending] + 1) & int(mask)
+        return found, slot
+
+    def contains(self, keys):
+        keys = _normalize(keys)
+        return self._probe(keys)[0]
+
+    def add(self, keys):
+        # Tambahkan kunci; hasilnya True untuk kunci baru (kemunculan pertama dalam batch)
+        keys = _normalize(keys)
+        new = first_occurrences(keys)
+        new[new] = ~self._probe(keys[new])[0]
+        if new.any():
+            self._reserve(len(self) + int(new.sum()))
+            self._insert(keys[new])
+        return new
+
+    def _insert(self, keys):
+        pending = keys
+        while len(pending):
+            _, slot = self._probe(pending)
+            # Beberapa kunci bisa mendapat slot kosong yang sama: isi satu, sisanya probing ulang
+            _, first = np.unique(slot, return_index=True)
+            self.table[slot[first]] = pending[first]
+            self._header[2] += np.uint64(len(first))
+            rest = np.ones(len(pending), dtype=bool)
+            rest[first] = False
+            pending = pending[rest]
+
+    def _reserve(self, count):
+        capacity = self.capacity
+        while count > capacity * MAX_LOAD:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        keys = self.table[(self.table != 0).any(axis=1)].copy()
+        self._allocate(capacity)
+        self._insert(keys)
+        self._commit_file()
@@ -0,0 +1,550 @@
+import base64
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import analytics
+import instrumentation
+import response_log
+from bitmap_index import BitmapIndex
+from column_store import ColumnStore
+from demographic_cube import DemographicCube
+from fingerprint_index import FingerprintIndex, first_occurrences, row_fingerprints
+from name_index import NameIndex
+from survey_schema import (
+    ENGAGEMENT, FREE_TEXT, HAPPINESS, HAPPINESS_ITEMS, METADATA, SchemaError, SurveySchema, parse_survey_csv
+)
+from text_analytics import TextIndex
+
+# URL export CSV Google Sheets survei (bisa diarahkan ke sheet_server.py lokal untuk pengujian)
+SHEET_URL = os.environ.get(
+    "SURVEY_SHEET_URL",
+    "https://docs.google.com/spreadsheets/d/1V_wGUbLyDn6Uo5_EyFeLRp4AgZiYB72csQQJJEg5Yn8/export?format=csv"
+)
+
+# Sumber data dashboard: "sheet" (export CSV Google Sheets, di-poll) atau "log" / "log:<dir>"
+# (log jawaban lokal yang ditulis engagement.py, dibaca langsung tanpa lewat Google Sheets)
+SURVEY_SOURCE = os.environ.get("SURVEY_SOURCE", "sheet")
+# Interval cek perubahan file log untuk sumber "log" (detik)
+WATCH_INTERVAL = 0.25
+
+# Jumlah byte terakhir yang diminta ulang untuk memastikan isi lama tidak berubah
+OVERLAP_BYTES = 64
+
+# Batas waktu (connect, read) dalam detik agar fetch yang macet tidak menggantung
+DEFAULT_TIMEOUT = (5, 30)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Data yang dibaca satu kali rerun dashboard; tidak pernah diubah setelah dibuat
+SheetSnapshot = namedtuple("SheetSnapshot", ["df", "statement_columns", "aggregates", "version", "schema"])
+
+
+def _hasher(data=b""):
+    return hashlib.blake2b(data, digest_size=16)
+
+
+def log_root(source=SURVEY_SOURCE):
+    # Direktori log jawaban untuk sumber "log"; None berarti sumber Google Sheets
+    if source == "log":
+        return response_log.RESPONSE_DIR
+    if source.startswith("log:"):
+        return source[len("log:"):]
+    return None
+
+
+def _concat_rows(df, new_rows):
+    # Samakan kategori kolom kategorikal agar concat tetap kategorikal; frame lama
+    # tidak diubah di tempat karena mungkin sedang dibaca sesi lain
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            values = new_rows[column].astype("category")
+            added = values.cat.categories.difference(df[column].cat.categories)
+            if len(added):
+                df = df.assign(**{column: df[column].cat.add_categories(added)})
+            new_rows[column] = values.cat.set_categories(df[column].cat.categories)
+    new_rows.index = pd.RangeIndex(len(df), len(df) + len(new_rows))
+    return pd.concat([df, new_rows])
+
+
+def pooled_session(pool_size=4, retries=3, backoff=0.5):
+    # Koneksi keep-alive dipakai ulang, respons gzip, retry GET terbatas dengan backoff
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET"]), raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+class SurveyAggregates:
+    # Agregat turunan dashboard yang diperbarui hanya dari baris baru
+
+    def __init__(self):
+        self.cube = None
+        self.index = BitmapIndex(analytics.METADATA_FILTERS)
+        self.names = NameIndex(analytics.NAME_COLUMN)
+        self.texts = TextIndex()
+
+    def updated(self, new_rows, statement_columns):
+        # Salinan baru agar snapshot yang sedang dipakai sesi lain tidak ikut berubah
+        aggregates = copy.deepcopy(self)
+        aggregates.update(new_rows, statement_columns)
+        return aggregates
+
+    def update(self, new_rows, statement_columns):
+        if self.cube is None:
+            self.cube = DemographicCube(statement_columns)
+        self.cube.update(new_rows)
+        self.index.update(new_rows)
+        self.names.update(new_rows)
+        self.texts.update(new_rows)
+
+    @property
+    def count(self):
+        return self.cube.query().count if self.cube is not None else 0
+
+    def stats(self, jabatan="All", masa_kerja="All", usia="All"):
+        return self.cube.query(jabatan, masa_kerja, usia)
+
+    def item_means(self, columns, jabatan="All", masa_kerja="All", usia="All"):
+        if self.cube is None:
+            return pd.Series(float("nan"), index=columns)
+        return self.stats(jabatan, masa_kerja, usia).item_means(columns)
+
+    def counts_by(self, column, jabatan="All", masa_kerja="All", usia="All"):
+        return self.cube.counts_by(column, (jabatan, masa_kerja, usia))
+
+    def rows(self, jabatan="All", masa_kerja="All", usia="All"):
+        # Posisi baris responden sesuai filter dari bitmap index; None berarti semua baris
+        return self.index.select(jabatan, masa_kerja, usia)
+
+    def search_names(self, query="", jabatan="All", masa_kerja="All", usia="All"):
+        # Posisi baris responden bernama yang cocok dengan query dan filter
+        return self.names.search(query, self.rows(jabatan, masa_kerja, usia))
+
+    def search_comments(self, query, jabatan="All", masa_kerja="All", usia="All"):
+        # Posisi baris jawaban "Harapan Untuk Lebih Bahagia" yang memuat semua kata kunci
+        return self.texts.search(query, self.rows(jabatan, masa_kerja, usia))
+
+    def filter_options(self, column):
+        return ["All"] + sorted(self.index.values(column))
+
+
+class IncrementalSheetLoader:
+    # Menyimpan salinan lokal baris yang sudah dibaca dan hanya mem-parsing baris baru.
+    # Jika isi lama berubah (baris diedit/dihapus), data dimuat ulang penuh.
+    # Jawaban ganda (semua kolom sama kecuali Timestamp) dibuang sebelum masuk df/agregat:
+    # muat penuh lewat satu pass dedup tervektorisasi, baris tambahan lewat cek indeks sidik O(1).
+    # Dengan store_path, data disimpan di ColumnStore dan dibuka kembali tanpa parsing saat start.
+    # Dengan background=True, data yang sudah kedaluwarsa tetap disajikan selama data baru
+    # diunduh di thread terpisah (stale-while-revalidate).
+
+    def __init__(self, url, ttl=30, session=None, timeout=DEFAULT_TIMEOUT, verify=False, store_path=None,
+                 background=True):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.verify = verify  # Hapus verify=False untuk keamanan
+        self.session = session or pooled_session()
+        self.store_path = store_path
+        self.store = None
+        self.background = background
+        self.last_error = None  # Error fetch terakhir; data lama tetap dipakai
+        self._lock = threading.Lock()
+        self._refresher_lock = threading.Lock()
+        self._refresher = None
+        self._listeners = []
+        self._last_fetch = None
+        self._etag = None
+        self._last_modified = None
+        self._validators = None
+        self.version = 0  # Naik setiap ada perubahan data, dipakai sebagai kunci cache
+        self._reset()
+        if store_path:
+            self._restore()
+        self._publish()
+
+    def _reset(self):
+        self.df = None
+        self.statement_columns = None
+        self.schema = None
+        self.aggregates = SurveyAggregates()
+        self.fingerprints = FingerprintIndex()
+        self.duplicates = 0  # Jumlah baris ganda yang dibuang
+        self._header = b""
+        self._offset = 0
+        self._prefix_hash = _hasher()
+        self._prefix_digest = self._prefix_hash.digest()
+        self._tail = b""
+
+    def _restore(self):
+        # Buka data dari store (memmap) dan lanjutkan dari offset yang tersimpan
+        store = ColumnStore.open(self.store_path)
+        source = store.source if store is not None else None
+        if not source or source.get("url") != self.url or not source.get("schema"):
+            return
+        self.store = store
+        self.df = store.frame()
+        self.schema = SurveySchema(source["schema"])
+        self.statement_columns = self.schema.item_columns
+        self._header = source["header"].encode("utf-8")
+        self._offset = source["offset"]
+        self._tail = base64.b64decode(source["tail"])
+        # State hash tidak bisa disimpan; cukup digest untuk verifikasi fetch penuh berikutnya
+        self._prefix_hash = None
+        self._prefix_digest = bytes.fromhex(source["digest"]) if source["digest"] else None
+        self.duplicates = source.get("duplicates", 0)
+        self.fingerprints.add(row_fingerprints(self.df))
+        self.version += 1
+        self.aggregates = self.aggregates.updated(self.df, self.statement_columns)
+
+    def _source_state(self):
+        return {
+            "url": self.url,
+            "header": self._header.decode("utf-8"),
+            "offset": self._offset,
+            "tail": base64.b64encode(self._tail).decode("ascii"),
+            "digest": self._prefix_digest.hex() if self._prefix_digest else None,
+            "schema": self.schema.to_dict(),
+            "duplicates": self.duplicates,
+        }
+
+    def add_listener(self, callback):
+        # callback(new_rows, statement_columns, reset) dipanggil setiap ada baris baru
+        self._listeners.append(callback)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _publish(self):
+        # Snapshot diganti sekaligus agar pembaca tanpa lock tidak melihat state setengah jadi
+        self._snapshot = SheetSnapshot(self.df, self.statement_columns, self.aggregates, self.version, self.schema)
+
+    def is_fresh(self):
+        return self._last_fetch is not None and time.monotonic() - self._last_fetch < self.ttl
+
+    def refresh(self, force=False):
+        # force: tunggu data terbaru (tombol "Perbarui Data"). Selain itu data kedaluwarsa
+        # diperbarui di background dan snapshot terakhir langsung dikembalikan.
+        if force:
+            self._revalidate()
+        elif not self.is_fresh():
+            if self.background and self.df is not None:
+                self._revalidate_in_background()
+            else:
+                self._revalidate()
+        return self.snapshot()
+
+    def _revalidate_in_background(self):
+        with self._refresher_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._revalidate, name="sheet-refresh", daemon=True)
+            self._refresher.start()
+
+    def wait(self, timeout=None):
+        # Tunggu refresh background yang sedang berjalan (dipakai skrip/uji)
+        refresher = self._refresher
+        if refresher is not None:
+            refresher.join(timeout)
+
+    def _revalidate(self):
+        with self._lock, instrumentation.span("sheet_refresh"):
+            self._validators = None
+            try:
+                self._fetch()
+                self.last_error = None
+                if self._validators is not None:
+                    self._etag, self._last_modified = self._validators
+            except (requests.RequestException, SchemaError) as error:
+                # Jaringan gagal setelah retry atau tata letak sheet berubah:
+                # tetap sajikan data terakhir yang berhasil dimuat
+                self.last_error = error
+            self._last_fetch = time.monotonic()
+            self._publish()
+
+    def _get(self, headers=None):
+        headers = dict(headers or {})
+        if "Range" in headers:
+            # Rentang byte dihitung dari isi asli, jadi jangan minta versi terkompresi
+            headers["Accept-Encoding"] = "identity"
+        with instrumentation.span("sheet_download"):
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout, verify=self.verify)
+        if response.status_code in (200, 206):
+            # Validator baru dipakai setelah respons ini selesai diproses
+            self._validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response
+
+    def _fetch(self):
+        if self.df is None:
+            return self._reload()
+
+        headers = {}
+        if self._offset > OVERLAP_BYTES:
+            headers["Range"] = f"bytes={self._offset - OVERLAP_BYTES}-"
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        response = self._get(headers)
+
+        if response.status_code == 304:
+            # Sheet tidak berubah sejak fetch terakhir
+            return
+        if response.status_code == 206:
+            body = response.content
+            if body[:OVERLAP_BYTES] != self._tail:
+                return self._reload()
+            self._append(body[OVERLAP_BYTES:])
+        elif response.status_code == 200:
+            body = response.content
+            prefix_hash = _hasher(body[:self._offset])
+            if len(body) < self._offset or prefix_hash.digest() != self._prefix_digest:
+                return self._load_full(body)
+            self._prefix_hash = prefix_hash
+            self._append(body[self._offset:])
+        elif response.status_code == 416:
+            # Isi sheet lebih pendek dari offset terakhir: ada baris yang dihapus
+            self._reload()
+
+    def _reload(self):
+        response = self._get()
+        if response.status_code == 200:
+            self._load_full(response.content)
+
+    def _load_full(self, body):
+        # Skema (peran kolom) di-resolve sekali per muat ulang penuh, dipakai juga untuk baris tambahan.
+        # Parsing dilakukan sebelum reset agar data lama tetap utuh jika skema tidak cocok.
+        df, schema = parse_survey_csv(body.decode("utf-8"))
+        self._reset()
+        self._header = body.split(b"\n", 1)[0].rstrip(b"\r")
+        with instrumentation.span("dedup"):
+            fingerprints = row_fingerprints(df)
+            first = first_occurrences(fingerprints)
+            if not first.all():
+                df = df[first].reset_index(drop=True)
+                self.duplicates = int((~first).sum())
+            self.fingerprints.add(fingerprints[first])
+        self.df, self.schema, self.statement_columns = df, schema, schema.item_columns
+        self._advance(body)
+        if self.store_path:
+            with instrumentation.span("store_write"):
+                self.store = ColumnStore.create(self.store_path, self.df, self.statement_columns, self._source_state())
+                self.df = self.store.frame()
+        self._notify(self.df, reset=True)
+
+    def _append(self, suffix):
+        rows = suffix.lstrip(b"\r\n")
+        if not rows.strip():
+            return
+        new_rows = self.schema.read((self._header + b"\n" + rows).decode("utf-8"))
+        if len(new_rows) == 0:
+            return
+
+        self._advance(suffix)
+        with instrumentation.span("dedup"):
+            fresh = self.fingerprints.add(row_fingerprints(new_rows))
+        if not fresh.all():
+            self.duplicates += int((~fresh).sum())
+            new_rows = new_rows[fresh].reset_index(drop=True)
+            if len(new_rows) == 0:
+                # Hanya baris ganda: offset tetap maju, data tidak berubah
+                if self.store is not None:
+                    self.store.append(new_rows, self._source_state())
+                return
+        if self.store is not None:
+            # Baris baru ditulis ke store; frame dibuka ulang dari memmap agar tipe kolom konsisten
+            start = len(self.df)
+            with instrumentation.span("store_write"):
+                self.store.append(new_rows, self._source_state())
+                self.df = self.store.frame()
+            return self._notify(self.df.iloc[start:], reset=False)
+
+        self.df = _concat_rows(self.df, new_rows)
+        self._notify(new_rows, reset=False)
+
+    def _advance(self, data):
+        # Simpan offset, hash prefix dan potongan akhir untuk verifikasi fetch berikutnya
+        # Tanpa state hash (setelah restore + respons 206) digest tidak diketahui;
+        # fetch penuh berikutnya akan memuat ulang data
+        if self._prefix_hash is not None:
+            self._prefix_hash.update(data)
+            self._prefix_digest = self._prefix_hash.digest()
+        else:
+            self._prefix_digest = None
+        self._tail = (self._tail + data[-OVERLAP_BYTES:])[-OVERLAP_BYTES:]
+        self._offset += len(data)
+        self.version += 1
+
+    def _notify(self, rows, reset):
+        with instrumentation.span("aggregates_update"):
+            self.aggregates = self.aggregates.updated(rows, self.statement_columns)
+        for callback in self._listeners:
+            callback(rows, self.statement_columns, reset)
+
+
+class ResponseLogLoader:
+    # Sumber data dashboard langsung dari jawaban engagement.py, tanpa Google Sheets: baris yang
+    # sudah dikompaksi dibuka dari ColumnStore <root>/store (memmap), sisanya dibaca dari log
+    # mulai posisi store. Thread watch mengecek ujung log setiap watch_interval detik; hanya
+    # record baru yang di-parse lalu ditambahkan ke df dan agregat.
+
+    # Kolom yang dipakai dashboard tetapi tidak ditanyakan engagement.py; diisi kosong
+    EMPTY_COLUMNS = [analytics.NAME_COLUMN] + analytics.METADATA_FILTERS
+
+    def __init__(self, root=response_log.RESPONSE_DIR, watch_interval=WATCH_INTERVAL, watch=True):
+        self.root = root
+        self.store_path = os.path.join(root, "store")
+        self.log = response_log.ResponseLog(root)
+        self.watch_interval = watch_interval
+        self.last_error = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        with self._lock:
+            self._load()
+            self._publish()
+        if watch:
+            threading.Thread(target=self._watch, name="response-log-watch", daemon=True).start()
+
+    def _reset(self):
+        self.df = None
+        self.schema = None
+        self.statement_columns = None
+        self.aggregates = SurveyAggregates()
+        self.fingerprints = FingerprintIndex()
+        self.duplicates = 0
+        self.position = (1, 0)
+
+    def _schema(self, columns, item_columns):
+        # Peran kolom mengikuti SurveySchema.resolve: item pertama = happiness, sisanya engagement
+        metadata = [response_log.TIMESTAMP_COLUMN, response_log.ID_COLUMN] + self.EMPTY_COLUMNS
+        roles = {}
+        for column in columns:
+            if column not in item_columns:
+                roles[column] = METADATA if column in metadata else FREE_TEXT
+        for position, column in enumerate(item_columns):
+            roles[column] = HAPPINESS if position < HAPPINESS_ITEMS else ENGAGEMENT
+        return SurveySchema(roles)
+
+    def _frame(self, df, item_columns):
+        # Lengkapi kolom kosong dan item yang tidak ada (0 = tidak dijawab), skor sebagai int8
+        for column in self.EMPTY_COLUMNS:
+            if column not in df.columns:
+                df[column] = pd.Series(None, index=df.index, dtype=object)
+        missing = [column for column in item_columns if column not in df.columns]
+        if missing:
+            df = df.assign(**{column: np.int8(0) for column in missing})
+        return df.astype({column: np.int8 for column in item_columns})
+
+    def _load(self):
+        # Muat ulang penuh: store hasil kompaksi + sisa log setelah posisi store
+        self._reset()
+        store = ColumnStore.open(self.store_path)
+        position = response_log.store_position(store)
+        records, self.position, _ = self.log.read(position or (1, 0))
+        frame, item_columns = response_log.records_frame(records) if records else (None, [])
+        if position is not None:
+            item_columns = list(store.item_columns) + [c for c in item_columns if c not in set(store.item_columns)]
+            self._extend(self._frame(store.frame(), item_columns), item_columns)
+        if frame is not None:
+            self._extend(self._frame(frame, item_columns), item_columns)
+
+    def _extend(self, new_rows, item_columns):
+        if self.schema is None:
+            self.schema = self._schema(new_rows.columns, item_columns)
+            self.statement_columns = self.schema.item_columns
+        fresh = self.fingerprints.add(row_fingerprints(new_rows))
+        if not fresh.all():
+            self.duplicates += int((~fresh).sum())
+            new_rows = new_rows[fresh]
+        if len(new_rows) == 0:
+            return
+        if self.df is None:
+            self.df = new_rows.reset_index(drop=True)
+            new_rows = self.df
+        else:
+            new_rows = new_rows[list(self.df.columns)].copy()
+            self.df = _concat_rows(self.df, new_rows)
+        self.version += 1
+        with instrumentation.span("aggregates_update"):
+            self.aggregates = self.aggregates.updated(new_rows, self.statement_columns)
+        for callback in self._listeners:
+            callback(new_rows, self.statement_columns, False)
+
+    def _poll(self):
+        # True jika data berubah. Log yang sudah dipangkas melewati posisi baca atau pertanyaan
+        # baru (versi survei berubah) -> muat ulang penuh.
+        if self.log.end() <= self.position:
+            return False
+        segments = self.log.segments()
+        if self.position[0] < segments[0]:
+            self._load()
+            return True
+        records, self.position, _ = self.log.read(self.position)
+        if not records:
+            return False
+        frame, item_columns = response_log.records_frame(records)
+        if self.statement_columns is not None and not set(item_columns) <= set(self.statement_columns):
+            self._load()
+            return True
+        if self.statement_columns is not None:
+            item_columns = list(self.statement_columns)
+        version = self.version
+        self._extend(self._frame(frame, item_columns), item_columns)
+        return self.version != version
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                with self._lock:
+                    if self._poll():
+                        self._publish()
+                self.last_error = None
+            except Exception as error:
+                # Data terakhir tetap disajikan; dicoba lagi pada putaran berikutnya
+                self.last_error = error
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def _publish(self):
+        self._snapshot = SheetSnapshot(self.df, self.statement_columns, self.aggregates, self.version, self.schema)
+
+    def refresh(self, force=False):
+        # Perubahan dibaca thread watch; force membaca log saat itu juga (tombol "Perbarui Data")
+        if force:
+            with self._lock:
+                if self._poll():
+                    self._publish()
+        return self.snapshot()
+
+
+def load_survey(csv_path=None, url=None, store_path=None):
+    # Muat data survei sekali untuk skrip/CLI: dari file CSV lokal atau unduhan sheet
+    if csv_path:
+        with open(csv_path, encoding="utf-8") as f:
+            return parse_survey_csv(f.read())
+    loader = IncrementalSheetLoader(url or SHEET_URL, store_path=store_path, background=False)
+    snapshot = loader.refresh()
+    if snapshot.df is None:
+        raise SystemExit(f"Gagal mengambil data survei: {loader.last_error}")
+    return snapshot.df, snapshot.schema
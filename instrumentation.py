@@ -0,0 +1,294 @@
+import contextlib
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Instrumentasi aktif hanya dengan SURVEY_PROFILE=1. Saat nonaktif, span() mengembalikan
+# satu objek no-op bersama sehingga biayanya hanya satu pemanggilan fungsi.
+# SURVEY_PROFILE_MEMORY=1 menambahkan puncak memori tracemalloc per span (lebih lambat,
+# dan angkanya mencakup semua thread dalam proses).
+# SURVEY_METRICS_FILE=<path> menulis metrik format teks Prometheus setiap akhir rerun,
+# SURVEY_METRICS_PORT=<port> menyajikannya di http://127.0.0.1:<port>/metrics.
+
+
+def _flag(name):
+    return os.environ.get(name, "") not in ("", "0", "false", "False")
+
+
+ENABLED = _flag("SURVEY_PROFILE")
+TRACE_MEMORY = ENABLED and _flag("SURVEY_PROFILE_MEMORY")
+METRICS_FILE = os.environ.get("SURVEY_METRICS_FILE")
+METRICS_PORT = os.environ.get("SURVEY_METRICS_PORT")
+
+# Batas bucket histogram durasi (detik)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_local = threading.local()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.peak_bytes = None
+
+    def add(self, seconds, peak_bytes):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        if peak_bytes is not None:
+            self.peak_bytes = peak_bytes
+
+
+class Registry:
+    # Agregat per (aplikasi, span) untuk seluruh proses
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, app, name, seconds, peak_bytes=None):
+        with self._lock:
+            stats = self.stats.get((app, name))
+            if stats is None:
+                stats = self.stats[(app, name)] = SpanStats()
+            stats.add(seconds, peak_bytes)
+
+    def rows(self):
+        with self._lock:
+            return [
+                {"app": app, "span": name, "count": s.count, "total_s": s.total,
+                 "mean_ms": 1000 * s.total / s.count, "max_ms": 1000 * s.max,
+                 "peak_mb": s.peak_bytes / 2**20 if s.peak_bytes is not None else None}
+                for (app, name), s in sorted(self.stats.items())
+            ]
+
+    def prometheus(self):
+        # Format teks eksposisi Prometheus
+        def labels(app, name, **extra):
+            pairs = {"app": app, "span": name, **extra}
+            return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+        with self._lock:
+            items = sorted(self.stats.items())
+            lines = [
+                "# HELP survey_span_seconds Durasi setiap tahap aplikasi survei.",
+                "# TYPE survey_span_seconds histogram",
+            ]
+            for (app, name), s in items:
+                for bound, count in zip(BUCKETS, s.buckets):
+                    lines.append(f"survey_span_seconds_bucket{{{labels(app, name, le=repr(bound))}}} {count}")
+                lines.append(f"survey_span_seconds_bucket{{{labels(app, name, le='+Inf')}}} {s.count}")
+                lines.append(f"survey_span_seconds_sum{{{labels(app, name)}}} {s.total!r}")
+                lines.append(f"survey_span_seconds_count{{{labels(app, name)}}} {s.count}")
+            lines += [
+                "# HELP survey_span_max_seconds Durasi terlama setiap tahap sejak proses berjalan.",
+                "# TYPE survey_span_max_seconds gauge",
+            ]
+            lines += [f"survey_span_max_seconds{{{labels(app, name)}}} {s.max!r}" for (app, name), s in items]
+            memory = [(key, s) for key, s in items if s.peak_bytes is not None]
+            if memory:
+                lines += [
+                    "# HELP survey_span_peak_bytes Puncak memori tracemalloc pada eksekusi terakhir tahap.",
+                    "# TYPE survey_span_peak_bytes gauge",
+                ]
+                lines += [f"survey_span_peak_bytes{{{labels(app, name)}}} {s.peak_bytes}" for (app, name), s in memory]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+
+
+class _MemoryFrame:
+    __slots__ = ("base", "peak")
+
+    def __init__(self, base):
+        self.base = base
+        self.peak = base
+
+
+class Span:
+    __slots__ = ("name", "start", "frame")
+
+    def __init__(self, name):
+        self.name = name
+        self.frame = None
+
+    def __enter__(self):
+        if TRACE_MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            stack = _memory_stack()
+            if stack:
+                # Simpan puncak span induk sebelum peak di-reset untuk span ini
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self.frame = _MemoryFrame(current)
+            stack.append(self.frame)
+            tracemalloc.reset_peak()
+        _local.depth = getattr(_local, "depth", 0) + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _local.depth -= 1
+        peak_bytes = None
+        if self.frame is not None:
+            stack = _memory_stack()
+            self.frame.peak = max(self.frame.peak, tracemalloc.get_traced_memory()[1])
+            stack.pop()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.frame.peak)
+            peak_bytes = self.frame.peak - self.frame.base
+
+        app = getattr(_local, "app", "default")
+        REGISTRY.record(app, self.name, seconds, peak_bytes)
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append({"span": self.name, "depth": _local.depth, "ms": 1000 * seconds,
+                            "peak_mb": peak_bytes / 2**20 if peak_bytes is not None else None})
+        return False
+
+
+def _memory_stack():
+    stack = getattr(_local, "memory_stack", None)
+    if stack is None:
+        stack = _local.memory_stack = []
+    return stack
+
+
+def span(name):
+    # with span("csv_parse"): ...
+    if not ENABLED:
+        return NOOP_SPAN
+    return Span(name)
+
+
+def timed(name):
+    # Dekorator: @timed("validity_section"); saat nonaktif fungsi dikembalikan apa adanya
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def begin_run(app):
+    # Awal satu rerun skrip Streamlit (per thread sesi)
+    if not ENABLED:
+        return
+    _local.app = app
+    _local.records = []
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT))
+
+
+def end_run():
+    if not ENABLED:
+        return
+    if METRICS_FILE:
+        write_prometheus(METRICS_FILE)
+
+
+@contextlib.contextmanager
+def page(app):
+    # Bungkus fungsi main() aplikasi: satu rerun = satu span "page"
+    begin_run(app)
+    try:
+        with span("page"):
+            yield
+    finally:
+        end_run()
+
+
+def run_records():
+    # Span yang tercatat pada rerun ini, urut selesai (span anak sebelum induknya)
+    return list(getattr(_local, "records", None) or [])
+
+
+def write_prometheus(path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    # Endpoint /metrics untuk scraper lokal; hanya dijalankan sekali per proses
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                return None  # Port sudah dipakai proses lain
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
+
+
+def debug_panel():
+    # Panel opsional di aplikasi: waktu & memori per tahap untuk rerun ini dan kumulatif proses
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander("🛠️ Debug: waktu & memori per tahap"):
+        records = run_records()
+        if records:
+            rerun = pd.DataFrame(records)
+            rerun["span"] = ["  " * (depth) + name for depth, name in zip(rerun["depth"], rerun["span"])]
+            st.write("**Rerun ini**")
+            st.dataframe(rerun.drop(columns="depth"), hide_index=True)
+        st.write("**Sejak proses berjalan**")
+        st.dataframe(pd.DataFrame(REGISTRY.rows()), hide_index=True)
@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Uji beban engagement.py: N responden headless terhubung ke server Streamlit lewat websocket
+# (/_stcore/stream, protokol yang sama dengan browser), mengisi semua halaman dengan jeda
+# berpikir acak lalu mengirim jawaban. Latensi diukur per aksi: dari BackMsg rerun dikirim
+# sampai script_finished terakhir (termasuk rerun kedua dari st.rerun()).
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engagement.py")
+WIDGETS = ("button", "radio", "text_area")
+RUN_TIMEOUT = 60
+STARTUP_TIMEOUT = 60
+PERCENTILES = [50, 90, 95, 99]
+
+# Jeda berpikir rata-rata (detik) per aksi dan peluang responden kembali ke halaman sebelumnya
+THINK_SECONDS = 2.0
+BACK_RATE = 0.1
+# Batas kenaikan p95 / memori per sesi atau penurunan throughput dibanding baseline
+MAX_REGRESSION = 0.2
+
+COMMENTS = ["Gaji yang lebih adil", "Jenjang karier yang jelas", "Lebih banyak pelatihan", "Jam kerja fleksibel"]
+
+
+class LoadTestError(RuntimeError):
+    pass
+
+
+class Respondent:
+    # Satu sesi browser tiruan: menyimpan widget yang tampil dan nilai widget seperti frontend
+
+    def __init__(self, url, latencies):
+        self.url = url
+        self.latencies = latencies
+        self.ws = None
+        self.page_hash = ""
+        self.widgets = {}
+        self.values = {}
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, action, trigger=None):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = self.page_hash
+        for value in self.values.values():
+            state.widget_states.widgets.add().CopyFrom(value)
+        if trigger is not None:
+            state.widget_states.widgets.add(id=trigger, trigger_value=True)
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._wait_finished()
+        self.latencies.append((action, time.perf_counter() - start))
+
+    async def _wait_finished(self):
+        widgets = {}
+        while True:
+            message = ForwardMsg.FromString(await asyncio.wait_for(self.ws.recv(), RUN_TIMEOUT))
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                # Awal script run (juga setelah st.rerun()): widget dikumpulkan ulang
+                widgets = {}
+                self.page_hash = message.new_session.page_script_hash
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raise LoadTestError(f"Exception di aplikasi: {element.exception.message}")
+                if element_type in WIDGETS:
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (element_type, widget.id, list(getattr(widget, "options", [])))
+            elif kind == "script_finished":
+                if message.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if message.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise LoadTestError("Script gagal dikompilasi")
+                self.widgets = widgets
+                # Nilai widget yang tidak tampil lagi dibuang, seperti frontend
+                ids = {widget_id for _, widget_id, _ in widgets.values()}
+                self.values = {widget_id: value for widget_id, value in self.values.items() if widget_id in ids}
+                return
+
+    def find(self, element_type, text=""):
+        for label, (kind, widget_id, options) in self.widgets.items():
+            if kind == element_type and text in label:
+                return widget_id, options
+        return None
+
+    async def click(self, action, text):
+        found = self.find("button", text)
+        if found is None:
+            raise LoadTestError(f"Tombol {text!r} tidak ditemukan (tampil: {list(self.widgets)})")
+        await self.rerun(action, trigger=found[0])
+
+    async def set_value(self, action, widget_id, value):
+        self.values[widget_id] = WidgetState(id=widget_id, string_value=value)
+        await self.rerun(action)
+
+
+async def _think(rng, mean):
+    if mean > 0:
+        await asyncio.sleep(min(rng.expovariate(1 / mean), 5 * mean))
+
+
+async def respondent_flow(url, rng, think, back_rate, latencies):
+    # Pendahuluan -> halaman pertanyaan (pilih tiap jawaban, kadang Kembali) -> harapan -> Kirim
+    respondent = Respondent(url, latencies)
+    await respondent.connect()
+    try:
+        await respondent.rerun("load")
+        await _think(rng, think)
+        await respondent.click("mulai", "Mulai")
+        while True:
+            radios = [(widget_id, options) for kind, widget_id, options in respondent.widgets.values() if kind == "radio"]
+            if radios:
+                for widget_id, options in radios:
+                    await _think(rng, think)
+                    await respondent.set_value("jawab", widget_id, rng.choice(options))
+                if respondent.find("button", "Kembali") is not None and rng.random() < back_rate:
+                    # Lihat lagi halaman sebelumnya (jawaban tetap terisi), lalu kembali ke halaman ini
+                    await _think(rng, think)
+                    await respondent.click("kembali", "Kembali")
+                    await _think(rng, think)
+                    # Dari halaman pertanyaan pertama, Kembali menuju Pendahuluan (tombol Mulai)
+                    await respondent.click("lanjut", "Lanjut" if respondent.find("button", "Lanjut") else "Mulai")
+                await _think(rng, think)
+                await respondent.click("lanjut", "Lanjut")
+                continue
+            text_area = respondent.find("text_area")
+            if text_area is None:
+                raise LoadTestError(f"Halaman tidak dikenal (widget: {list(respondent.widgets)})")
+            await _think(rng, think)
+            await respondent.set_value("isi_harapan", text_area[0], rng.choice(COMMENTS))
+            await _think(rng, think)
+            await respondent.click("kirim", "Kirim Jawaban")
+            if respondent.find("button", "Kembali ke Halaman Awal") is None:
+                raise LoadTestError("Halaman Terima Kasih tidak tampil setelah kirim")
+            return respondent
+    except BaseException:
+        await respondent.close()
+        raise
+
+
+def _rss_bytes(pid):
+    # Resident memory proses server (Linux); None bila tidak tersedia
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app=APP, port=None, env=None):
+    # streamlit run di proses terpisah; jawaban uji ditulis ke direktori sementara
+    port = port or _free_port()
+    command = [
+        sys.executable, "-m", "streamlit", "run", app, "--server.headless=true", f"--server.port={port}",
+        "--server.address=127.0.0.1", "--browser.gatherUsageStats=false",
+    ]
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise LoadTestError(f"Server Streamlit berhenti: {process.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            with urllib.request.urlopen(base + "/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process, base
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise LoadTestError("Server Streamlit tidak siap dalam batas waktu")
+
+
+def _stream_url(base):
+    return base.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + "/_stcore/stream"
+
+
+async def run_load_test(base, respondents, think=THINK_SECONDS, ramp=None, back_rate=BACK_RATE, seed=0, pid=None):
+    url = _stream_url(base)
+    latencies, errors = [], []
+    # Sesi pemanasan: impor modul & cache_resource dibuat sebelum baseline memori diukur
+    warmup = await respondent_flow(url, random.Random(seed - 1), 0, 0, [])
+    await warmup.close()
+    await asyncio.sleep(0.5)
+    rss_base = _rss_bytes(pid) if pid else None
+    ramp = think * 5 if ramp is None else ramp
+
+    async def one(i):
+        rng = random.Random(seed + i)
+        await asyncio.sleep(rng.uniform(0, ramp))
+        try:
+            return await respondent_flow(url, rng, think, back_rate, latencies)
+        except Exception as error:
+            errors.append(f"{type(error).__name__}: {error}")
+            return None
+
+    start = time.perf_counter()
+    sessions = await asyncio.gather(*(one(i) for i in range(respondents)))
+    elapsed = time.perf_counter() - start
+    # Semua sesi masih terhubung: selisih RSS dibagi jumlah sesi = memori per responden
+    rss_loaded = _rss_bytes(pid) if pid else None
+    for session in sessions:
+        if session is not None:
+            await session.close()
+    return summarize(latencies, errors, respondents, elapsed, rss_base, rss_loaded)
+
+
+def summarize(latencies, errors, respondents, elapsed, rss_base=None, rss_loaded=None):
+    frame = pd.DataFrame(latencies, columns=["action", "seconds"])
+    rows = []
+    for action, seconds in list(frame.groupby("action", sort=False)["seconds"]) + [("semua", frame["seconds"])]:
+        ms = seconds.to_numpy() * 1000
+        row = {"action": action, "count": len(ms)}
+        row.update({f"p{p}_ms": np.percentile(ms, p) if len(ms) else np.nan for p in PERCENTILES})
+        row["max_ms"] = ms.max() if len(ms) else np.nan
+        rows.append(row)
+    submitted = int((frame["action"] == "kirim").sum())
+    per_session = (rss_loaded - rss_base) / respondents / 2**20 if rss_base and rss_loaded else None
+    return {
+        "respondents": respondents,
+        "seconds": elapsed,
+        "submitted": submitted,
+        "errors": errors,
+        "submissions_per_second": submitted / elapsed if elapsed else 0.0,
+        "reruns_per_second": len(frame) / elapsed if elapsed else 0.0,
+        "rss_base_mb": rss_base / 2**20 if rss_base else None,
+        "rss_loaded_mb": rss_loaded / 2**20 if rss_loaded else None,
+        "mb_per_session": per_session,
+        "latency": rows,
+    }
+
+
+def compare(result, baseline, max_regression=MAX_REGRESSION):
+    # Daftar metrik yang memburuk lebih dari max_regression dibanding baseline
+    regressions = []
+    base_latency = {row["action"]: row for row in baseline["latency"]}
+    for row in result["latency"]:
+        base = base_latency.get(row["action"])
+        if base and base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"p95 {row['action']}: {base['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+    if baseline.get("mb_per_session") and result.get("mb_per_session"):
+        if result["mb_per_session"] > baseline["mb_per_session"] * (1 + max_regression):
+            regressions.append(f"memori/sesi: {baseline['mb_per_session']:.2f} -> {result['mb_per_session']:.2f} MB")
+    if result["reruns_per_second"] < baseline["reruns_per_second"] * (1 - max_regression):
+        regressions.append(f"rerun/s: {baseline['reruns_per_second']:.1f} -> {result['reruns_per_second']:.1f}")
+    return regressions
+
+
+def print_report(result):
+    print(f"\n== {result['respondents']} responden serentak, {result['seconds']:.1f} s ==")
+    latency = pd.DataFrame(result["latency"])
+    print(latency.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    print(f"\nTerkirim: {result['submitted']} · {result['submissions_per_second']:.2f} kirim/s · "
+          f"{result['reruns_per_second']:.1f} rerun/s · gagal: {len(result['errors'])}")
+    if result["mb_per_session"] is not None:
+        print(f"Memori server: {result['rss_base_mb']:.1f} MB -> {result['rss_loaded_mb']:.1f} MB "
+              f"({result['mb_per_session']:.3f} MB per sesi)")
+    for error in result["errors"][:5]:
+        print(f"  ! {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban engagement.py dengan responden headless serentak.")
+    parser.add_argument("--respondents", "-n", type=int, default=50, help="Jumlah responden serentak")
+    parser.add_argument("--think", type=float, default=THINK_SECONDS, help="Rata-rata jeda berpikir per aksi (detik)")
+    parser.add_argument("--ramp", type=float, help="Sebaran waktu mulai responden (detik, default 5x think)")
+    parser.add_argument("--back-rate", type=float, default=BACK_RATE, help="Peluang menekan Kembali per halaman")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Server yang sudah berjalan (mis. http://127.0.0.1:8501); default: jalankan sendiri")
+    parser.add_argument("--app", default=APP, help="Script Streamlit yang diuji bila server dijalankan sendiri")
+    parser.add_argument("--output", help="Simpan hasil (JSON) untuk dipakai sebagai baseline berikutnya")
+    parser.add_argument("--baseline", help="Hasil JSON sebelumnya; keluar dengan status 1 bila ada regresi")
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION, help="Batas regresi relatif (0.2 = 20%%)")
+    parser.add_argument("--max-p95-ms", type=float, help="Batas absolut p95 semua aksi (ms)")
+    args = parser.parse_args(argv)
+
+    process, pid = None, None
+    with tempfile.TemporaryDirectory() as response_dir:
+        if args.url:
+            base = args.url
+        else:
+            env = {"SURVEY_SUBMISSION_SINK": f"log:{response_dir}"}
+            process, base = start_server(args.app, env=env)
+            pid = process.pid
+        try:
+            result = asyncio.run(run_load_test(
+                base, args.respondents, args.think, args.ramp, args.back_rate, args.seed, pid
+            ))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(10)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=float)
+
+    failures = []
+    if result["errors"]:
+        failures.append(f"{len(result['errors'])} responden gagal")
+    overall = result["latency"][-1]
+    if args.max_p95_ms is not None and overall["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 {overall['p95_ms']:.1f} ms > batas {args.max_p95_ms:.1f} ms")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += compare(result, json.load(f), args.max_regression)
+    if failures:
+        print("\nREGRESI:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import re
+import unicodedata
+
+import numpy as np
+
+import analytics
+
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def normalize_name(name):
+    # Huruf kecil, tanpa tanda diakritik dan tanda baca, spasi tunggal
+    text = "".join(c for c in unicodedata.normalize("NFKD", str(name)) if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[\W_]+", " ", text.casefold()).split())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    # Indeks pencarian nama responden: trigram -> posisi baris untuk pencarian potongan kata,
+    # serta daftar token terurut untuk pencarian awalan kata pendek (< 3 huruf).
+    # Posting berupa array numpy terurut; pembaruan hanya mengganti array trigram yang tersentuh.
+
+    def __init__(self, column=analytics.NAME_COLUMN):
+        self.column = column
+        self.length = 0
+        self.normalized = []
+        self.named = EMPTY
+        self.postings = {}
+        self.tokens = np.zeros(0, dtype=str)
+        self.token_rows = EMPTY
+
+    def update(self, df):
+        n = len(df)
+        if n == 0:
+            return
+        names = df[self.column].tolist() if self.column in df.columns else [None] * n
+        normalized = ["" if name is None or name != name else normalize_name(name) for name in names]
+
+        added, tokens, token_rows = {}, [], []
+        for row, text in enumerate(normalized, start=self.length):
+            for trigram in _trigrams(text):
+                added.setdefault(trigram, []).append(row)
+            for token in set(text.split()):
+                tokens.append(token)
+                token_rows.append(row)
+        for trigram, rows in added.items():
+            rows = np.asarray(rows, dtype=np.int64)
+            old = self.postings.get(trigram)
+            self.postings[trigram] = rows if old is None else np.concatenate([old, rows])
+
+        if tokens:
+            tokens = np.concatenate([self.tokens, np.asarray(tokens, dtype=str)])
+            token_rows = np.concatenate([self.token_rows, np.asarray(token_rows, dtype=np.int64)])
+            order = np.argsort(tokens, kind="stable")
+            self.tokens, self.token_rows = tokens[order], token_rows[order]
+
+        rows = np.arange(self.length, self.length + n)
+        self.named = np.concatenate([self.named, rows[[bool(text) for text in normalized]]])
+        self.normalized.extend(normalized)
+        self.length += n
+
+    def __deepcopy__(self, memo):
+        # Array posting tidak pernah diubah di tempat, jadi salinan cukup berbagi array lama
+        clone = NameIndex.__new__(NameIndex)
+        clone.__dict__.update(self.__dict__)
+        clone.normalized = list(self.normalized)
+        clone.postings = dict(self.postings)
+        return clone
+
+    def _prefix(self, word):
+        start = np.searchsorted(self.tokens, word, side="left")
+        stop = np.searchsorted(self.tokens, word + "\U0010ffff", side="left")
+        return np.unique(self.token_rows[start:stop])
+
+    def _substring(self, word):
+        postings = []
+        for trigram in _trigrams(word):
+            rows = self.postings.get(trigram)
+            if rows is None:
+                return EMPTY
+            postings.append(rows)
+        postings.sort(key=len)
+        candidates = postings[0]
+        for rows in postings[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        # Trigram cocok belum tentu berurutan: cek ulang potongan kata pada nama
+        return np.asarray([row for row in candidates if word in self.normalized[row]], dtype=np.int64)
+
+    def search(self, query="", rows=None):
+        # Posisi baris (urut) yang namanya memuat semua kata query; rows membatasi ke hasil filter
+        result = self.named
+        for word in normalize_name(query).split():
+            matches = self._prefix(word) if len(word) < 3 else self._substring(word)
+            result = np.intersect1d(result, matches, assume_unique=True)
+            if len(result) == 0:
+                break
+        if rows is not None:
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result
@@ -0,0 +1,310 @@
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+import pandas as pd
+
+from column_store import ColumnStore
+from survey_schema import likert_score
+
+try:
+    import fcntl
+except ImportError:  # Windows: hanya penguncian antar-thread dalam satu proses
+    fcntl = None
+
+# Struktur direktori log jawaban survei:
+#   segment-<n>.log -> record jawaban, satu baris "<crc32 hex> <json>\n", hanya ditambah di akhir
+#   LOCK            -> flock eksklusif selama satu batch ditulis (antar proses Streamlit)
+#   COMPACT.lock    -> flock kompaksi; hanya satu proses yang memindahkan log ke store
+#   store/          -> ColumnStore hasil kompaksi (format yang dibaca dashboard)
+# Posisi log yang sudah dikompaksi disimpan di meta.json store (source), sehingga tercatat atomik
+# bersama barisnya.
+
+RESPONSE_DIR = os.environ.get("SURVEY_RESPONSE_DIR", "data/responses")
+SEGMENT_BYTES = 64 * 1024 * 1024
+COMPACT_INTERVAL = 30
+
+TIMESTAMP_COLUMN = "Timestamp"
+ID_COLUMN = "ID Jawaban"
+
+
+def _segment_name(number):
+    return f"segment-{number:06d}.log"
+
+
+def _segment_number(name):
+    return int(name[len("segment-"):-len(".log")])
+
+
+def encode_record(record):
+    # CRC per baris mendeteksi tulisan yang terpotong saat crash
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def decode_record(line):
+    # None jika baris rusak (crc tidak cocok / bukan JSON)
+    crc, _, payload = line.partition(b" ")
+    try:
+        if int(crc, 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def make_record(answers, text=None, version=None, key=None):
+    # answers: pertanyaan Likert -> jawaban ("3 - Setuju"); text: pertanyaan terbuka -> isian;
+    # version: versi definisi survei (survey_definition.SURVEY_VERSION); key: kunci idempotensi
+    # (satu per sesi responden, default = id) -- record dengan key sama hanya disimpan sekali
+    record_id = uuid.uuid4().hex
+    record = {
+        "id": record_id,
+        "key": key or record_id,
+        "submitted_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "answers": dict(answers),
+        "text": dict(text or {}),
+    }
+    if version is not None:
+        record["version"] = version
+    return record
+
+
+@contextmanager
+def _flock(path, blocking=True):
+    # Yield False jika tidak blocking dan kunci sedang dipegang proses lain
+    with open(path, "a") as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _fsync_dir(path):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class ResponseLog:
+    def __init__(self, root=RESPONSE_DIR, segment_bytes=SEGMENT_BYTES):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._fd = None
+        self._segment = None
+        os.makedirs(root, exist_ok=True)
+
+    def segments(self):
+        names = [name for name in os.listdir(self.root) if name.startswith("segment-") and name.endswith(".log")]
+        return sorted(_segment_number(name) for name in names)
+
+    def _path(self, number):
+        return os.path.join(self.root, _segment_name(number))
+
+    def _open(self, number):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd, self._segment = None, None
+        created = not os.path.exists(self._path(number))
+        self._fd = os.open(self._path(number), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._segment = number
+        if created:
+            _fsync_dir(self.root)
+
+    def append(self, lines):
+        # Satu batch: kunci antar proses, satu write, satu fsync
+        data = b"".join(lines)
+        with self._lock, _flock(os.path.join(self.root, "LOCK")):
+            if self._fd is None:
+                segments = self.segments()
+                self._open(segments[-1] if segments else 1)
+            # Segmen penuh (oleh proses mana pun): pindah ke segmen berikutnya
+            size = os.fstat(self._fd).st_size
+            while size >= self.segment_bytes:
+                self._open(self._segment + 1)
+                size = os.fstat(self._fd).st_size
+            # Sisa tulisan terpotong dari crash ditutup dengan newline agar jadi satu baris rusak saja
+            if size and os.pread(self._fd, 1, size - 1) != b"\n":
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            os.fsync(self._fd)
+
+    def end(self):
+        # Posisi akhir log saat ini (segmen terakhir, ukurannya); lebih besar dari posisi baca = ada tulisan baru
+        segments = self.segments()
+        if not segments:
+            return (1, 0)
+        return segments[-1], os.path.getsize(self._path(segments[-1]))
+
+    def read(self, position=(1, 0)):
+        # Record lengkap sejak position (segmen, offset) -> (records, posisi akhir, jumlah baris rusak)
+        segment, offset = position
+        records, corrupt = [], 0
+        numbers = [number for number in self.segments() if number >= segment]
+        for i, number in enumerate(numbers):
+            start = offset if number == segment else 0
+            with open(self._path(number), "rb") as f:
+                f.seek(start)
+                data = f.read()
+            last = i == len(numbers) - 1
+            end = data.rfind(b"\n") + 1
+            # Baris tanpa newline di segmen aktif mungkin sedang ditulis: baca lagi nanti
+            complete = data[:end] if last else data
+            for line in complete.splitlines():
+                if not line:
+                    continue
+                record = decode_record(line)
+                if record is None:
+                    corrupt += 1
+                else:
+                    records.append(record)
+            segment, offset = number, start + (end if last else len(data))
+        return records, (segment, offset), corrupt
+
+    def prune(self, position):
+        # Hapus segmen yang seluruhnya sudah dikompaksi (sebelum segmen posisi)
+        removed = [number for number in self.segments() if number < position[0]]
+        for number in removed:
+            os.remove(self._path(number))
+        return removed
+
+
+def record_key(record):
+    # Record lama (sebelum ada kunci idempotensi) memakai id-nya sendiri
+    return record.get("key") or record["id"]
+
+
+def unique_records(records, store=None):
+    # Buang record dengan kunci yang sudah ada di store (kolom ID dikodekan kamus, cek O(1))
+    # atau yang muncul lebih dulu di batch yang sama
+    seen = set()
+    result = []
+    for record in records:
+        key = record_key(record)
+        if key in seen or (store is not None and store.has_category(ID_COLUMN, key)):
+            continue
+        seen.add(key)
+        result.append(record)
+    return result
+
+
+def records_frame(records):
+    # Record -> DataFrame tata letak store: Timestamp, ID, teks bebas (metadata) + item skor 0..4
+    text_columns, item_columns = {}, {}
+    for record in records:
+        text_columns.update(dict.fromkeys(record["text"]))
+        item_columns.update(dict.fromkeys(record["answers"]))
+    data = {
+        TIMESTAMP_COLUMN: [record["submitted_at"] for record in records],
+        ID_COLUMN: [record_key(record) for record in records],
+    }
+    for column in text_columns:
+        data[column] = [record["text"].get(column) for record in records]
+    for column in item_columns:
+        data[column] = [likert_score(record["answers"].get(column)) or 0 for record in records]
+    return pd.DataFrame(data), list(item_columns)
+
+
+def store_position(store):
+    source = store.source if store is not None else None
+    if not source or source.get("kind") != "response_log":
+        return None
+    return tuple(source["position"])
+
+
+def compact(root=RESPONSE_DIR, store_path=None):
+    # Pindahkan record baru dari log ke ColumnStore; None jika proses lain sedang mengompaksi
+    log = ResponseLog(root)
+    store_path = store_path or os.path.join(root, "store")
+    with _flock(os.path.join(root, "COMPACT.lock"), blocking=False) as locked:
+        if not locked:
+            return None
+        store = ColumnStore.open(store_path)
+        position = store_position(store)
+        records, end, _ = log.read(position or (1, 0))
+        if not records:
+            return 0
+        source = {"kind": "response_log", "position": list(end)}
+        columns = None if position is None else store.metadata_columns + list(store.item_columns)
+        records = unique_records(records, store if columns is not None else None)
+        if not records:
+            # Semua record ganda: cukup majukan posisi log
+            store.append(pd.DataFrame(columns=columns), source)
+            return 0
+        df, item_columns = records_frame(records)
+        if columns is not None and set(df.columns) <= set(columns) and set(item_columns) <= set(store.item_columns):
+            store.append(df.reindex(columns=columns), source)
+        else:
+            if columns is not None:
+                # Pertanyaan baru (versi survei berubah): generasi baru berisi baris lama + baru,
+                # item yang tidak ada pada versi lain bernilai 0 (tidak dijawab)
+                item_columns = list(store.item_columns) + [c for c in item_columns if c not in set(store.item_columns)]
+                df = pd.concat([store.frame().astype(object), df], ignore_index=True)
+                df[item_columns] = df[item_columns].fillna(0)
+            ColumnStore.create(store_path, df, item_columns, source)
+        return len(records)
+
+
+class Compactor:
+    # Thread latar yang memindahkan log ke store secara berkala
+
+    def __init__(self, root=RESPONSE_DIR, store_path=None, interval=COMPACT_INTERVAL):
+        self.root = root
+        self.store_path = store_path
+        self.interval = interval
+        self.last_error = None
+        threading.Thread(target=self._run, name="response-compactor", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                compact(self.root, self.store_path)
+                self.last_error = None
+            except Exception as error:
+                # Log tetap utuh; kompaksi dicoba lagi pada putaran berikutnya
+                self.last_error = error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kompaksi log jawaban survei ke column store.")
+    parser.add_argument("--dir", default=RESPONSE_DIR, help="Direktori log jawaban")
+    parser.add_argument("--store", help="Direktori ColumnStore (default: <dir>/store)")
+    parser.add_argument("--prune", action="store_true", help="Hapus segmen log yang sudah dikompaksi")
+    args = parser.parse_args(argv)
+
+    count = compact(args.dir, args.store)
+    if count is None:
+        print("Kompaksi sedang berjalan di proses lain.")
+        return
+    print(f"{count} jawaban dikompaksi.")
+    if args.prune:
+        store = ColumnStore.open(args.store or os.path.join(args.dir, "store"))
+        position = store_position(store)
+        if position is not None:
+            removed = ResponseLog(args.dir).prune(position)
+            print(f"{len(removed)} segmen log dihapus.")
+
+
+if __name__ == "__main__":
+    main()
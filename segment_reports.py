@@ -0,0 +1,390 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+import analytics
+import charts
+import ingestion
+from comoments import CoMomentAccumulator
+
+# Naikkan bila isi/format laporan berubah agar semua PDF dibuat ulang
+REPORT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Skor item 0 (tidak dijawab) s.d. 4
+SCORE_LEVELS = 5
+# Baris per blok saat membangun histogram agar matriks one-hot sementara tetap kecil
+CHUNK_ROWS = 65_536
+
+# Gambar di PDF: JPEG resolusi sedang, jauh lebih cepat disisipkan fpdf daripada PNG beralpha
+CHART_KWARGS = {"format": "jpg", "dpi": 110, "bbox_inches": "tight", "facecolor": "white",
+                "pil_kwargs": {"quality": 90}}
+
+DIMENSION_LABELS = {"Posisi/Jabatan": "Jabatan", "Masa Kerja": "Masa Kerja", "Usia": "Usia"}
+
+
+def _one_hot(values):
+    # (baris x item) skor 0..4 -> (baris x item*5) indikator nilai per item
+    n, k = values.shape
+    onehot = np.zeros((n, k * SCORE_LEVELS))
+    onehot[np.arange(n)[:, None], np.arange(k) * SCORE_LEVELS + values] = 1
+    return onehot
+
+
+class SegmentCell:
+    # Agregat satu sel (Jabatan, Masa Kerja, Usia) atau gabungan sel: co-moment untuk rata-rata
+    # & validitas, histogram skor per item untuk normalitas, histogram bersama happiness x engagement
+    # untuk Spearman per item, dan histogram bersama skor total untuk Spearman rata-rata.
+
+    def __init__(self, happiness_columns, engagement_columns):
+        self.happiness_columns = pd.Index(happiness_columns)
+        self.engagement_columns = pd.Index(engagement_columns)
+        kh, ke = len(self.happiness_columns), len(self.engagement_columns)
+        self.stats = CoMomentAccumulator(self.happiness_columns.append(self.engagement_columns))
+        self.counts = np.zeros((kh + ke, SCORE_LEVELS), dtype=np.int64)
+        self.joint = np.zeros((kh, ke, SCORE_LEVELS, SCORE_LEVELS), dtype=np.int64)
+        self.total_joint = np.zeros((kh * (SCORE_LEVELS - 1) + 1, ke * (SCORE_LEVELS - 1) + 1), dtype=np.int64)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def add(self, values):
+        kh = len(self.happiness_columns)
+        self.stats.add(values)
+        self.counts += (values[:, :, None] == np.arange(SCORE_LEVELS)).sum(axis=0)
+
+        happiness, engagement = _one_hot(values[:, :kh]), _one_hot(values[:, kh:])
+        joint = np.rint(happiness.T @ engagement).astype(np.int64)
+        self.joint += joint.reshape(kh, SCORE_LEVELS, -1, SCORE_LEVELS).transpose(0, 2, 1, 3)
+
+        # Rata-rata per responden = total / jumlah item, jadi peringkatnya sama dengan peringkat total
+        width = self.total_joint.shape[1]
+        totals = values[:, :kh].sum(axis=1) * width + values[:, kh:].sum(axis=1)
+        self.total_joint += np.bincount(totals, minlength=self.total_joint.size).reshape(self.total_joint.shape)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.counts += other.counts
+        self.joint += other.joint
+        self.total_joint += other.total_joint
+        return self
+
+
+class SegmentAggregates:
+    # Satu kali groupby atas dimensi demografi; setiap segmen (kombinasi nilai atau "All")
+    # dijawab dengan menjumlahkan sel yang cocok, tanpa membaca ulang baris responden.
+
+    def __init__(self, df, schema, dimensions=analytics.METADATA_FILTERS):
+        self.schema = schema
+        self.dimensions = [column for column in dimensions if column in df.columns]
+        self.cells = {}
+        self.digests = {}
+
+        items = schema.item_columns
+        values = df[items].to_numpy()
+        if values.dtype.kind not in "iu" or (len(values) and (values.min() < 0 or values.max() >= SCORE_LEVELS)):
+            raise ValueError(f"Skor item harus bilangan bulat 0..{SCORE_LEVELS - 1}.")
+        values = values.astype(np.int64)
+
+        groups = df.groupby(self.dimensions, dropna=False, observed=True, sort=False).indices
+        for key, positions in groups.items():
+            key = tuple(_label(v) for v in (key if isinstance(key, tuple) else (key,)))
+            cell = self.cells[key] = SegmentCell(schema.happiness_columns, schema.engagement_columns)
+            digest = hashlib.blake2b(digest_size=16)
+            for start in range(0, len(positions), CHUNK_ROWS):
+                block = values[positions[start:start + CHUNK_ROWS]]
+                cell.add(block)
+                digest.update(block.astype(np.int8).tobytes())
+            self.digests[key] = digest.hexdigest()
+
+    def options(self, dimension):
+        axis = self.dimensions.index(dimension)
+        return sorted({key[axis] for key in self.cells if key[axis] is not None})
+
+    def segments(self, min_count=1):
+        # (selection, sel gabungan, sidik jari data) untuk setiap kombinasi nilai dimensi + "All"
+        levels = [["All"] + self.options(dimension) for dimension in self.dimensions]
+        for selection in itertools.product(*levels):
+            keys = [key for key in self.cells
+                    if all(selected == "All" or value == selected for value, selected in zip(key, selection))]
+            if not keys:
+                continue
+            cell = SegmentCell(self.schema.happiness_columns, self.schema.engagement_columns)
+            for key in keys:
+                cell.merge(self.cells[key])
+            if cell.count < min_count:
+                continue
+            fingerprint = hashlib.blake2b(json.dumps({
+                "version": REPORT_VERSION,
+                "schema": self.schema.to_dict(),
+                "selection": selection,
+                "cells": sorted(self.digests[key] for key in keys),
+            }, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+            yield selection, cell, fingerprint
+
+
+def _label(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def segment_report(selection, cell, schema, dimensions=analytics.METADATA_FILTERS):
+    # Isi laporan satu segmen (data kecil yang bisa dikirim ke worker)
+    happiness_columns, engagement_columns = schema.happiness_columns, schema.engagement_columns
+    report = {
+        "selection": [(DIMENSION_LABELS.get(d, d), v) for d, v in zip(dimensions, selection)],
+        "count": cell.count,
+        "happiness_means": cell.stats.item_means(happiness_columns),
+        "engagement_means": cell.stats.item_means(engagement_columns),
+    }
+    if cell.count < 2:
+        return report
+
+    stats = cell.stats
+    if stats.total_variance(happiness_columns) > 0 and stats.total_variance(engagement_columns) > 0:
+        happiness_validity = stats.item_total_correlation(happiness_columns)
+        engagement_validity = stats.item_total_correlation(engagement_columns)
+        normality = analytics.normality_from_counts(cell.counts, happiness_columns.append(engagement_columns))
+        happiness_normality, engagement_normality = normality.loc[happiness_columns], normality.loc[engagement_columns]
+        report["validity_summary"] = analytics.validity_normality_summary(
+            happiness_validity, engagement_validity,
+            happiness_normality["status"].to_dict(), engagement_normality["status"].to_dict()
+        )
+        report["happiness_validity"] = analytics.validity_table(happiness_validity, happiness_normality, "Total Happiness")
+        report["engagement_validity"] = analytics.validity_table(engagement_validity, engagement_normality, "Total Engagement")
+
+    kh = len(happiness_columns)
+    r = analytics.spearman_from_counts(
+        cell.total_joint[None, None], cell.total_joint.sum(axis=1)[None], cell.total_joint.sum(axis=0)[None],
+        ["Employee Happiness"], ["Employee Engagement"]
+    ).iloc[0, 0]
+    categories = ["Employee Happiness", "Employee Engagement"]
+    report["average_correlation"] = pd.DataFrame([[1.0, r], [r, 1.0]], index=categories, columns=categories)
+    item_correlation = analytics.spearman_from_counts(
+        cell.joint, cell.counts[:kh], cell.counts[kh:], happiness_columns, engagement_columns
+    )
+    report["item_correlation"] = item_correlation
+    report["strong_pairs"] = analytics.strong_positive_pairs(item_correlation)
+    return report
+
+
+def segment_filename(selection):
+    # Nama file mudah dibaca + hash pendek agar nilai seperti "< 25" dan "> 25" tidak bertabrakan
+    slug = "__".join(re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or "x" for value in selection)
+    suffix = hashlib.blake2b(json.dumps(selection).encode("utf-8"), digest_size=4).hexdigest()
+    return f"{slug}-{suffix}.pdf"
+
+
+def _text(value):
+    # Font inti fpdf hanya mendukung latin-1
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+
+def _fit(pdf, value, width):
+    text = _text(value)
+    if pdf.get_string_width(text) <= width - 2:
+        return text
+    while text and pdf.get_string_width(text + "...") > width - 2:
+        text = text[:-1]
+    return text + "..."
+
+
+def _table(pdf, frame, widths, index_label=None):
+    columns = ([index_label] if index_label is not None else []) + list(frame.columns)
+    pdf.set_font("Helvetica", "B", 8)
+    for column, width in zip(columns, widths):
+        pdf.cell(width, 6, _fit(pdf, column, width), border=1, align="C")
+    pdf.ln()
+    pdf.set_font("Helvetica", "", 8)
+    for label, row in frame.iterrows():
+        cells = ([label] if index_label is not None else []) + list(row)
+        for i, (value, width) in enumerate(zip(cells, widths)):
+            if isinstance(value, (float, np.floating)):
+                value = "-" if np.isnan(value) else f"{value:.3f}"
+            pdf.cell(width, 5, _fit(pdf, value, width), border=1, align="L" if i == 0 else "C")
+        pdf.ln()
+
+
+def _heading(pdf, text):
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 8, _text(text), ln=1)
+    pdf.set_font("Helvetica", "", 10)
+
+
+def _chart(pdf, directory, name, *args, x=None, w=90, **params):
+    fig = charts.CHARTS[name](*args, **params)
+    path = os.path.join(directory, f"{name}-{len(os.listdir(directory))}.jpg")
+    fig.savefig(path, **CHART_KWARGS)
+    fig.clf()
+    pdf.image(path, x=x, w=w)
+
+
+def _means_section(pdf, directory, report):
+    _heading(pdf, "1. Rata-rata Skor (Skala 1 s.d 4)")
+    for label, key in (("Employee Happiness", "happiness_means"), ("Employee Engagement", "engagement_means")):
+        summary = analytics.summarize_item_means(report[key])
+        pdf.multi_cell(0, 5, _text(
+            f"{label}: rata-rata keseluruhan {summary['overall']}\n"
+            f"Skor tertinggi: {summary['max_question']} ({summary['max_value']})\n"
+            f"Skor terendah: {summary['min_question']} ({summary['min_value']})"
+        ))
+        pdf.ln(1)
+    top = pdf.get_y()
+    _chart(pdf, directory, "bar", report["happiness_means"], "blue", "Rata-rata Employee Happiness", x=10)
+    bottom = pdf.get_y()
+    pdf.set_y(top)
+    _chart(pdf, directory, "bar", report["engagement_means"], "green", "Rata-rata Employee Engagement", x=105)
+    pdf.set_y(max(bottom, pdf.get_y()))
+
+
+def _validity_section(pdf, report):
+    pdf.add_page()
+    _heading(pdf, "2. Uji Validitas & Normalitas")
+    if "validity_summary" not in report:
+        pdf.multi_cell(0, 5, "Data terlalu sedikit atau skor total tidak bervariasi; validitas tidak dapat dihitung.")
+        return
+    _table(pdf, report["validity_summary"], [46, 36, 36, 36, 36])
+    for title, key in (("Employee Happiness", "happiness_validity"), ("Employee Engagement", "engagement_validity")):
+        pdf.ln(4)
+        pdf.set_font("Helvetica", "B", 10)
+        pdf.cell(0, 6, _text(f"Validitas dan Normalitas {title}"), ln=1)
+        _table(pdf, report[key], [80, 40, 28, 21, 21], index_label="Item")
+
+
+def _correlation_section(pdf, directory, report):
+    pdf.add_page()
+    _heading(pdf, "3. Korelasi Employee Happiness & Employee Engagement")
+    if "average_correlation" not in report:
+        pdf.multi_cell(0, 5, "Tidak cukup data untuk menghitung korelasi.")
+        return
+    r = report["average_correlation"].iloc[0, 1]
+    pdf.multi_cell(0, 5, _text(
+        f"Korelasi Spearman rata-rata skor (r) = {r:.2f}, kategori: {analytics.correlation_category(r)}."
+    ))
+    _chart(pdf, directory, "spearman_heatmap", report["average_correlation"], list(report["average_correlation"].columns), x=55)
+    pdf.add_page()
+    _chart(pdf, directory, "item_heatmap", report["item_correlation"], x=10, w=190)
+
+    strong, strong_count, percentage = report["strong_pairs"]
+    pdf.ln(2)
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(0, 6, _text(f"Korelasi Positif Kuat (r > {analytics.STRONG_CORRELATION}) - {strong_count} item ({percentage:.2f}%)"), ln=1)
+    if strong.empty:
+        pdf.set_font("Helvetica", "", 10)
+        pdf.cell(0, 6, "Tidak ada korelasi positif kuat.", ln=1)
+    else:
+        _table(pdf, strong[["Employee Happiness", "Employee Engagement", "Correlation"]], [80, 80, 30])
+
+
+def render_report(report, path):
+    # Dijalankan di worker: grafik + PDF satu segmen, ditulis atomik
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.multi_cell(0, 7, "Laporan Survey Employee Happiness & Engagement")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 6, _text(" | ".join(f"{label}: {value}" for label, value in report["selection"])), ln=1)
+    pdf.cell(0, 6, _text(f"Total Responden: {report['count']}"), ln=1)
+    pdf.cell(0, 6, _text(f"Dibuat: {time.strftime('%Y-%m-%d %H:%M')}"), ln=1)
+    pdf.ln(2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        _means_section(pdf, directory, report)
+        _validity_section(pdf, report)
+        _correlation_section(pdf, directory, report)
+
+    tmp_path = path + ".tmp"
+    pdf.output(tmp_path, "F")
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def generate_reports(df, schema, out_dir, workers=None, force=False, min_count=1, log=print):
+    # Semua segmen dihitung dari satu groupby; hanya segmen yang datanya berubah sejak run
+    # terakhir (atau PDF-nya hilang) yang dirender ulang, paralel di process pool.
+    os.makedirs(out_dir, exist_ok=True)
+    previous = _load_manifest(out_dir)
+    manifest, jobs = {}, []
+
+    aggregates = SegmentAggregates(df, schema)
+    for selection, cell, fingerprint in aggregates.segments(min_count):
+        name = segment_filename(selection)
+        path = os.path.join(out_dir, name)
+        if not force and previous.get(name) == fingerprint and os.path.exists(path):
+            manifest[name] = fingerprint
+            continue
+        jobs.append((name, fingerprint, path, segment_report(selection, cell, schema, aggregates.dimensions)))
+
+    skipped, failed = len(manifest), []
+    log(f"{len(jobs) + skipped} segmen: {len(jobs)} dirender, {skipped} tidak berubah")
+    try:
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers, initializer=charts._init_worker) as pool:
+                futures = {pool.submit(render_report, report, path): (name, fingerprint)
+                           for name, fingerprint, path, report in jobs}
+                for future in as_completed(futures):
+                    name, fingerprint = futures[future]
+                    try:
+                        future.result()
+                    except Exception as error:
+                        failed.append(name)
+                        log(f"Gagal membuat {name}: {error}")
+                        continue
+                    manifest[name] = fingerprint
+    finally:
+        # Segmen yang berhasil tetap dicatat walaupun run terhenti di tengah jalan
+        _write_manifest(out_dir, manifest)
+    return {"rendered": len(jobs) - len(failed), "skipped": skipped, "failed": failed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat laporan PDF survei untuk setiap segmen Jabatan / Masa Kerja / Usia.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="File CSV export survei (default: unduh dari SURVEY_SHEET_URL)")
+    source.add_argument("--url", help="URL export CSV Google Sheets")
+    parser.add_argument("--store", default=os.environ.get("SURVEY_STORE_PATH"), help="Lokasi store kolom lokal untuk unduhan")
+    parser.add_argument("--out", default="reports", help="Folder keluaran PDF")
+    parser.add_argument("--workers", type=int, help="Jumlah proses render (default: jumlah CPU)")
+    parser.add_argument("--min-count", type=int, default=1, help="Lewati segmen dengan responden kurang dari ini")
+    parser.add_argument("--force", action="store_true", help="Render ulang semua segmen")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df, schema = ingestion.load_survey(args.csv, args.url, args.store)
+    result = generate_reports(df, schema, args.out, args.workers, args.force, args.min_count)
+    print(f"Selesai dalam {time.perf_counter() - start:.1f} detik: {result['rendered']} dirender, "
+          f"{result['skipped']} dilewati, {len(result['failed'])} gagal -> {args.out}")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SheetHandler(BaseHTTPRequestHandler):
+    # Meniru endpoint export CSV Google Sheets: ETag/Last-Modified (304), Range (206/416) dan gzip
+    protocol_version = "HTTP/1.1"  # Koneksi keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def _not_modified(self, etag, modified):
+        # If-None-Match didahulukan; If-Modified-Since hanya dipakai bila tidak ada ETag dari klien
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range_start(self, size):
+        # Hanya bentuk "bytes=N-" yang dipakai loader; bentuk lain diabaikan (respons 200)
+        value = self.headers.get("Range", "")
+        if not value.startswith("bytes=") or not value.endswith("-") or "," in value:
+            return None
+        try:
+            return int(value[len("bytes="):-1])
+        except ValueError:
+            return None
+
+    def do_GET(self):
+        body, etag, modified = self.server.current()
+        self.server.requests += 1
+        headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True), "Accept-Ranges": "bytes"}
+
+        if self._not_modified(etag, modified):
+            return self._send(304, b"", headers)
+
+        start = self._range_start(len(body))
+        if start is not None and start >= len(body):
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return self._send(416, b"", headers)
+        if start is not None:
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            return self._send(206, body[start:], headers)
+
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return self._send(200, gzip.compress(body), headers)
+        return self._send(200, body, headers)
+
+    def do_POST(self):
+        # Pengganti endpoint penerima jawaban survei (HttpSink di submission_queue.py)
+        if self.path.split("?")[0] != "/submissions":
+            return self._send(404, b"", {})
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            records = json.loads(body)
+        except ValueError:
+            return self._send(400, b"", {})
+        if not self.server.accept_submissions(records):
+            return self._send(503, b"", {"Retry-After": "1"})
+        payload = json.dumps({"accepted": len(records)}).encode("utf-8")
+        return self._send(200, payload, {"Content-Type": "application/json"})
+
+    def _send(self, status, payload, headers):
+        self.send_response(status)
+        if status in (200, 206) and "Content-Type" not in headers:
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class SheetServer(ThreadingHTTPServer):
+    # Pengganti lokal Google Sheets untuk uji loader/dashboard. Isi CSV diambil dari file
+    # (dibaca ulang bila berubah) atau diganti langsung lewat set_body(). POST /submissions
+    # menampung jawaban survei; fail_submissions = jumlah POST berikutnya yang dijawab 503.
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), body=b"", path=None):
+        super().__init__(address, SheetHandler)
+        self.path = path
+        self.requests = 0
+        self.submissions = []
+        self.fail_submissions = 0
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.set_body(body)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/export?format=csv"
+
+    @property
+    def submissions_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/submissions"
+
+    def accept_submissions(self, records):
+        with self._lock:
+            if self.fail_submissions > 0:
+                self.fail_submissions -= 1
+                return False
+            self.submissions.extend(records)
+            return True
+
+    def set_body(self, body):
+        with self._lock:
+            self._body = body
+            self._etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+            self._modified = time.time()
+
+    def current(self):
+        if self.path:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                with open(self.path, "rb") as f:
+                    self.set_body(f.read())
+                self._mtime = mtime
+        with self._lock:
+            return self._body, self._etag, self._modified
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="sheet-server", daemon=True).start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server CSV lokal pengganti export Google Sheets.")
+    parser.add_argument("path", nargs="?", help="File CSV yang disajikan (dibaca ulang bila berubah)")
+    parser.add_argument("--synthetic", type=int, help="Sajikan data survei sintetis sebanyak N responden")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    if not args.path and not args.synthetic:
+        parser.error("isi path file CSV atau --synthetic N")
+
+    body = b""
+    if args.synthetic:
+        import benchmark_analytics
+        body = benchmark_analytics.synthetic_csv(args.synthetic).encode("utf-8")
+    server = SheetServer((args.host, args.port), body=body, path=args.path)
+    print(f"SURVEY_SHEET_URL={server.url}")
+    print(f"SURVEY_SUBMISSION_SINK={server.submissions_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+import fingerprint_index
+import instrumentation
+import response_log
+
+# Tujuan penyimpanan jawaban:
+#   log                 -> log jawaban lokal (response_log) + kompaksi berkala ke column store
+#   log:<dir>           -> idem, di direktori lain
+#   sqlite:<path>       -> tabel responses di database SQLite
+#   http(s)://...       -> POST JSON berisi daftar record (mis. sheet_server.py /submissions)
+SUBMISSION_SINK = os.environ.get("SURVEY_SUBMISSION_SINK", "log")
+# Cermin opsional (mis. endpoint Apps Script yang menambah baris ke Google Sheets): setiap batch
+# yang sudah tersimpan di sink utama diteruskan lewat antrean terpisah; gagal tidak menahan sink utama
+SUBMISSION_MIRROR = os.environ.get("SURVEY_SUBMISSION_MIRROR")
+# Indeks sidik kunci idempotensi yang sudah tersimpan (dipakai bersama semua proses server);
+# default: <direktori log>/fingerprints.idx
+FINGERPRINT_INDEX = os.environ.get("SURVEY_FINGERPRINT_INDEX")
+
+# Antrean dibatasi: saat penuh, pengiriman baru ditolak (backpressure) alih-alih memori terus naik
+MAX_DEPTH = 10_000
+BATCH_SIZE = 500
+ENQUEUE_TIMEOUT = 0.5
+# Backoff eksponensial (dengan jitter) saat sink gagal; batch ditahan dan dicoba terus
+BACKOFF = 0.5
+MAX_BACKOFF = 30
+CLOSE_TIMEOUT = 10
+HTTP_TIMEOUT = (5, 30)
+
+
+class SubmissionQueueFull(RuntimeError):
+    pass
+
+
+class LogSink:
+    def __init__(self, root=response_log.RESPONSE_DIR, compact_interval=response_log.COMPACT_INTERVAL):
+        self.log = response_log.ResponseLog(root)
+        self.compactor = response_log.Compactor(root, interval=compact_interval) if compact_interval else None
+
+    def write(self, records):
+        # Satu write + satu fsync untuk seluruh batch
+        self.log.append([response_log.encode_record(record) for record in records])
+
+
+class SQLiteSink:
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def _connect(self):
+        # Koneksi dibuat di thread worker (satu-satunya pemakai)
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(id TEXT PRIMARY KEY, submitted_at TEXT NOT NULL, record TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def write(self, records):
+        # Satu transaksi per batch; id sama (percobaan ulang) diabaikan
+        rows = [(r["id"], r["submitted_at"], json.dumps(r, ensure_ascii=False)) for r in records]
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO responses VALUES (?, ?, ?)", rows)
+
+
+class HttpSink:
+    def __init__(self, url, session=None, timeout=HTTP_TIMEOUT):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def write(self, records):
+        response = self.session.post(self.url, json=records, timeout=self.timeout)
+        response.raise_for_status()
+
+
+def sink_from_spec(spec=SUBMISSION_SINK):
+    if spec == "log":
+        return LogSink()
+    if spec.startswith("log:"):
+        return LogSink(spec[len("log:"):])
+    if spec.startswith("sqlite:"):
+        return SQLiteSink(spec[len("sqlite:"):])
+    if spec.startswith(("http://", "https://")):
+        return HttpSink(spec)
+    raise ValueError(f"SURVEY_SUBMISSION_SINK tidak dikenal: {spec!r}")
+
+
+def index_path(spec=SUBMISSION_SINK):
+    if FINGERPRINT_INDEX:
+        return FINGERPRINT_INDEX
+    root = spec[len("log:"):] if spec.startswith("log:") else response_log.RESPONSE_DIR
+    return os.path.join(root, "fingerprints.idx")
+
+
+class SubmissionIndex:
+    # Indeks persisten kunci pengiriman yang sudah tersimpan. Pengecekan dan pencatatan per batch
+    # memegang flock agar proses lain (replika server) melihat tabel yang sama. Jawaban ganda yang
+    # lolos di antara cek dan catat (dua proses, kunci sama) tetap dibuang saat kompaksi.
+
+    def __init__(self, path=None):
+        path = path or index_path()
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock_path = path + ".lock"
+        with response_log._flock(self._lock_path):
+            self.index = fingerprint_index.FingerprintIndex(path)
+
+    def fresh(self, keys):
+        # Mask kunci yang belum pernah tersimpan (dan pertama kali muncul di batch)
+        fingerprints = fingerprint_index.key_fingerprints(keys)
+        first = fingerprint_index.first_occurrences(fingerprints)
+        with response_log._flock(self._lock_path):
+            self.index.refresh()
+            return first & ~self.index.contains(fingerprints)
+
+    def record(self, keys):
+        with response_log._flock(self._lock_path):
+            self.index.refresh()
+            self.index.add(fingerprint_index.key_fingerprints(keys))
+            self.index.flush()
+
+
+class Ticket:
+    # Status satu pengiriman; wait() hanya dipakai bila pemanggil perlu menunggu tersimpan.
+    # duplicate = True bila kunci sudah pernah tersimpan sehingga jawaban tidak ditulis ulang.
+    __slots__ = ("id", "done", "error", "duplicate")
+
+    def __init__(self, record_id):
+        self.id = record_id
+        self.done = threading.Event()
+        self.error = None
+        self.duplicate = False
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout) and self.error is None
+
+
+class SubmissionQueue:
+    # Antrean pengiriman jawaban: enqueue() langsung kembali, worker latar mengambil semua yang
+    # menunggu (maks. batch_size) dan menulisnya ke sink sebagai satu batch. Dengan index
+    # (SubmissionIndex), jawaban dengan kunci idempotensi yang sudah tersimpan tidak ditulis lagi.
+    # Dengan mirror (SubmissionQueue lain), batch yang sudah tersimpan diteruskan ke sana.
+
+    def __init__(
+        self, sink, max_depth=MAX_DEPTH, batch_size=BATCH_SIZE, backoff=BACKOFF, max_backoff=MAX_BACKOFF, index=None,
+        mirror=None
+    ):
+        self.sink = sink
+        self.index = index
+        self.mirror = mirror
+        self.batch_size = batch_size
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.written = 0
+        self.duplicates = 0
+        self.dropped = 0  # Record yang tidak muat di antrean (hanya untuk antrean cermin)
+        self.retries = 0
+        self.last_error = None
+        self._queue = queue.Queue(max_depth)
+        self._closing = None
+        self._thread = threading.Thread(target=self._run, name="submission-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def enqueue(self, answers, text=None, version=None, key=None, timeout=ENQUEUE_TIMEOUT):
+        if self._closing is not None:
+            raise SubmissionQueueFull("Antrean pengiriman sedang ditutup.")
+        record = response_log.make_record(answers, text, version, key)
+        ticket = Ticket(record["id"])
+        try:
+            self._queue.put((record, ticket), timeout=timeout)
+        except queue.Full:
+            raise SubmissionQueueFull("Antrean pengiriman penuh, silakan coba beberapa saat lagi.") from None
+        return ticket
+
+    def forward(self, records):
+        # Tanpa menunggu: record yang tidak muat dibuang dan dihitung (cermin bersifat best effort)
+        for record in records:
+            if self._closing is not None:
+                self.dropped += 1
+                continue
+            try:
+                self._queue.put_nowait((record, Ticket(record["id"])))
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, stop = [item], False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _deduplicate(self, batch):
+        fresh = self.index.fresh([record["key"] for record, _ in batch])
+        for (_, ticket), keep in zip(batch, fresh):
+            if not keep:
+                ticket.duplicate = True
+                ticket.done.set()
+        self.duplicates += int(np.count_nonzero(~fresh))
+        return [item for item, keep in zip(batch, fresh) if keep]
+
+    def _flush(self, batch):
+        if self.index is not None:
+            batch = self._deduplicate(batch)
+            if not batch:
+                return
+        records = [record for record, _ in batch]
+        delay = self.backoff
+        while True:
+            try:
+                with instrumentation.span("submission_flush"):
+                    self.sink.write(records)
+                break
+            except Exception as error:
+                self.last_error = error
+                self.retries += 1
+                if self._closing is not None and time.monotonic() > self._closing:
+                    # Proses berhenti dan sink tetap gagal: laporkan, jangan menggantung selamanya
+                    print(f"submission_queue: {len(batch)} jawaban gagal disimpan: {error}", file=sys.stderr)
+                    for _, ticket in batch:
+                        ticket.error = error
+                        ticket.done.set()
+                    return
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, self.max_backoff)
+        self.written += len(batch)
+        self.last_error = None
+        if self.index is not None:
+            try:
+                self.index.record([record["key"] for record in records])
+            except Exception as error:
+                # Batch sudah tersimpan; kunci yang gagal dicatat masih disaring saat kompaksi
+                self.last_error = error
+        if self.mirror is not None:
+            self.mirror.forward(records)
+        for _, ticket in batch:
+            ticket.done.set()
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        # Tulis semua yang masih mengantre (dipanggil otomatis saat proses keluar)
+        if self._closing is not None:
+            return
+        self._closing = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(max(0.0, self._closing - time.monotonic()))
+        if self.mirror is not None:
+            # Cermin ditutup setelah antrean utama selesai meneruskan batch terakhir
+            self.mirror.close(timeout)
@@ -0,0 +1,178 @@
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+
+# Definisi survei engagement.py. Modul ini diimpor sekali per proses Streamlit, jadi semua yang
+# di bawah (pertanyaan, tabel label/skor, header HTML) dibangun sekali dan dipakai bersama semua sesi.
+
+# Naikkan bila pertanyaan/skala berubah; ID pertanyaan tidak boleh dipakai ulang untuk kalimat lain
+SURVEY_VERSION = 1
+
+LOGO_URL = "https://www.agungtoyota.co.id/app/sam/assets/addons/sam/sam/samcgi-theme/resources/img/favicons/apple-touch-icon.png?v=1740058172"
+LOGO_URL1 = "https://agungconcern.co.id/wp-content/uploads/2024/08/Logo-Agung-Concern-2024.svg"
+LOGO_URL2 = "https://www.agungtoyota.co.id/app/sam/assets/logo/logo-baru-1.png"
+
+# Halaman berurutan beserta ikonnya
+PAGES = {
+    "Pendahuluan": "",
+    "1": "",
+    "2": "",
+    "3": "",
+    "4": "",
+    "Pertanyaan Terbuka": "📈",
+    "Selesai": "✅"
+}
+
+# Urutan label mengikuti skor 1..4
+LIKERT_SCALE = ("1 - Sangat Tidak Setuju", "2 - Tidak Setuju", "3 - Setuju", "4 - Sangat Setuju")
+
+# (ID, halaman, pertanyaan)
+QUESTIONS = [
+    (1, "1", "Perusahaan memberikan fasilitas dan alat kerja yang saya butuhkan untuk mendukung kelancaran penyelesaian tugas"),
+    (2, "1", "Atasan melakukan pembagian beban kerja sesuai dengan kapasitas dan kapabilitas yang saya miliki"),
+    (3, "1", "Rekan kerja di lingkungan kerja saya berdedikasi untuk menghasilkan pekerjaan yang berkualitas"),
+    (4, "1", "Lingkungan di tempat kerja saya mendorong untuk pengembangan diri saya"),
+    (5, "2", "Atasan saya mendorong saya untuk ikut berpartisipasi memberikan ide yang baik, dan menerapkannya di pekerjaan"),
+    (6, "2", "Saya memiliki teman baik di tempat kerja"),
+    (7, "2", "Saya menerima penghasilan yang sesuai dengan apa yang saya kerjakan"),
+    (8, "2", "Saya memiliki kesempatan untuk dapat melakukan yang terbaik dalam pekerjaan saya setiap hari"),
+    (9, "3", "Atasan dan lingkungan sekitar saya di tempat kerja peduli terhadap saya"),
+    (10, "3", "Jam kerja di perusahaan (Termasuk cuti & izin tidak masuk kerja) memenuhi kebutuhan bisnis & kebutuhan pribadi karyawan"),
+    (11, "3", "Saya mendapatkan kesempatan untuk menyampaikan pendapat di tempat kerja"),
+    (12, "3", "Atasan saya dan lingkungan kerja saya memastikan progress pekerjaan saya dalam 6 bulan terakhir"),
+    (13, "4", "Atasan saya menghargai saya di tempat kerja"),
+    (14, "4", "Perusahaan memberikan kesempatan saya untuk dapat belajar dan berkembang"),
+    (15, "4", "Saya mendapatkan pelatihan yang sesuai untuk kelancaran pekerjaan dalam setahun terakhir"),
+    (16, "4", "Saya memiliki kesempatan berdiskusi dengan atasan mengenai jenjang karir dan program pengembangan diri saya"),
+]
+
+FREE_TEXT_QUESTION = "Harapan Untuk Lebih Bahagia"
+
+# CSS dan header/footer halaman survei
+HEADER_HTML = f"""
+    <style>
+        /* Default: Tampilan Laptop / Desktop */
+        .header-container {{
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            padding: 10px 50px;
+            background-color: rgba(240, 240, 255, 0.6);
+            border-radius: 10px;
+            text-align: center;
+        }}
+
+        .header-logo {{
+            width: 150px;
+            max-width: 20%;
+            height: auto;
+        }}
+
+        h1 {{
+            font-size: 40px !important;
+            text-align: center;
+            color: black !important;
+        }}
+
+        .stButton button {{
+            width: 100%;
+            font-size: 22px !important;
+            padding: 10px;
+            background: linear-gradient(to bottom, #d8bfff, #a0c4ff);
+            color: black;
+            border-radius: 12px;
+            border: 2px solid #cdb4db;
+            box-shadow: 2px 2px 5px rgba(0, 0, 0, 0.15);
+            transition: all 0.2s ease-in-out;
+        }}
+
+        /* Footer */
+        .footer-container {{
+            position: relative;
+            width: 100%;
+            background-color: rgba(240, 240, 255, 0.6);
+            text-align: center;
+            padding: 10px;
+            font-size: 14px;
+            border-radius: 10px;
+        }}
+
+        /* MODE MOBILE */
+        @media screen and (max-width: 768px) {{
+            .header-container {{
+                flex-direction: column; /* Elemen turun ke bawah */
+                padding: 10px 20px; /* Padding lebih kecil */
+            }}
+
+            .header-logo {{
+                width: 100px; /* Logo lebih kecil */
+                max-width: 40%; /* Agar tetap proporsional */
+                margin-bottom: 5px;
+            }}
+
+            h1 {{
+                font-size: 28px !important; /* Ukuran lebih kecil di HP */
+            }}
+
+            .stButton button {{
+                font-size: 18px !important; /* Tombol lebih kecil */
+                padding: 15px;
+            }}
+
+            .footer-container {{
+                font-size: 12px; /* Ukuran teks lebih kecil */
+                padding: 8px;
+            }}
+        }}
+    </style>
+
+    <div class="header-container">
+        <img src="{LOGO_URL1}" class="header-logo">
+        <h1>Employee Engagement Survey</h1>
+        <img src="{LOGO_URL2}" class="header-logo">
+    </div>
+
+    <div class="footer-container">
+        <p>© 2025 Agung Toyota - All Rights Reserved | Employee Engagement Survey</p>
+    </div>
+"""
+
+Question = namedtuple("Question", ["id", "page", "text"])
+
+
+class SurveyDefinition:
+    # Survei yang sudah dikompilasi: pertanyaan berurutan dengan ID integer tetap, posisi per halaman
+    # (indeks ke array jawaban int8 per sesi) dan tabel label <-> skor
+
+    def __init__(self, pages, questions, likert_scale, version):
+        ids = [question_id for question_id, _, _ in questions]
+        if len(set(ids)) != len(ids):
+            raise ValueError("ID pertanyaan survei harus unik")
+        self.version = version
+        self.icons = dict(pages)
+        self.pages = tuple(self.icons)
+        self.questions = tuple(Question(*question) for question in questions)
+        self.likert_scale = tuple(likert_scale)
+        self.scores = {label: score for score, label in enumerate(self.likert_scale, start=1)}
+        self.page_positions = {
+            page: np.array([i for i, q in enumerate(self.questions) if q.page == page], dtype=np.intp)
+            for page in self.pages
+        }
+        content = repr((self.pages, self.questions, self.likert_scale)).encode("utf-8")
+        # Kunci sesi: versi + sidik isi, agar jawaban lama tidak terpetakan ke pertanyaan lain
+        self.key = (version, hashlib.blake2b(content, digest_size=8).hexdigest())
+
+    def new_answers(self):
+        # 0 = belum dijawab, 1..4 = skor Likert
+        return np.zeros(len(self.questions), dtype=np.int8)
+
+    def label(self, score):
+        return self.likert_scale[score - 1] if score else None
+
+    def answers_dict(self, answers):
+        # Format record log/sink: kalimat pertanyaan -> label jawaban (nama kolom di dashboard)
+        return {question.text: self.label(int(score)) for question, score in zip(self.questions, answers)}
+
+
+SURVEY = SurveyDefinition(PAGES, QUESTIONS, LIKERT_SCALE, SURVEY_VERSION)
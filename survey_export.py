@@ -0,0 +1,297 @@
+import argparse
+import io
+import re
+import sys
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import ingestion
+
+# Baris per potongan saat ekspor; memori sementara sebanding dengan potongan, bukan total data
+CHUNK_ROWS = 50_000
+# Baris XML sheet yang dibentuk sekaligus (string per sel cukup boros memori)
+XML_ROWS = 5_000
+# Batas baris satu worksheet Excel; sisanya berlanjut ke sheet berikutnya
+XLSX_MAX_ROWS = 1_048_576
+
+CSV_MIME = "text/csv"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+TABLES = ["Responden", "Rata-rata Item", "Validitas", "Korelasi Item"]
+
+
+def frame_chunks(df, rows=None, chunk_rows=CHUNK_ROWS):
+    # Potongan DataFrame untuk baris terpilih (posisi hasil filter; None berarti semua baris)
+    total = len(df) if rows is None else len(rows)
+    if total == 0:
+        yield df.iloc[:0]
+        return
+    for start in range(0, total, chunk_rows):
+        if rows is None:
+            yield df.iloc[start:start + chunk_rows]
+        else:
+            yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def csv_chunks(chunks, encoding="utf-8"):
+    # Header sekali, lalu setiap potongan sebagai bytes CSV
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode(encoding)
+        header = False
+
+
+class _ChunkBuffer:
+    # Tujuan tulis ZipFile tanpa seek: isinya diambil per potongan oleh generator
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _xml_text(value):
+    return escape(_INVALID_XML.sub("", str(value)), {'"': "&quot;"})
+
+
+def _string_cells(values):
+    cells = np.full(len(values), "<c/>", dtype=object)
+    present = pd.notna(values)
+    cells[present] = [
+        f'<c t="inlineStr"><is><t xml:space="preserve">{_xml_text(v)}</t></is></c>' for v in values[present]
+    ]
+    return cells
+
+
+def _column_cells(column):
+    # Satu kolom -> XML sel per baris; angka sebagai <v>, lainnya teks inline
+    if pd.api.types.is_bool_dtype(column):
+        return np.array([f'<c t="b"><v>{int(v)}</v></c>' for v in column], dtype=object)
+    if pd.api.types.is_numeric_dtype(column):
+        values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        cells = np.full(len(values), "<c/>", dtype=object)
+        finite = np.isfinite(values)
+        integral = finite & (values == np.rint(values))
+        cells[integral] = [f"<c><v>{v}</v></c>" for v in values[integral].astype(np.int64).tolist()]
+        other = finite & ~integral
+        cells[other] = [f"<c><v>{v!r}</v></c>" for v in values[other].tolist()]
+        return cells
+    return _string_cells(column.astype(object).to_numpy())
+
+
+def _rows_xml(chunk):
+    columns = [_column_cells(chunk[column]) for column in chunk.columns]
+    if not columns:
+        return ""
+    return "".join("<row>" + "".join(cells) + "</row>" for cells in zip(*columns))
+
+
+def _write_rows(sheet, chunk):
+    for start in range(0, len(chunk), XML_ROWS):
+        sheet.write(_rows_xml(chunk.iloc[start:start + XML_ROWS]).encode("utf-8"))
+
+
+def _sheet_name(name, used):
+    name = re.sub(r"[\[\]:*?/\\]", " ", str(name)).strip()[:31] or "Sheet"
+    base, i = name, 2
+    while name.lower() in used:
+        suffix = f" ({i})"
+        name = base[:31 - len(suffix)] + suffix
+        i += 1
+    used.add(name.lower())
+    return name
+
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = "</sheetData></worksheet>"
+
+
+def xlsx_chunks(sheets, max_rows=XLSX_MAX_ROWS):
+    # Workbook XLSX yang ditulis mengalir: sheets = [(nama, iterable potongan DataFrame)].
+    # Setiap worksheet ditulis baris demi baris ke entri zip, tanpa membangun workbook di memori.
+    buffer = _ChunkBuffer()
+    names, used = [], set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for title, chunks in sheets:
+            sheet, entry, rows, header = None, None, 0, None
+            for chunk in chunks:
+                if header is None:
+                    header = pd.DataFrame([list(chunk.columns)], columns=chunk.columns).astype(object)
+                start = 0
+                while sheet is None or start < len(chunk):
+                    if sheet is None or rows >= max_rows:
+                        # Sheet baru (pertama, atau lanjutan karena batas baris Excel)
+                        if sheet is not None:
+                            sheet.write(_SHEET_END.encode("utf-8"))
+                            sheet.close()
+                        names.append(_sheet_name(title, used))
+                        entry = f"xl/worksheets/sheet{len(names)}.xml"
+                        sheet = archive.open(entry, "w", force_zip64=True)
+                        sheet.write((_SHEET_START + _rows_xml(header)).encode("utf-8"))
+                        rows = 1
+                    part = chunk.iloc[start:start + max_rows - rows]
+                    _write_rows(sheet, part)
+                    rows += len(part)
+                    start += len(part)
+                    yield buffer.drain()
+            if sheet is not None:
+                sheet.write(_SHEET_END.encode("utf-8"))
+                sheet.close()
+
+        for entry, xml in _workbook_parts(names).items():
+            archive.writestr(entry, xml)
+    yield buffer.drain()
+
+
+def _workbook_parts(names):
+    sheets = "".join(
+        f'<sheet name="{_xml_text(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(names, 1)
+    )
+    relations = "".join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>' for i in range(1, len(names) + 1)
+    )
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(names) + 1)
+    )
+    header = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    return {
+        "[Content_Types].xml": (
+            f'{header}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        ),
+        "_rels/.rels": (
+            f'{header}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ),
+        "xl/workbook.xml": (
+            f'{header}<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            f'{header}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relations}<Relationship Id="rId{len(names) + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ),
+        "xl/styles.xml": (
+            f'{header}<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+            '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+            '<borders count="1"><border/></borders>'
+            '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+            '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        ),
+    }
+
+
+def derived_tables(df, schema, aggregates, selection=("All", "All", "All")):
+    # Tabel turunan untuk responden terpilih: rata-rata item, validitas & normalitas, pasangan korelasi
+    happiness_columns, engagement_columns = schema.happiness_columns, schema.engagement_columns
+    stats = aggregates.stats(*selection)
+    means = pd.DataFrame({
+        "Item": happiness_columns.append(engagement_columns),
+        "Bagian": ["Employee Happiness"] * len(happiness_columns) + ["Employee Engagement"] * len(engagement_columns),
+        "Rata-rata Skor": pd.concat([stats.item_means(happiness_columns), stats.item_means(engagement_columns)]).to_numpy(),
+    })
+    tables = [("Rata-rata Item", means)]
+    if stats.count < 2:
+        return tables
+
+    rows = aggregates.rows(*selection)
+    if stats.total_variance(happiness_columns) > 0 and stats.total_variance(engagement_columns) > 0:
+        normality = analytics.normality_stats(df, happiness_columns.append(engagement_columns), rows)
+        validity = pd.concat([
+            analytics.validity_table(stats.item_total_correlation(happiness_columns), normality.loc[happiness_columns], "Skor Total"),
+            analytics.validity_table(stats.item_total_correlation(engagement_columns), normality.loc[engagement_columns], "Skor Total"),
+        ])
+        tables.append(("Validitas", validity.rename_axis("Item").reset_index()))
+
+    corr = analytics.item_spearman(df, happiness_columns, engagement_columns, rows=rows)
+    pairs = corr.stack().rename("Correlation").rename_axis(["Employee Happiness", "Employee Engagement"]).reset_index()
+    tables.append(("Korelasi Item", pairs.sort_values("Correlation", ascending=False, kind="stable")))
+    return tables
+
+
+def export_chunks(fmt, df, schema, aggregates, selection=("All", "All", "All"), table="Responden"):
+    # CSV: satu tabel; XLSX: responden + semua tabel turunan, masing-masing satu sheet
+    rows = aggregates.rows(*selection)
+    respondents = df[schema.usecols]
+    if fmt == "csv":
+        if table == "Responden":
+            return csv_chunks(frame_chunks(respondents, rows))
+        frame = dict(derived_tables(df, schema, aggregates, selection)).get(table)
+        if frame is None:
+            frame = pd.DataFrame({"Keterangan": ["Data terlalu sedikit untuk menghitung tabel ini."]})
+        return csv_chunks([frame])
+    sheets = [("Responden", frame_chunks(respondents, rows))]
+    sheets += [(name, [frame]) for name, frame in derived_tables(df, schema, aggregates, selection)]
+    return xlsx_chunks(sheets)
+
+
+def spool(chunks):
+    # Tulis potongan ke file sementara di disk, lalu kembalikan sebagai reader dari awal
+    # (st.download_button membaca BufferedReader sekali, tanpa salinan antara di memori)
+    f = tempfile.TemporaryFile()
+    for chunk in chunks:
+        f.write(chunk)
+    f.flush()
+    f.seek(0)
+    return io.BufferedReader(f.detach())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor responden survei (sesuai filter) dan tabel turunan.")
+    parser.add_argument("output", help="File keluaran .csv atau .xlsx")
+    parser.add_argument("--csv", dest="source", help="File CSV export survei (default: unduh dari SURVEY_SHEET_URL)")
+    parser.add_argument("--table", default="Responden",
+                        help="Tabel untuk keluaran CSV: " + ", ".join(TABLES))
+    parser.add_argument("--jabatan", default="All")
+    parser.add_argument("--masa-kerja", default="All")
+    parser.add_argument("--usia", default="All")
+    args = parser.parse_args(argv)
+
+    df, schema = ingestion.load_survey(args.source)
+    aggregates = ingestion.SurveyAggregates().updated(df, schema.item_columns)
+    fmt = "xlsx" if args.output.lower().endswith(".xlsx") else "csv"
+    selection = (args.jabatan, args.masa_kerja, args.usia)
+    with open(args.output, "wb") as f:
+        for chunk in export_chunks(fmt, df, schema, aggregates, selection, args.table):
+            f.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
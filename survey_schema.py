@@ -0,0 +1,143 @@
+import re
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import instrumentation
+
+# Mapping respon ke angka
+LIKERT_MAPPING = {
+    'Sangat Setuju': 4,
+    'Setuju': 3,
+    'Tidak Setuju': 2,
+    'Sangat Tidak Setuju': 1
+}
+# Format jawaban dari engagement.py, misalnya "3 - Setuju"
+NUMBERED_LIKERT = re.compile(r"^\s*([1-4])(?:\.0)?\s*(?:-.*)?$")
+
+# Jumlah item per bagian, berurutan setelah kolom metadata
+HAPPINESS_ITEMS = 16
+ENGAGEMENT_ITEMS = 22
+FREE_TEXT_COLUMNS = ["Harapan Untuk Lebih Bahagia"]
+
+# Baris contoh untuk mengenali kolom jawaban Likert
+SAMPLE_ROWS = 500
+LIKERT_SHARE = 0.9
+
+METADATA = "metadata"
+HAPPINESS = "happiness"
+ENGAGEMENT = "engagement"
+FREE_TEXT = "free_text"
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def likert_score(value):
+    # Skor 1..4 untuk satu jawaban; None jika bukan jawaban Likert
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value in LIKERT_MAPPING:
+        return LIKERT_MAPPING[value]
+    match = NUMBERED_LIKERT.match(value)
+    return int(match.group(1)) if match else None
+
+
+def likert_to_int8(column):
+    # Kolom kategori -> skor int8 lewat tabel per kategori; kosong/tidak dikenal = 0
+    column = column.astype("category")
+    table = np.zeros(len(column.cat.categories) + 1, dtype=np.int8)
+    for i, value in enumerate(column.cat.categories):
+        table[i] = likert_score(str(value)) or 0
+    # Kode -1 (NaN) menunjuk elemen terakhir yang bernilai 0
+    return table[column.cat.codes.to_numpy()]
+
+
+def _column_kind(values):
+    values = values.dropna()
+    if values.empty:
+        return "empty"
+    scores = values.map(likert_score)
+    return "likert" if scores.notna().mean() >= LIKERT_SHARE else "text"
+
+
+class SurveySchema:
+    # Peran setiap kolom header (metadata, item happiness/engagement, teks bebas) di-resolve
+    # sekali per versi data, lalu dipakai membaca CSV dengan usecols, dtype kategori dan skor int8.
+
+    def __init__(self, roles):
+        self.roles = dict(roles)
+        self.metadata_columns = self._columns(METADATA)
+        self.happiness_columns = self._columns(HAPPINESS)
+        self.engagement_columns = self._columns(ENGAGEMENT)
+        self.free_text_columns = self._columns(FREE_TEXT)
+        self.item_columns = self.happiness_columns.append(self.engagement_columns)
+        self.usecols = list(self.roles)
+
+    def _columns(self, role):
+        return pd.Index([column for column, r in self.roles.items() if r == role])
+
+    @classmethod
+    def resolve(cls, text, sample_rows=SAMPLE_ROWS):
+        # Kenali kolom Likert dari contoh baris; item = rentang kolom Likert pertama s.d. terakhir
+        sample = pd.read_csv(StringIO(text), nrows=sample_rows, dtype=str)
+        kinds = {column: _column_kind(sample[column]) for column in sample.columns}
+        likert = [i for i, kind in enumerate(kinds.values()) if kind == "likert"]
+        if not likert:
+            raise SchemaError("Tidak ditemukan kolom jawaban Likert pada data survei.")
+
+        roles, items = {}, []
+        for i, (column, kind) in enumerate(kinds.items()):
+            if column.startswith("Unnamed:") and kind == "empty":
+                continue  # Kolom kosong tanpa header dari Google Sheets
+            if column in FREE_TEXT_COLUMNS or (kind == "text" and i > likert[0]):
+                roles[column] = FREE_TEXT
+            elif i < likert[0]:
+                roles[column] = METADATA
+            elif i <= likert[-1]:
+                items.append(column)
+                roles[column] = None
+            else:
+                roles[column] = FREE_TEXT
+
+        expected = HAPPINESS_ITEMS + ENGAGEMENT_ITEMS
+        if len(items) != expected:
+            raise SchemaError(
+                f"Tata letak survei berubah: ditemukan {len(items)} kolom item, seharusnya {expected} "
+                f"({HAPPINESS_ITEMS} Employee Happiness + {ENGAGEMENT_ITEMS} Employee Engagement)."
+            )
+        for position, column in enumerate(items):
+            roles[column] = HAPPINESS if position < HAPPINESS_ITEMS else ENGAGEMENT
+        return cls(roles)
+
+    def dtypes(self):
+        # Kolom filter dan item dibaca sebagai kategori: sedikit nilai unik, hemat memori
+        dtypes = {column: "category" for column in self.item_columns}
+        for column in analytics.METADATA_FILTERS:
+            if column in self.roles:
+                dtypes[column] = "category"
+        return dtypes
+
+    def read(self, text):
+        try:
+            with instrumentation.span("csv_parse"):
+                df = pd.read_csv(StringIO(text), usecols=self.usecols, dtype=self.dtypes())
+        except ValueError as error:
+            raise SchemaError(f"Header data survei tidak sesuai skema: {error}") from error
+        with instrumentation.span("likert_mapping"):
+            for column in self.item_columns:
+                df[column] = likert_to_int8(df[column])
+        return df[self.usecols]
+
+    def to_dict(self):
+        return dict(self.roles)
+
+
+def parse_survey_csv(text, schema=None):
+    # Baca CSV survei; skema di-resolve dari data bila belum diberikan
+    schema = schema or SurveySchema.resolve(text)
+    return schema.read(text), schema
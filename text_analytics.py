@@ -0,0 +1,182 @@
+import bisect
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from survey_schema import FREE_TEXT_COLUMNS
+
+# Kolom jawaban terbuka dari engagement.py
+TEXT_COLUMN = FREE_TEXT_COLUMNS[0]
+
+# Kata umum bahasa Indonesia yang tidak membawa makna topik. Kata negasi (tidak, belum, kurang)
+# sengaja tidak dimasukkan agar frasa seperti "tidak adil" tetap utuh.
+STOPWORDS = frozenset("""
+ada adalah adanya agar akan aku anda apa apakah atau atas bagai bagaimana bagi bahwa baik banyak
+beberapa begitu belakang berapa bersama besar bila bisa boleh buat bukan dalam dan dapat dari daripada
+demikian dengan di dia diri disini ditempat dong engkau gimana hal hanya harus hingga ia ingin ini itu
+jadi jika juga kah kalau kali kami kamu kan karena ke kecil kembali kemudian kepada kita lagi lah lain
+lalu maka mana mari masih mau melalui membuat menjadi mereka meski mohon mungkin nah namun nanti
+nya oleh pada para per perlu pula pun saat saja sama sangat sebagai sebelum sedang sehingga sekali
+sekarang selalu semakin semua sendiri seperti sering serta sesuai setelah setiap siapa suatu sudah
+supaya tapi telah tentang tersebut terus tetapi untuk walau yaitu yakni yang lebih bahagia harapan
+saya perusahaan kantor
+""".split())
+
+# Singkatan dan bentuk tidak baku yang sering muncul di jawaban bebas
+NORMALIZATION = {
+    "yg": "yang", "dgn": "dengan", "dg": "dengan", "utk": "untuk", "krn": "karena", "karna": "karena",
+    "tdk": "tidak", "gak": "tidak", "ga": "tidak", "nggak": "tidak", "enggak": "tidak", "ngga": "tidak",
+    "blm": "belum", "sdh": "sudah", "udah": "sudah", "jg": "juga", "bgt": "banget", "lbh": "lebih",
+    "tsb": "tersebut", "dll": "", "dsb": "", "thd": "terhadap", "pd": "pada", "sm": "sama", "kmi": "kami",
+    "gaji2": "gaji", "karyawan2": "karyawan",
+}
+
+# Partikel & kata ganti enklitik yang dilepas dari akhir kata (stemming ringan)
+SUFFIXES = ("nya", "lah", "kah", "pun", "ku", "mu")
+MIN_STEM = 4
+
+# Kata sambung dan tanda baca memutus frasa: "gaji adil dan jenjang jelas" tidak menghasilkan "adil jenjang"
+BREAKS = frozenset("dan atau serta tapi tetapi namun juga karena agar supaya sehingga jika kalau".split())
+
+TOKEN = re.compile(r"[a-z]+(?:-[a-z]+)*|\d+|[.,;:!?()/\n]")
+
+
+def _fold(text):
+    text = "".join(c for c in unicodedata.normalize("NFKD", str(text)) if not unicodedata.combining(c))
+    return text.casefold()
+
+
+def _stem(token):
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def token_runs(text):
+    # Token bermakna per potongan kalimat: huruf kecil, singkatan dinormalkan, stopword & angka dibuang
+    runs, run = [], []
+    for raw in TOKEN.findall(_fold(text)):
+        if raw.isdigit():
+            continue
+        # Kata ulang ("gaji-gaji") dan partikel bertanda hubung ("atasan-nya") -> kata dasarnya
+        parts = raw.split("-")
+        token = parts[0] if len(set(parts)) == 1 or parts[-1] in SUFFIXES else raw
+        token = NORMALIZATION.get(token, token)
+        if token in BREAKS or not token.isalpha() and "-" not in token:
+            if run:
+                runs.append(run)
+                run = []
+            continue
+        token = _stem(token)
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        run.append(token)
+    if run:
+        runs.append(run)
+    return runs
+
+
+def tokenize(text):
+    return [token for run in token_runs(text) for token in run]
+
+
+def phrases(runs):
+    # Bigram token bermakna yang berdekatan dalam satu potongan, mis. "gaji yang adil" -> "gaji adil"
+    return [f"{a} {b}" for run in runs for a, b in zip(run, run[1:]) if a != b]
+
+
+class TextIndex:
+    # Indeks terbalik jawaban terbuka yang diperbarui hanya dari komentar baru (O(token) per komentar):
+    # - posting istilah -> posisi baris (list urut, hanya ditambah di akhir)
+    # - frekuensi dokumen kata & frasa per sel demografi, dijumlahkan sesuai filter saat ditampilkan
+
+    def __init__(self, column=TEXT_COLUMN, dimensions=analytics.METADATA_FILTERS):
+        self.column = column
+        self.dimensions = list(dimensions)
+        self.length = 0
+        self.postings = {}
+        self.cell_terms = {}
+        self.cell_phrases = {}
+        self.cell_comments = Counter()
+        self._owned = set()
+
+    def __deepcopy__(self, memo):
+        # Posting hanya ditambah di akhir dan dibaca sampai self.length, jadi bisa dibagi dengan
+        # salinan lama. Counter per sel kini dipakai bersama: keduanya menyalin sel sebelum mengubahnya.
+        clone = TextIndex.__new__(TextIndex)
+        clone.__dict__.update(self.__dict__)
+        clone.cell_terms = dict(self.cell_terms)
+        clone.cell_phrases = dict(self.cell_phrases)
+        clone.cell_comments = Counter(self.cell_comments)
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def _own(self, kind, table, key):
+        # Copy-on-write: hanya sel yang tersentuh komentar baru yang disalin
+        if (kind, key) not in self._owned:
+            table[key] = Counter(table.get(key, ()))
+            self._owned.add((kind, key))
+        return table[key]
+
+    def update(self, df):
+        n = len(df)
+        if n == 0:
+            return
+        if self.column in df.columns:
+            texts = df[self.column].tolist()
+            dimensions = [d for d in self.dimensions if d in df.columns]
+            keys = df[dimensions].itertuples(index=False, name=None) if dimensions else [()] * n
+            for row, (text, key) in enumerate(zip(texts, keys), start=self.length):
+                if text is None or text != text or not str(text).strip():
+                    continue
+                self.add(row, text, tuple(None if pd.isna(v) else v for v in key))
+        self.length += n
+
+    def add(self, row, text, key):
+        runs = token_runs(text)
+        self.cell_comments[key] += 1
+        terms = {token for run in runs for token in run}
+        for term in terms:
+            self.postings.setdefault(term, []).append(row)
+        if terms:
+            self._own("terms", self.cell_terms, key).update(terms)
+            self._own("phrases", self.cell_phrases, key).update(set(phrases(runs)))
+
+    def _rows(self, term):
+        postings = self.postings.get(term, [])
+        return postings[:bisect.bisect_left(postings, self.length)]
+
+    def _matches(self, key, selection):
+        return all(selected == "All" or value == selected for value, selected in zip(key, selection))
+
+    def comment_count(self, selection=("All", "All", "All")):
+        return sum(count for key, count in self.cell_comments.items() if self._matches(key, selection))
+
+    def top_terms(self, selection=("All", "All", "All"), limit=15, kind="terms"):
+        # Kata/frasa yang paling banyak disebut (jumlah komentar) pada segmen terpilih
+        table = self.cell_terms if kind == "terms" else self.cell_phrases
+        counts = Counter()
+        for key, cell in table.items():
+            if self._matches(key, selection):
+                counts.update(cell)
+        label = "Kata" if kind == "terms" else "Frasa"
+        return pd.DataFrame(counts.most_common(limit), columns=[label, "Jumlah Komentar"])
+
+    def search(self, query, rows=None):
+        # Posisi baris komentar yang memuat semua kata kunci (setelah tokenisasi yang sama)
+        terms = tokenize(query)
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        postings = sorted((self._rows(term) for term in set(terms)), key=len)
+        result = np.asarray(postings[0], dtype=np.int64)
+        for other in postings[1:]:
+            result = np.intersect1d(result, np.asarray(other, dtype=np.int64), assume_unique=True)
+        if rows is not None:
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return result